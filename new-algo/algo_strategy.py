@@ -3,8 +3,6 @@ import random
 import math
 import warnings
 from sys import maxsize
-import json
-import collections
 
 
 """
@@ -64,9 +62,10 @@ class AlgoStrategy(gamelib.AlgoCore):
         self.maze_init = [i for i in self.yellow_encryptors_points if i[1] < 5] 
         self.yellow_filters_points = [[7, 8], [8, 8], [19, 8], [20, 8], [6, 7], [21, 7]]
         self.yellow_encryptors_points = list(reversed(self.yellow_encryptors_points))
-        self.left_score_count = collections.deque(maxlen=3000)
-        self.right_score_count = collections.deque(maxlen=3000)
-        self.left_damaged_more = True
+        # Tally where the enemy breaches us over the last 10 turns. Scrambler defense used to look at
+        # the last 3000 action frames instead, which covered however many turns those frames took.
+        self.breach_tally = gamelib.EventAggregator(config, window_turns=10)
+        self.register_frame_events("breach")
 
     def on_turn(self, turn_state):
         """
@@ -79,6 +78,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         game_state = gamelib.GameState(self.config, turn_state)
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(game_state.turn_number))
         game_state.suppress_warnings(True)  #Comment or remove this line to enable warnings.
+        self.breach_tally.start_turn(game_state.turn_number)
 
         self.starter_strategy(game_state)
 
@@ -170,7 +170,9 @@ class AlgoStrategy(gamelib.AlgoCore):
 
         num_spawn = 4 if (opponent_bits > 10 and self_bits > 7) else 2
 
-        if (self.left_damaged_more):
+        left_breaches = self.breach_tally.get(gamelib.event_aggregator.BREACH_REGION, (1, "left"), gamelib.event_aggregator.WINDOW)
+        right_breaches = self.breach_tally.get(gamelib.event_aggregator.BREACH_REGION, (1, "right"), gamelib.event_aggregator.WINDOW)
+        if left_breaches >= right_breaches:
             pts = self.filter_blocked_locations(left_scrambler_pts, game_state)
             for i in range(num_spawn):
                 if len(pts) > 0:
@@ -241,31 +243,8 @@ class AlgoStrategy(gamelib.AlgoCore):
         Processing the action frames is complicated so we only suggest it if you have time and experience.
         Full doc on format of a game frame at: https://docs.c1games.com/json-docs.html
         """
-        # Let's record at what position we get scored on
-        state = json.loads(turn_string)
-        events = state["events"]
-        breaches = events["breach"]
-        damage_left = 0
-        damage_right = 0
-        for breach in breaches:
-            location = breach[0]
-            unit_owner_self = True if breach[4] == 1 else False
-            # When parsing the frame data directly, 
-            # 1 is integer for yourself, 2 is opponent (StarterKit code uses 0, 1 as player_index instead)
-            if not unit_owner_self:
-                if location[0] > 13:
-                    damage_right += 1
-                else:
-                    damage_left += 1
-
-        self.left_score_count.append(damage_left)
-        self.right_score_count.append(damage_right)
-        
-        self.left_damaged_more = sum(self.left_score_count) >= sum(self.right_score_count)
-        # gamelib.debug_write(self.left_score_count)
-        # gamelib.debug_write(self.right_score_count)
-        # gamelib.debug_write(self.left_damaged_more)
-
+        # Only called for frames with breaches, see register_frame_events in on_game_start
+        self.breach_tally.consume_frame(turn_string)
 
 if __name__ == "__main__":
     algo = AlgoStrategy()
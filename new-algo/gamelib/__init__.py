@@ -1,12 +1,43 @@
 """
 The gamelib package contains modules that assist in algo creation
+
+Importing gamelib only loads what AlgoCore needs to start talking to the game, since the
+game's clock is running from the moment the algo starts. GameState, GameMap, GameUnit,
+EventAggregator and the other modules are loaded the first time they are used.
 """
+import importlib
 
 from .algocore import AlgoCore
 from .util import debug_write
-from .game_state import GameState
-from .unit import GameUnit
-from .game_map import GameMap
 
 __all__ = ["algocore", "game_state", "game_map", "navigation", "unit", "util"]
- 
\ No newline at end of file
+
+"""
+Maps the names gamelib exports lazily to the modules defining them
+"""
+_LAZY_ATTRIBUTES = {
+    "GameState": "game_state",
+    "GameUnit": "unit",
+    "GameMap": "game_map",
+    "EventAggregator": "event_aggregator",
+    "AsyncAlgoCore": "async_algocore",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module("." + _LAZY_ATTRIBUTES[name], __name__), name)
+    elif not name.startswith("_"):
+        try:
+            value = importlib.import_module("." + name, __name__)
+        except ModuleNotFoundError as error:
+            if error.name != "{}.{}".format(__name__, name):
+                raise
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name)) from None
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -1,17 +1,56 @@
+import contextlib
 import json
+import time
 
-from .game_state import GameState
-from .util import get_command, debug_write, BANNER_TEXT, send_command
+from .background import BackgroundWorker
+from .frame_filter import FrameFilter, get_turn_info, extract_section
+from .timing import TurnTimer
+from .budget import ComputeBudget
+from . import watchdog
+from .watchdog import TurnWatchdog
+from .util import get_command, debug_write, BANNER_TEXT
+from .logger import logger
+
+"""
+Kinds of message the game sends, see AlgoCore.message_type
+"""
+MESSAGE_CONFIG = 0
+MESSAGE_TURN = 1
+MESSAGE_ACTION_FRAME = 2
+MESSAGE_END = 3
+MESSAGE_BAD_TURN_INFO = 4
+MESSAGE_UNKNOWN = 5
+_STATE_TYPE_TO_MESSAGE = {0: MESSAGE_TURN, 1: MESSAGE_ACTION_FRAME, 2: MESSAGE_END}
 
 class AlgoCore(object):
     """This class handles communication with the game itself. Your strategy should subclass it.
 
     Attributes:
         * config (JSON): json object containing information about the game
+        * background_result: The latest result of the task returned by background_task on the previous turn, or None
+        * frame_filter (:obj: FrameFilter): The event kinds registered with register_frame_events, or None to see every action frame
+        * turn_timer (:obj: TurnTimer): Times each turn, see the timing module. turn_timer.last_record holds the previous turn's timings.
+        * watchdog (:obj: TurnWatchdog): Submits a fallback turn shortly before waitTimeBotMax if on_turn hasn't submitted, see the watchdog module
+        * compute_budget (:obj: ComputeBudget): Recommends how much search each turn can afford, see the budget module
+        * precomputed (:obj: PrecomputedTables): The tables in precomputed.bin, or None if the algo has no up to date table file. Installed for gamelib to read, see the precompute module.
+        * previous_turn_string: The game state string of the previous turn, or None on the first turn. See get_board_diff.
 
     """
     def __init__(self):
         self.config = None
+        self.frame_filter = None
+        self.turn_timer = TurnTimer()
+        self.watchdog = TurnWatchdog()
+        self.compute_budget = ComputeBudget()
+        self.precomputed = None
+        self.background_result = None
+        self.previous_turn_string = None
+        self._background_worker = BackgroundWorker()
+        self._game_config = None
+        self._turn_string = None
+        # Board snapshots of the previous and current turn strings, built when first asked for
+        self._previous_snapshot = None
+        self._snapshot = None
 
     def on_game_start(self, config):
         """
@@ -36,9 +75,161 @@ class AlgoCore(object):
         """
         pass
 
+    def background_task(self, turn_state):
+        """
+        Override this to start speculative analysis for the next turn, such as enemy paths or
+        candidate layouts, while the action phase plays out. It is called with the same string as
+        on_turn, once on_turn has returned.
+
+        Return a generator, or None for no background work. The generator runs on a background
+        thread and is paused at its next yield whenever an action frame is being handled. Pausing
+        can't interrupt it between yields, so the work done between two yields delays the frame
+        that arrives during it: keep each step to a millisecond or so. The latest value it yields
+        or returns is stored in self.background_result before the next on_turn call, and the
+        generator is then closed at its next yield.
+        """
+        return None
+
+    def register_frame_events(self, *event_kinds):
+        """Only call on_action_frame for frames that contain events of the given kinds
+
+        Frames are checked by scanning the raw string, so frames without relevant events cost almost
+        nothing. Use self.frame_filter.get_events(turn_string) in on_action_frame to decode just the
+        registered events instead of the whole frame.
+
+        Args:
+            * event_kinds: Keys of the frame's events section, for example "breach", "death" or "damage"
+
+        """
+        if self.frame_filter is None:
+            self.frame_filter = FrameFilter()
+        self.frame_filter.register(*event_kinds)
+
+    def wants_action_frame(self, game_state_string):
+        """Check if on_action_frame should be called for an action frame
+
+        """
+        return self.frame_filter is None or self.frame_filter.is_relevant(game_state_string)
+
+    def get_board_diff(self, game_state=None):
+        """Compares the firewalls on the board with the previous turn's, see the board_diff module
+
+        Args:
+            * game_state: The GameState to compare, this turn's board as the game sent it if None.
+              Units spawned on the GameState count as added.
+
+        Returns:
+            A BoardDiff
+
+        """
+        from .board_diff import diff, snapshot_state, snapshot_string
+        if self._previous_snapshot is None and self.previous_turn_string is not None:
+            self._previous_snapshot = snapshot_string(self._game_config, self.previous_turn_string)
+        if game_state is not None:
+            return diff(self._previous_snapshot, snapshot_state(game_state))
+        if self._snapshot is None and self._turn_string is not None:
+            self._snapshot = snapshot_string(self._game_config, self._turn_string)
+        return diff(self._previous_snapshot, self._snapshot)
+
+    def _record_turn_string(self, game_state_string):
+        """Keeps the latest two turn messages for get_board_diff
+
+        """
+        self.previous_turn_string = self._turn_string
+        self._turn_string = game_state_string
+        self._previous_snapshot = self._snapshot
+        self._snapshot = None
+
     def submit_default_turn(self):
-        send_command("")
-        send_command("")
+        watchdog.submit("", "")
+
+    def message_type(self, game_state_string):
+        """Classifies a message received from the game
+
+        Args:
+            * game_state_string: A line read from stdin
+
+        Returns:
+            One of the MESSAGE_* constants
+
+        """
+        if "replaySave" in game_state_string:
+            return MESSAGE_CONFIG
+        elif "turnInfo" in game_state_string:
+            # Only decode the turnInfo, action frames are large and are usually skipped
+            try:
+                stateType = int(get_turn_info(game_state_string)[0])
+            except (ValueError, TypeError, IndexError):
+                return MESSAGE_BAD_TURN_INFO
+            return _STATE_TYPE_TO_MESSAGE.get(stateType, MESSAGE_BAD_TURN_INFO)
+        return MESSAGE_UNKNOWN
+
+    def _on_config(self, game_state_string):
+        """Sets up timing, the budget and precomputed tables for a new game
+
+        Returns:
+            The parsed config, to pass to on_game_start
+
+        """
+        parsed_config = json.loads(game_state_string)
+        self._game_config = parsed_config
+        self.turn_timer.configure(parsed_config)
+        self.watchdog.configure(parsed_config)
+        self.compute_budget.configure(parsed_config)
+        # precompute, tracing and profiler are imported when first needed, so the algo starts sooner
+        from . import precompute
+        self.precomputed = precompute.load(parsed_config)
+        precompute.install(self.precomputed)
+        return parsed_config
+
+    def _begin_turn(self, game_state_string, received):
+        """Starts timing a turn received at the given time
+
+        Returns:
+            A context manager to call on_turn in, which traces and profiles it
+
+        """
+        self.background_result = self._background_worker.stop()
+        self._record_turn_string(game_state_string)
+        logger.start_turn()
+        turn_number = get_turn_info(game_state_string)[1]
+        self.turn_timer.start_turn(turn_number, received)
+        self.watchdog.arm(turn_number, received)
+        self.compute_budget.start_turn(extract_section(game_state_string, "p1Stats")[3], received)
+        from . import tracing
+        tracing.set_context(turn=turn_number)
+        return self._hook_context("on_turn", turn_number)
+
+    def _end_turn(self, game_state_string):
+        """Stops timing the turn once on_turn has returned, and starts the background task
+
+        """
+        self.watchdog.disarm()
+        self.turn_timer.end_turn()
+        self.compute_budget.end_turn()
+        task = self.background_task(game_state_string)
+        if task is not None:
+            self._background_worker.start(task)
+
+    def _begin_frame(self, game_state_string):
+        """Sets the trace context for an action frame
+
+        Returns:
+            A context manager to call on_action_frame in, which traces and profiles it
+
+        """
+        from . import profiler, tracing
+        turn_info = [None, None, None]
+        if tracing.enabled() or profiler.enabled():
+            turn_info = get_turn_info(game_state_string)
+            tracing.set_context(turn=turn_info[1], frame=turn_info[2])
+        return self._hook_context("on_action_frame", turn_info[1])
+
+    @contextlib.contextmanager
+    def _hook_context(self, name, turn_number):
+        from . import profiler, tracing
+        with tracing.span(name), profiler.sampling(turn_number):
+            yield
 
     def start(self):
         """ 
@@ -51,38 +242,46 @@ class AlgoCore(object):
         while True:
             # Note: Python blocks and hangs on stdin. Can cause issues if connections aren't setup properly and may need to
             # manually kill this Python program.
+            # Buffered debug output is written while we wait for the next message, as is background work
+            logger.flush()
+            self._background_worker.resume()
             game_state_string = get_command()
-            if "replaySave" in game_state_string:
+            received = time.perf_counter()
+            self._background_worker.pause()
+            message_type = self.message_type(game_state_string)
+            if message_type == MESSAGE_CONFIG:
                 """
                 This means this must be the config file. So, load in the config file as a json and add it to your AlgoStrategy class.
                 """
-                parsed_config = json.loads(game_state_string)
-                self.on_game_start(parsed_config)
-            elif "turnInfo" in game_state_string:
-                state = json.loads(game_state_string)
-                stateType = int(state.get("turnInfo")[0])
-                if stateType == 0:
-                    """
-                    This is the game turn game state message. Algo must now print to stdout 2 lines, one for build phase one for
-                    deploy phase. Printing is handled by the provided functions.
-                    """
+                self.on_game_start(self._on_config(game_state_string))
+            elif message_type == MESSAGE_TURN:
+                """
+                This is the game turn game state message. Algo must now print to stdout 2 lines, one for build phase one for
+                deploy phase. Printing is handled by the provided functions.
+                """
+                with self._begin_turn(game_state_string, received):
                     self.on_turn(game_state_string)
-                elif stateType == 1:
-                    """
-                    If stateType == 1, this game_state_string string represents a single frame of an action phase
-                    """
-                    self.on_action_frame(game_state_string)
-                elif stateType == 2:
-                    """
-                    This is the end game message. This means the game is over so break and finish the program.
-                    """
-                    debug_write("Got end state quitting bot.")
-                    break
-                else:
-                    """
-                    Something is wrong? Received an incorrect or improperly formatted string.
-                    """
-                    debug_write("Got unexpected string with turnInfo: {}".format(game_state_string))
+                self._end_turn(game_state_string)
+            elif message_type == MESSAGE_ACTION_FRAME:
+                """
+                If stateType == 1, this game_state_string string represents a single frame of an action phase
+                """
+                if self.wants_action_frame(game_state_string):
+                    with self._begin_frame(game_state_string):
+                        self.on_action_frame(game_state_string)
+            elif message_type == MESSAGE_END:
+                """
+                This is the end game message. This means the game is over so break and finish the program.
+                """
+                self._background_worker.stop()
+                debug_write("Got end state quitting bot.")
+                logger.flush()
+                break
+            elif message_type == MESSAGE_BAD_TURN_INFO:
+                """
+                Something is wrong? Received an incorrect or improperly formatted string.
+                """
+                debug_write("Got unexpected string with turnInfo: {}".format(game_state_string))
             else:
                 """
                 Something is wrong? Received an incorrect or improperly formatted string.
@@ -0,0 +1,198 @@
+import asyncio
+import inspect
+import sys
+import threading
+import time
+
+from .algocore import AlgoCore, MESSAGE_CONFIG, MESSAGE_TURN, MESSAGE_ACTION_FRAME, MESSAGE_END, MESSAGE_BAD_TURN_INFO
+from .util import debug_write, BANNER_TEXT
+from .logger import logger
+
+# Action frames carry the whole board, so allow lines far longer than asyncio's 64KiB default
+_LINE_LIMIT = 2 ** 24
+
+
+class AsyncAlgoCore(AlgoCore):
+    """An AlgoCore that reads from the game on an asyncio event loop.
+
+    Messages are read into a bounded queue as soon as they arrive, so the strategy can run
+    coroutines (see create_background_task) while waiting for the game. Once the queue is full,
+    reading waits for the strategy to take a message, so a slow strategy holds back the game's
+    output rather than buffering it without limit. on_turn and
+    on_action_frame may be defined with async def, in which case they are awaited.
+    Turns are still submitted with GameState.submit_turn, so the protocol is unchanged.
+
+    Attributes:
+        * queue_size (int): The maximum number of messages read ahead of the strategy
+        * coalesce_action_frames (bool): If True, an action frame is skipped when the next message
+          waiting is also an action frame. Events in skipped frames are lost.
+        * dropped_action_frames (int): The number of action frames skipped this game
+
+    """
+    def __init__(self):
+        super().__init__()
+        self.queue_size = 1024
+        self.coalesce_action_frames = False
+        self.dropped_action_frames = 0
+        self._background_tasks = set()
+        self._idle = None
+
+    def start(self):
+        """
+        Start the parsing loop on a new event loop. Returns once the game ends.
+        """
+        asyncio.run(self.start_async())
+
+    async def start_async(self):
+        """
+        The parsing loop. Behaves like AlgoCore.start, but awaits async hooks and keeps reading
+        from the game while they run.
+        """
+        debug_write(BANNER_TEXT)
+        self._idle = asyncio.Event()
+        queue = asyncio.Queue(self.queue_size)
+        reader = asyncio.ensure_future(self._read_messages(queue))
+        # The next message, taken off the queue early to check whether an action frame is stale
+        lookahead = None
+        try:
+            while True:
+                if lookahead is not None:
+                    message, lookahead = lookahead, None
+                elif queue.empty():
+                    logger.flush()
+                    self._idle.set()
+                    message = self._classify(await queue.get())
+                    self._idle.clear()
+                else:
+                    message = self._classify(queue.get_nowait())
+                game_state_string, message_type, received = message
+                if game_state_string is None:
+                    debug_write("Got EOF, parent game process must have died, exiting for cleanup")
+                    break
+                if message_type == MESSAGE_ACTION_FRAME and self.coalesce_action_frames and not queue.empty():
+                    lookahead = self._classify(queue.get_nowait())
+                    if lookahead[1] == MESSAGE_ACTION_FRAME:
+                        self.dropped_action_frames += 1
+                        continue
+                if not await self._handle_message(game_state_string, message_type, received):
+                    break
+        finally:
+            reader.cancel()
+            self._background_worker.stop()
+            for task in list(self._background_tasks):
+                task.cancel()
+            logger.flush()
+
+    def create_background_task(self, coroutine):
+        """Runs a coroutine on the event loop alongside message handling
+
+        The task is cancelled when the game ends. Coroutines should await often, for example
+        with wait_until_idle, so that messages are handled promptly.
+
+        Args:
+            * coroutine: The coroutine to run
+
+        Returns:
+            The asyncio.Task running the coroutine
+
+        """
+        task = asyncio.ensure_future(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def wait_until_idle(self):
+        """Waits until every message received so far has been handled
+
+        """
+        await self._idle.wait()
+
+    def _classify(self, entry):
+        """Turns a queue entry into a (message, message type, time received) tuple
+
+        """
+        if entry is None:
+            return None, None, None
+        game_state_string, received = entry
+        return game_state_string, self.message_type(game_state_string), received
+
+    async def _handle_message(self, game_state_string, message_type, received):
+        """Dispatches one message to the strategy
+
+        Returns:
+            False once the game has ended
+
+        """
+        if message_type == MESSAGE_CONFIG:
+            await self._call_hook(self.on_game_start, self._on_config(game_state_string))
+        elif message_type == MESSAGE_TURN:
+            with self._begin_turn(game_state_string, received):
+                await self._call_hook(self.on_turn, game_state_string)
+            self._end_turn(game_state_string)
+        elif message_type == MESSAGE_ACTION_FRAME:
+            if not self.wants_action_frame(game_state_string):
+                return True
+            self._background_worker.pause()
+            with self._begin_frame(game_state_string):
+                await self._call_hook(self.on_action_frame, game_state_string)
+            self._background_worker.resume()
+        elif message_type == MESSAGE_END:
+            debug_write("Got end state quitting bot.")
+            return False
+        elif message_type == MESSAGE_BAD_TURN_INFO:
+            debug_write("Got unexpected string with turnInfo: {}".format(game_state_string))
+        else:
+            debug_write("Got unexpected string : {}".format(game_state_string))
+        return True
+
+    async def _call_hook(self, hook, argument):
+        result = hook(argument)
+        if inspect.isawaitable(result):
+            await result
+
+    async def _read_messages(self, queue):
+        """Reads lines from stdin into the queue, with the time they were read, until EOF, which is signalled by putting None
+
+        """
+        loop = asyncio.get_running_loop()
+        if sys.platform == "win32":
+            # The windows event loops can't watch stdin, so block on a daemon thread instead. Unlike an
+            # executor thread, it can't keep the process alive if the game ends without closing stdin.
+            lines = asyncio.Queue()
+            taken = threading.Semaphore(0)
+            threading.Thread(target=_read_stdin_lines, args=(loop, lines, taken), daemon=True).start()
+            while True:
+                entry = await lines.get()
+                await queue.put(entry)
+                if entry is None:
+                    return
+                taken.release()
+
+        stream = asyncio.StreamReader(limit=_LINE_LIMIT)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stream), sys.stdin)
+        while True:
+            line = await stream.readline()
+            if line == b"":
+                await queue.put(None)
+                return
+            await queue.put((line.decode(), time.perf_counter()))
+
+
+def _read_stdin_lines(loop, lines, taken):
+    """Reads lines from stdin on a thread and hands them to the event loop, with the time they were read
+
+    A line is only read once the previous one has been taken, so reading still waits while the queue is full.
+    EOF is signalled by handing over None.
+
+    """
+    while True:
+        line = sys.stdin.readline()
+        entry = (line, time.perf_counter()) if line != "" else None
+        try:
+            loop.call_soon_threadsafe(lines.put_nowait, entry)
+        except RuntimeError:
+            # The event loop has closed
+            return
+        if entry is None:
+            return
+        taken.acquire()
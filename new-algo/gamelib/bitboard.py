@@ -0,0 +1,319 @@
+"""
+Helpers for representing sets of map locations as bitboards.
+
+A bitboard is a python int with one bit per tile of the 28x28 arena. The tile
+[x, y] is stored at bit x + y * ARENA_SIZE, so each row of the arena occupies
+ARENA_SIZE consecutive bits.
+"""
+
+ARENA_SIZE = 28
+NUM_CELLS = ARENA_SIZE * ARENA_SIZE
+NUM_WORDS = (NUM_CELLS + 63) // 64
+_FLAG_TABLE = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def edge_locations():
+    """Lists the locations of the arena's edges
+
+    Returns:
+        Four lists of locations, in the order of GameMap.get_edges: top right, top left, bottom left, bottom right
+
+    """
+    half_arena = ARENA_SIZE // 2
+    edges = [[], [], [], []]
+    for num in range(half_arena):
+        edges[0].append([half_arena + num, ARENA_SIZE - 1 - num])
+        edges[1].append([half_arena - 1 - num, ARENA_SIZE - 1 - num])
+        edges[2].append([half_arena - 1 - num, num])
+        edges[3].append([half_arena + num, num])
+    return edges
+
+def location_to_index(location):
+    """Gets the cell index of a location
+
+    Args:
+        * location: A map location
+
+    Returns:
+        The index of the location's bit in a bitboard
+
+    """
+    x, y = location
+    return int(x) + int(y) * ARENA_SIZE
+
+def index_to_location(index):
+    """Gets the location of a cell index
+
+    Args:
+        * index: The index of a bit in a bitboard
+
+    Returns:
+        The [x, y] location corresponding to the index
+
+    """
+    return [index % ARENA_SIZE, index // ARENA_SIZE]
+
+def to_bitboard(locations):
+    """Builds a bitboard from a list of locations
+
+    Args:
+        * locations: A list of map locations
+
+    Returns:
+        A bitboard with the bit of every given location set
+
+    """
+    bitboard = 0
+    for location in locations:
+        bitboard |= 1 << location_to_index(location)
+    return bitboard
+
+def to_locations(bitboard):
+    """Lists the locations set in a bitboard
+
+    Args:
+        * bitboard: A bitboard
+
+    Returns:
+        A list of the locations whose bits are set, in increasing index order
+
+    """
+    locations = []
+    while bitboard:
+        low_bit = bitboard & -bitboard
+        locations.append(index_to_location(low_bit.bit_length() - 1))
+        bitboard ^= low_bit
+    return locations
+
+def to_indexes(bitboard):
+    """Lists the cell indexes set in a bitboard, in increasing order
+
+    """
+    indexes = []
+    while bitboard:
+        low_bit = bitboard & -bitboard
+        indexes.append(low_bit.bit_length() - 1)
+        bitboard ^= low_bit
+    return indexes
+
+def contains(bitboard, location):
+    """Check if a location's bit is set in a bitboard
+
+    """
+    return bool((bitboard >> location_to_index(location)) & 1)
+
+def popcount(bitboard):
+    """The number of locations set in a bitboard
+
+    """
+    return bin(bitboard).count("1")
+
+def mirror_index(index):
+    """Gets the cell index of a cell's reflection across the arena's vertical center line, [x, y] to [27 - x, y]
+
+    """
+    return index + ARENA_SIZE - 1 - 2 * (index % ARENA_SIZE)
+
+def flip_index(index):
+    """Gets the cell index of a cell's reflection across the arena's horizontal center line, [x, y] to [x, 27 - y]
+
+    """
+    return index % ARENA_SIZE + (ARENA_SIZE - 1 - index // ARENA_SIZE) * ARENA_SIZE
+
+def _rows(bitboard):
+    """The bits of a bitboard as ARENA_SIZE strings, from the top row down, each with the highest x first
+
+    """
+    bits = format(bitboard, "0{}b".format(NUM_CELLS))
+    return [bits[start:start + ARENA_SIZE] for start in range(0, NUM_CELLS, ARENA_SIZE)]
+
+def mirror(bitboard):
+    """Reflects a bitboard across the arena's vertical center line, swapping the left and right sides
+
+    """
+    return int("".join(row[::-1] for row in _rows(bitboard)), 2)
+
+def flip(bitboard):
+    """Reflects a bitboard across the arena's horizontal center line, swapping the top and bottom halves
+
+    """
+    return int("".join(reversed(_rows(bitboard))), 2)
+
+def canonicalize(*bitboards):
+    """Gets a key that is the same for a set of bitboards and their mirror images
+
+    Args:
+        * bitboards: Bitboards describing a layout, for example one per player and unit type
+
+    Returns:
+        The key, a tuple of the bitboards or of their mirror images, and True if it holds the mirror images
+
+    """
+    mirrored = tuple(mirror(bitboard) for bitboard in bitboards)
+    if mirrored < bitboards:
+        return mirrored, True
+    return bitboards, False
+
+def mirror_cells(values):
+    """Reflects a list indexed by cell index across the arena's vertical center line
+
+    """
+    return [values[mirror_index(index)] for index in range(NUM_CELLS)]
+
+def to_bytes(bitboard):
+    """Serializes a bitboard as NUM_WORDS little endian 64 bit words
+
+    """
+    return bitboard.to_bytes(NUM_WORDS * 8, "little")
+
+def from_bytes(data):
+    """Deserializes a bitboard written by to_bytes
+
+    """
+    return int.from_bytes(bytes(data), "little")
+
+def to_flags(bitboard):
+    """Expands a bitboard into one byte per cell index, 1 where the bit is set and 0 otherwise
+
+    """
+    return format(bitboard, "0{}b".format(NUM_CELLS))[::-1].encode("ascii").translate(_FLAG_TABLE)
+
+def _in_arena_bounds(x, y):
+    half_arena = ARENA_SIZE // 2
+    if y < half_arena:
+        row_size = y + 1
+    else:
+        row_size = ARENA_SIZE - y
+    return half_arena - row_size <= x < half_arena + row_size
+
+def _build_neighbors(inside):
+    neighbors = []
+    for index in range(NUM_CELLS):
+        x = index % ARENA_SIZE
+        y = index // ARENA_SIZE
+        cells = []
+        # Same order as ShortestPathFinder._get_neighbors: up, down, right, left
+        if y + 1 < ARENA_SIZE and inside[index + ARENA_SIZE]:
+            cells.append(index + ARENA_SIZE)
+        if y > 0 and inside[index - ARENA_SIZE]:
+            cells.append(index - ARENA_SIZE)
+        if x + 1 < ARENA_SIZE and inside[index + 1]:
+            cells.append(index + 1)
+        if x > 0 and inside[index - 1]:
+            cells.append(index - 1)
+        neighbors.append(tuple(cells))
+    return neighbors
+
+"""
+ARENA_MASK has the bit of every location inside the diamond shaped board set.
+NEIGHBORS[index] holds the in bounds neighbors of a cell index.
+"""
+_INSIDE = [_in_arena_bounds(index % ARENA_SIZE, index // ARENA_SIZE) for index in range(NUM_CELLS)]
+ARENA_MASK = int("".join("1" if inside else "0" for inside in reversed(_INSIDE)), 2)
+NEIGHBORS = _build_neighbors(_INSIDE)
+
+_range_cells = {}
+
+def get_range_cells(radius):
+    """Gets the cells within a radius of every cell, as GameMap.get_locations_in_range finds them
+
+    Args:
+        * radius: The radius of the area
+
+    Returns:
+        A tuple indexed by cell index of tuples of the in bounds cell indexes in range. Cells outside the arena have none.
+
+    """
+    cells = _range_cells.get(radius)
+    if cells is not None:
+        return cells
+    # Imported here since precompute imports this module
+    from .precompute import installed
+    tables = installed()
+    if tables is not None and tables.has_range(radius):
+        cells = _range_cells[radius] = tables.get_range_cells(radius)
+        return cells
+    limit = (radius + 0.51) ** 2
+    cells = []
+    for index in range(NUM_CELLS):
+        x = index % ARENA_SIZE
+        y = index // ARENA_SIZE
+        in_range = []
+        if _INSIDE[index]:
+            # The same bounds as get_locations_in_range, which truncate towards zero
+            for i in range(int(x - radius), int(x + radius + 1)):
+                for j in range(int(y - radius), int(y + radius + 1)):
+                    if 0 <= i < ARENA_SIZE and 0 <= j < ARENA_SIZE and _INSIDE[i + j * ARENA_SIZE] and (i - x) ** 2 + (j - y) ** 2 < limit:
+                        in_range.append(i + j * ARENA_SIZE)
+        cells.append(tuple(in_range))
+    cells = _range_cells[radius] = tuple(cells)
+    return cells
+
+_symmetric_ranges = {}
+
+def is_mirror_symmetric(radius):
+    """Check if the cells in range of every cell mirror those of the mirrored cell. get_locations_in_range truncates
+    its bounds towards zero, which makes ranges that aren't whole numbers lopsided.
+
+    """
+    symmetric = _symmetric_ranges.get(radius)
+    if symmetric is None:
+        cells = get_range_cells(radius)
+        symmetric = all(sorted(mirror_index(target) for target in cells[index]) == sorted(cells[mirror_index(index)])
+                        for index in range(NUM_CELLS))
+        _symmetric_ranges[radius] = symmetric
+    return symmetric
+
+
+class MirrorCache:
+    """A bounded cache of values computed from bitboards, shared by layouts that mirror each other
+
+    A value is computed and stored for the canonical orientation of a layout, see canonicalize. Looking up
+    the mirror image of a stored layout returns the stored value reflected with the mirror_value function.
+
+    Attributes:
+        * hits (int): The number of lookups answered from the cache, mirrored or not
+        * mirrored_hits (int): The number of hits answered by reflecting a stored value
+        * misses (int): The number of values computed
+
+    """
+    def __init__(self, mirror_value, max_entries=256):
+        """
+        Args:
+            * mirror_value: A function returning the mirror image of a value
+            * max_entries: The number of values kept. The cache is emptied when it fills up.
+
+        """
+        self.mirror_value = mirror_value
+        self.max_entries = max_entries
+        self.hits = 0
+        self.mirrored_hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def get(self, bitboards, compute, context=None):
+        """Gets the value of a layout, computing it if it isn't stored
+
+        Args:
+            * bitboards: A tuple of bitboards describing the layout
+            * compute: A function taking the bitboards, unpacked, and returning the value for them
+            * context: Anything else the value depends on, such as the config's fingerprint
+
+        Returns:
+            The value for the given bitboards
+
+        """
+        key, mirrored = canonicalize(*bitboards)
+        value = self._entries.get((context, key))
+        if value is None:
+            self.misses += 1
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            value = self._entries[(context, key)] = compute(*key)
+        else:
+            self.hits += 1
+            self.mirrored_hits += mirrored
+        return self.mirror_value(value) if mirrored else value
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,117 @@
+"""
+The game config compiled into flat lookups, built once per game.
+
+Unit types are identified by their index in the config's unitInformation list, so
+FILTER_ID is 0 and REMOVE_ID is 6 with the standard config. Per type stats are
+stored in tuples indexed by type id, so hot paths don't index nested config dicts
+by shorthand.
+
+compile_config memoizes on the config object, so GameState, GameUnit and the rest
+of gamelib can all call it without recompiling, and several configs can be used
+in one process.
+"""
+import hashlib
+import json
+
+"""
+Type ids of the unit types, in config order
+"""
+FILTER_ID = 0
+ENCRYPTOR_ID = 1
+DESTRUCTOR_ID = 2
+PING_ID = 3
+EMP_ID = 4
+SCRAMBLER_ID = 5
+REMOVE_ID = 6
+NUM_UNIT_TYPES = 6
+
+_CACHE_SIZE = 8
+_cache = {}
+
+
+class CompiledConfig:
+    """A game config compiled into constants and per type tuples
+
+    Attributes:
+        * config (JSON): The config this was compiled from
+        * fingerprint (bytes): 16 bytes identifying the config's unit information and resource rules
+        * FILTER, ENCRYPTOR, DESTRUCTOR, PING, EMP, SCRAMBLER, REMOVE (str): The unit shorthands
+        * shorthands (tuple): The shorthand of each type id, including REMOVE
+        * type_ids (dict): Maps each shorthand to its type id
+        * firewall_types (frozenset): The shorthands of the firewall units
+        * all_units (frozenset): The shorthands of every unit that can be spawned
+        * stationary (tuple): Whether each type id is a firewall
+        * cost, range, stability, speed, damage, damage_f, damage_i, damage_to_player (tuple): Stats indexed by type id,
+          as the config gives them, so a cost of 3 stays an int. damage is a firewall's damage, or an encryptor's
+          shield amount. Missing stats are 0.
+        * starting_bits, starting_cores, bits_per_round, cores_per_round, bit_decay_per_round, bit_growth_rate,
+          turn_interval_for_bit_schedule, max_bits, round_start_bit_ramp, bit_ramp_bit_cap_growth_rate,
+          turn_interval_for_bit_cap_schedule, cores_for_player_damage, starting_hp (float): The resource rules
+
+    """
+    def __init__(self, config):
+        self.config = config
+        unit_information = config["unitInformation"]
+        resources = config.get("resources", {})
+        content = json.dumps([unit_information, resources], sort_keys=True).encode("utf-8")
+        self.fingerprint = hashlib.blake2b(content, digest_size=16).digest()
+
+        self.shorthands = tuple(unit_info["shorthand"] for unit_info in unit_information)
+        self.type_ids = {shorthand: type_id for type_id, shorthand in enumerate(self.shorthands)}
+        (self.FILTER, self.ENCRYPTOR, self.DESTRUCTOR, self.PING, self.EMP,
+            self.SCRAMBLER, self.REMOVE) = self.shorthands[:REMOVE_ID + 1]
+        self.firewall_types = frozenset((self.FILTER, self.ENCRYPTOR, self.DESTRUCTOR))
+        self.all_units = frozenset(self.shorthands[:NUM_UNIT_TYPES])
+        self.stationary = tuple(type_id in (FILTER_ID, ENCRYPTOR_ID, DESTRUCTOR_ID) for type_id in range(len(self.shorthands)))
+
+        def stat(key):
+            return tuple(unit_info.get(key, 0) for unit_info in unit_information)
+        self.cost = stat("cost")
+        self.range = stat("range")
+        self.stability = stat("stability")
+        self.speed = stat("speed")
+        self.damage = tuple(unit_info.get("shieldAmount" if type_id == ENCRYPTOR_ID else "damage", 0)
+                            for type_id, unit_info in enumerate(unit_information))
+        self.damage_f = stat("damageF")
+        self.damage_i = stat("damageI")
+        self.damage_to_player = stat("damageToPlayer")
+
+        self.starting_hp = float(resources.get("startingHP", 0))
+        self.starting_bits = float(resources.get("startingBits", 0))
+        self.starting_cores = float(resources.get("startingCores", 0))
+        self.bits_per_round = float(resources.get("bitsPerRound", 0))
+        self.cores_per_round = float(resources.get("coresPerRound", 0))
+        self.cores_for_player_damage = float(resources.get("coresForPlayerDamage", 0))
+        self.bit_decay_per_round = float(resources.get("bitDecayPerRound", 0))
+        self.bit_growth_rate = float(resources.get("bitGrowthRate", 0))
+        self.turn_interval_for_bit_schedule = int(resources.get("turnIntervalForBitSchedule", 1))
+        self.max_bits = float(resources.get("maxBits", float("inf")))
+        self.round_start_bit_ramp = int(resources.get("roundStartBitRamp", 0))
+        self.bit_ramp_bit_cap_growth_rate = float(resources.get("bitRampBitCapGrowthRate", 0))
+        self.turn_interval_for_bit_cap_schedule = int(resources.get("turnIntervalForBitCapSchedule", 1))
+
+    def type_id(self, unit_type):
+        """Gets the type id of a shorthand, or None if it isn't a unit type
+
+        """
+        return self.type_ids.get(unit_type)
+
+
+def compile_config(config):
+    """Gets the CompiledConfig of a config, compiling it the first time
+
+    Args:
+        * config (JSON): The game config
+
+    Returns:
+        The CompiledConfig. The same object is returned for every call with the same config object.
+
+    """
+    entry = _cache.get(id(config))
+    if entry is not None and entry.config is config:
+        return entry
+    if len(_cache) >= _CACHE_SIZE:
+        _cache.clear()
+    compiled = CompiledConfig(config)
+    _cache[id(config)] = compiled
+    return compiled
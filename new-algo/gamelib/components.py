@@ -0,0 +1,169 @@
+"""
+Connected components of the open cells of the arena.
+
+Components labels every cell without a firewall with the pocket of open space it
+belongs to, using a union-find. Each pocket knows which edges it touches and, for
+every edge, its most ideal tile: the edge itself when it touches it, or otherwise
+the tile a unit targeting that edge would self destruct at, see
+ShortestPathFinder._idealness_search. Queries take near constant time:
+
+    components = game_state.game_map.get_components()
+    if not components.touches_edge([13, 27], game_map.BOTTOM_LEFT):
+        # A unit spawned there can't reach our edge and self destructs
+        ...
+
+GameMap.get_components keeps one up to date. Removing a firewall merges the
+pockets around it in place. A union-find can't split a pocket, so adding a firewall
+only marks the labels stale, and they are rebuilt from the map's bitboard on the next
+query. Placing a batch of firewalls therefore costs one rebuild, not one per
+firewall, but pockets aren't updated incrementally when walls go up. Alternate
+builds and queries as little as possible, and query after the whole build phase.
+"""
+import sys
+from array import array
+
+from .bitboard import ARENA_MASK, NEIGHBORS, NUM_CELLS, edge_locations, location_to_index, index_to_location, to_flags
+from .navigation import compute_idealness
+
+"""
+The idealness of every cell for units targeting each edge, see navigation.compute_idealness. Read
+from the precomputed tables when AlgoCore has installed them.
+"""
+_idealness = None
+
+
+def _get_idealness():
+    global _idealness
+    if _idealness is None:
+        _idealness = [compute_idealness(edge) for edge in edge_locations()]
+    return _idealness
+
+
+class Components:
+    """The pockets of open space of a set of firewalls
+
+    Attributes:
+        * blocked (int): A bitboard of the locations holding firewalls
+        * count (int): The number of pockets
+
+    """
+    def __init__(self, blocked):
+        self.blocked = blocked
+        idealness = _get_idealness()
+        self._idealness = idealness
+        open_cells = to_flags(ARENA_MASK & ~blocked)
+        # Roots hold -size, other open cells their parent, blocked cells 0 and are never looked up
+        self._parent = array("i", [-1 if open_cells[index] else 0 for index in range(NUM_CELLS)])
+        # For each root, the (idealness, cell) of its most ideal tile for each edge
+        self._best = [None] * NUM_CELLS
+        self.count = 0
+        for index in range(NUM_CELLS):
+            if open_cells[index]:
+                self.count += 1
+                self._best[index] = [(table[index], index) for table in idealness]
+        for index in range(NUM_CELLS):
+            if open_cells[index]:
+                for neighbor in NEIGHBORS[index]:
+                    # Each pair once
+                    if neighbor > index and open_cells[neighbor]:
+                        self._union(index, neighbor)
+
+    def _find(self, index):
+        parent = self._parent
+        while parent[index] >= 0:
+            grandparent = parent[parent[index]]
+            if grandparent >= 0:
+                # Path halving
+                parent[index] = grandparent
+                index = grandparent
+            else:
+                index = parent[index]
+        return index
+
+    def _union(self, first, second):
+        first = self._find(first)
+        second = self._find(second)
+        if first == second:
+            return
+        parent = self._parent
+        if parent[first] > parent[second]:
+            first, second = second, first
+        # first is the larger set
+        parent[first] += parent[second]
+        parent[second] = first
+        self._best[first] = [max(a, b) for a, b in zip(self._best[first], self._best[second])]
+        self._best[second] = None
+        self.count -= 1
+
+    def open_cell(self, location):
+        """Updates the pockets for a firewall that was removed
+
+        """
+        index = location_to_index(location)
+        if not (self.blocked >> index) & 1:
+            return
+        self.blocked &= ~(1 << index)
+        self._parent[index] = -1
+        self._best[index] = [(table[index], index) for table in self._idealness]
+        self.count += 1
+        for neighbor in NEIGHBORS[index]:
+            if not (self.blocked >> neighbor) & 1:
+                self._union(index, neighbor)
+
+    def is_open(self, location):
+        """Check if a location is in the arena and has no firewall
+
+        """
+        index = location_to_index(location)
+        return bool((ARENA_MASK >> index) & 1) and not (self.blocked >> index) & 1
+
+    def label(self, location):
+        """Gets an id shared by every location of a pocket, or None if the location is blocked or outside the arena
+
+        """
+        if not self.is_open(location):
+            return None
+        return self._find(location_to_index(location))
+
+    def connected(self, location_1, location_2):
+        """Check if a unit could walk between two locations
+
+        """
+        label = self.label(location_1)
+        return label is not None and label == self.label(location_2)
+
+    def size(self, location):
+        """The number of locations in a location's pocket, 0 if it is blocked
+
+        """
+        label = self.label(location)
+        return 0 if label is None else -self._parent[label]
+
+    def touches_edge(self, location, edge):
+        """Check if a unit at a location can reach any location of an edge
+
+        Args:
+            * location: The location of the unit
+            * edge: GameMap.TOP_RIGHT, GameMap.TOP_LEFT, GameMap.BOTTOM_LEFT or GameMap.BOTTOM_RIGHT
+
+        """
+        label = self.label(location)
+        # Only edge locations have the highest idealness
+        return label is not None and self._best[label][edge][0] == sys.maxsize
+
+    def ideal_tile(self, location, edge):
+        """Gets the most ideal location of a location's pocket for a unit targeting an edge
+
+        Args:
+            * location: The location of the unit
+            * edge: GameMap.TOP_RIGHT, GameMap.TOP_LEFT, GameMap.BOTTOM_LEFT or GameMap.BOTTOM_RIGHT
+
+        Returns:
+            A location of the edge if the pocket touches it, otherwise where the unit would self destruct.
+            None if the location is blocked.
+
+        """
+        label = self.label(location)
+        if label is None:
+            return None
+        return index_to_location(self._best[label][edge][1])
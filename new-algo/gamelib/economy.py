@@ -0,0 +1,150 @@
+"""
+Projects bits and cores into future turns for economic planning.
+
+A ResourceModel holds a config's income schedule as per turn tables and memoizes
+projections by (turn, starting amount, horizon, planned spends), so a search that
+asks about the same situation thousands of times only computes it once. Use it
+through GameState.project_resources, or get_resource_model(config) directly.
+
+Each turn a player's bits are reduced by bitDecayPerRound, then earn bitsPerRound
+plus bitGrowthRate for every turnIntervalForBitSchedule turns played, rounded to one
+decimal place like the game does, and are capped. The cap is maxBits, raised by
+bitRampBitCapGrowthRate every turnIntervalForBitCapSchedule turns from
+roundStartBitRamp onwards. Cores earn coresPerRound each turn and don't decay.
+Planned spends are taken off before the next turn's decay.
+"""
+from array import array
+
+from .compiled_config import compile_config
+
+_MAX_CACHED = 1 << 16
+_models = {}
+
+
+class ResourceModel:
+    """The bits and cores income of a config
+
+    Attributes:
+        * compiled_config (:obj: CompiledConfig): The config the model follows
+        * hits (int): The number of projections answered from the cache
+        * misses (int): The number of projections computed
+
+    """
+    def __init__(self, compiled_config):
+        self.compiled_config = compiled_config
+        self.hits = 0
+        self.misses = 0
+        self._bit_income = array("d")
+        self._bit_cap = array("d")
+        self._cache = {}
+        self._extend(100)
+
+    def _extend(self, turns):
+        """Fills the per turn schedule tables up to a number of turns
+
+        """
+        compiled = self.compiled_config
+        for turn in range(len(self._bit_income), turns):
+            self._bit_income.append(compiled.bits_per_round + compiled.bit_growth_rate * (turn // compiled.turn_interval_for_bit_schedule))
+            cap = compiled.max_bits
+            if turn >= compiled.round_start_bit_ramp:
+                cap += compiled.bit_ramp_bit_cap_growth_rate * ((turn - compiled.round_start_bit_ramp) // compiled.turn_interval_for_bit_cap_schedule + 1)
+            self._bit_cap.append(cap)
+
+    def bit_income(self, turn):
+        """The bits earned at the start of a turn, before the cap
+
+        """
+        if turn >= len(self._bit_income):
+            self._extend(turn + 1)
+        return self._bit_income[turn]
+
+    def bit_cap(self, turn):
+        """The most bits a player can hold on a turn
+
+        """
+        if turn >= len(self._bit_cap):
+            self._extend(turn + 1)
+        return self._bit_cap[turn]
+
+    def _lookup(self, key):
+        result = self._cache.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _store(self, key, result):
+        if len(self._cache) >= _MAX_CACHED:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+    def project_bits(self, turn, bits, horizon, spends=()):
+        """Projects a player's bits
+
+        Args:
+            * turn: The current turn number
+            * bits: The bits held at the start of the current turn
+            * horizon: The number of future turns to project
+            * spends: Bits spent on each turn from the current one, as a tuple. Missing turns spend nothing.
+
+        Returns:
+            A tuple of horizon + 1 amounts, the bits at the start of the current turn and each following turn
+
+        """
+        key = ("bits", turn, bits, horizon, spends)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        if turn + horizon >= len(self._bit_income):
+            self._extend(turn + horizon + 1)
+        keep = 1 - self.compiled_config.bit_decay_per_round
+        income = self._bit_income
+        caps = self._bit_cap
+        trajectory = [bits]
+        for step in range(horizon):
+            if step < len(spends):
+                bits -= spends[step]
+            next_turn = turn + step + 1
+            bits = min(round(bits * keep + income[next_turn], 1), caps[next_turn])
+            trajectory.append(bits)
+        return self._store(key, tuple(trajectory))
+
+    def project_cores(self, turn, cores, horizon, spends=()):
+        """Projects a player's cores
+
+        Args:
+            * turn: The current turn number
+            * cores: The cores held at the start of the current turn
+            * horizon: The number of future turns to project
+            * spends: Cores spent on each turn from the current one, as a tuple. Missing turns spend nothing.
+
+        Returns:
+            A tuple of horizon + 1 amounts, the cores at the start of the current turn and each following turn
+
+        """
+        key = ("cores", turn, cores, horizon, spends)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        income = self.compiled_config.cores_per_round
+        trajectory = [cores]
+        for step in range(horizon):
+            if step < len(spends):
+                cores -= spends[step]
+            cores += income
+            trajectory.append(cores)
+        return self._store(key, tuple(trajectory))
+
+
+def get_resource_model(config):
+    """Gets the ResourceModel of a config. Configs with the same rules share a model and its cache.
+
+    """
+    compiled = compile_config(config)
+    model = _models.get(compiled.fingerprint)
+    if model is None:
+        model = _models[compiled.fingerprint] = ResourceModel(compiled)
+    return model
@@ -0,0 +1,148 @@
+from collections import Counter, deque
+
+from .compiled_config import compile_config
+from .frame_filter import extract_section, get_turn_info, has_events
+
+"""
+Scopes for EventAggregator queries
+"""
+GAME = "game"
+TURN = "turn"
+WINDOW = "window"
+
+"""
+Metrics tallied by EventAggregator and the keys they are counted under.
+player_index is 0 for you and 1 for the enemy, like the rest of gamelib.
+"""
+BREACH = "breach"                # (player_index of the breaching unit, x, y) -> breaches
+BREACH_REGION = "breach_region"  # (player_index of the breaching unit, region) -> breaches
+DAMAGE = "damage"                # (player_index of the damaged unit, region) -> damage taken
+DEATH = "death"                  # (player_index of the dead unit, unit type) -> deaths
+
+_EVENT_KINDS = ("breach", "damage", "death")
+_EPSILON = 1e-9
+
+
+def left_right_region(location):
+    """The default region function, splits the arena into a "left" and a "right" half
+
+    """
+    return "left" if location[0] < 14 else "right"
+
+
+class EventAggregator:
+    """Keeps running tallies of action frame events.
+
+    Each event costs O(1) to record. Tallies are kept for the whole game, for the current
+    turn, and for a sliding window of the most recent turns, so strategies can query them
+    in on_turn instead of keeping their own lists of events.
+
+    Attributes:
+        * window_turns (int): The number of turns, including the current one, covered by the WINDOW scope
+        * turn_number (int): The turn the current TURN scope belongs to
+        * region_of (function): Maps a location to the region key used by BREACH_REGION and DAMAGE
+
+    """
+    def __init__(self, config, window_turns=5, region_of=left_right_region):
+        """
+        Args:
+            * config (JSON): The game config, used to name unit types
+            * window_turns: The number of turns covered by the WINDOW scope
+            * region_of: A function mapping a location to a region key
+
+        """
+        self.window_turns = window_turns
+        self.region_of = region_of
+        self.turn_number = 0
+        self._unit_types = compile_config(config).shorthands
+        self._game = Counter()
+        self._window = Counter()
+        # The most recent turns' tallies, the last one is the current turn
+        self._turns = deque([Counter()])
+
+    def start_turn(self, turn_number):
+        """Moves the TURN and WINDOW scopes forward to the given turn. Called automatically by consume_frame.
+
+        """
+        while self.turn_number < turn_number:
+            self.turn_number += 1
+            if len(self._turns) == self.window_turns:
+                self._evict(self._turns.popleft())
+            self._turns.append(Counter())
+
+    def consume(self, events):
+        """Records the events of one action frame
+
+        Args:
+            * events: A dict mapping event kinds to lists of events, like a frame's "events" section or FrameFilter.get_events
+
+        """
+        for breach in events.get("breach", ()):
+            location, player_index = breach[0], breach[4] - 1
+            self._add((BREACH, player_index, location[0], location[1]), 1)
+            self._add((BREACH_REGION, player_index, self.region_of(location)), 1)
+        for damage in events.get("damage", ()):
+            location, player_index = damage[0], damage[4] - 1
+            self._add((DAMAGE, player_index, self.region_of(location)), damage[1])
+        for death in events.get("death", ()):
+            player_index = death[3] - 1
+            self._add((DEATH, player_index, self._unit_types[death[1]]), 1)
+
+    def consume_frame(self, frame):
+        """Records the events of an action frame string, decoding only the events that are tallied
+
+        Args:
+            * frame: An action frame as passed to on_action_frame
+
+        """
+        self.start_turn(get_turn_info(frame)[1])
+        self.consume({event_kind: extract_section(frame, event_kind) for event_kind in _EVENT_KINDS if has_events(frame, event_kind)})
+
+    def get(self, metric, key, scope=GAME):
+        """Gets a single tally
+
+        Args:
+            * metric: BREACH, BREACH_REGION, DAMAGE or DEATH
+            * key: The key tuple for the metric, see the metric constants. For example (1, "left") for BREACH_REGION.
+            * scope: GAME, TURN or WINDOW
+
+        Returns:
+            The tally, 0 if nothing has been recorded
+
+        """
+        return self._scope(scope)[(metric,) + tuple(key)]
+
+    def totals(self, metric, scope=GAME):
+        """Gets every non zero tally of a metric
+
+        Returns:
+            A dict mapping keys, see the metric constants, to tallies
+
+        """
+        return {key[1:]: value for key, value in self._scope(scope).items() if key[0] == metric and value}
+
+    def _scope(self, scope):
+        if scope == GAME:
+            return self._game
+        elif scope == TURN:
+            return self._turns[-1]
+        elif scope == WINDOW:
+            return self._window
+        raise ValueError("Invalid scope '{}'. Use GAME, TURN or WINDOW.".format(scope))
+
+    def _evict(self, turn):
+        """Removes a turn's tallies from the WINDOW scope, dropping the keys it leaves at zero
+
+        Damage is fractional, so the float rounding left by subtracting it is treated as zero.
+        """
+        for key, amount in turn.items():
+            value = self._window[key] - amount
+            if abs(value) < _EPSILON:
+                del self._window[key]
+            else:
+                self._window[key] = value
+
+    def _add(self, key, amount):
+        self._game[key] += amount
+        self._window[key] += amount
+        self._turns[-1][key] += amount
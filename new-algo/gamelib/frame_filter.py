@@ -0,0 +1,110 @@
+"""
+Reads the parts of a game message a strategy cares about without decoding the
+whole message.
+
+Action frames contain the full board, so json.loads on every frame is most of
+the cost of handling them. The functions here find a single top level section
+by scanning the raw string and decode only that section.
+"""
+import json
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def _value_start(message, key):
+    """Gets the index where the value of a key starts, or -1 if the key is not in the message
+
+    """
+    index = message.find('"{}":'.format(key))
+    if index == -1:
+        return -1
+    index += len(key) + 3
+    while index < len(message) and message[index] in _WHITESPACE:
+        index += 1
+    return index
+
+def extract_section(message, key):
+    """Decodes the value of one key of a message, for example "events" or "p1Stats"
+
+    Args:
+        * message: A message from the game, as a json string
+        * key: The key to find. Keys are matched anywhere in the message, so use keys that appear only once.
+
+    Returns:
+        The decoded value, or None if the key is not in the message
+
+    """
+    index = _value_start(message, key)
+    if index == -1:
+        return None
+    return _DECODER.raw_decode(message, index)[0]
+
+def get_turn_info(message):
+    """Decodes the turnInfo of a message
+
+    Returns:
+        The turnInfo list, [state type, turn number, action phase frame number], or None if the message has no turnInfo
+
+    """
+    return extract_section(message, "turnInfo")
+
+def has_events(message, event_kind):
+    """Check if a message has any events of a kind without decoding them
+
+    Args:
+        * message: A message from the game, as a json string
+        * event_kind: The key of the event list, for example "breach" or "death"
+
+    Returns:
+        True if the message has at least one event of the given kind
+
+    """
+    index = _value_start(message, event_kind)
+    if index == -1:
+        return False
+    index += 1
+    while index < len(message) and message[index] in _WHITESPACE:
+        index += 1
+    return index < len(message) and message[index] != "]"
+
+
+class FrameFilter:
+    """Tracks which kinds of event a strategy wants to see in action frames
+
+    Attributes:
+        * event_kinds (set): The event kinds the strategy registered interest in, for example "breach"
+
+    """
+    def __init__(self, event_kinds=()):
+        self.event_kinds = set(event_kinds)
+
+    def register(self, *event_kinds):
+        """Register interest in one or more event kinds
+
+        """
+        self.event_kinds.update(event_kinds)
+
+    def is_relevant(self, frame):
+        """Check if an action frame has any events of a registered kind
+
+        """
+        for event_kind in self.event_kinds:
+            if has_events(frame, event_kind):
+                return True
+        return False
+
+    def get_events(self, frame):
+        """Decodes the events of the registered kinds in an action frame
+
+        Returns:
+            A dict mapping each registered event kind to its list of events
+
+        """
+        events = {}
+        for event_kind in self.event_kinds:
+            if has_events(frame, event_kind):
+                events[event_kind] = extract_section(frame, event_kind)
+            else:
+                events[event_kind] = []
+        return events
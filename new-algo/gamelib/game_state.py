@@ -1,27 +1,31 @@
 import math
 import json
+import sys
 
 from .navigation import ShortestPathFinder
-from .util import send_command, debug_write
+from .logger import logger
+from . import timing
+from . import tracing
+from . import watchdog
 from .unit import GameUnit
 from .game_map import GameMap
+from .bitboard import NUM_CELLS, MirrorCache, get_range_cells, is_mirror_symmetric, mirror_cells, to_indexes
+from .compiled_config import compile_config, DESTRUCTOR_ID, REMOVE_ID
+from .economy import get_resource_model
+from .zobrist import MASK, hash_resources
 
-def is_stationary(unit_type):
-    return unit_type in FIREWALL_TYPES
+"""
+Threat maps keyed by the layout of the destructors, shared with its mirror image
+"""
+_threat_maps = MirrorCache(mirror_cells)
 
 class GameState:
     """Represents the entire gamestate for a given turn
     Provides methods related to resources and unit deployment
 
     Attributes:
-        * UNIT_TYPE_TO_INDEX (dict): Maps a unit to a corresponding index
-        * FILTER (str): A constant representing the filter unit
-        * ENCRYPTOR (str): A constant representing the encryptor unit
-        * DESTRUCTOR (str): A constant representing the destructor unit
-        * PING (str): A constant representing the ping unit
-        * EMP (str): A constant representing the emp unit
-        * SCRAMBLER (str): A constant representing the scrambler unit
-        * FIREWALL_TYPES (list): A list of the firewall units
+        * compiled_config (:obj: CompiledConfig): The config compiled into type ids and per type stats, shared by every GameState of the game.
+          It holds the unit shorthands FILTER, ENCRYPTOR, DESTRUCTOR, PING, EMP, SCRAMBLER and REMOVE.
 
         * ARENA_SIZE (int): The size of the arena
         * HALF_ARENA (int): Half the size of the arena
@@ -49,39 +53,23 @@ class GameState:
         self.config = config
         self.enable_warnings = True
 
-        global FILTER, ENCRYPTOR, DESTRUCTOR, PING, EMP, SCRAMBLER, REMOVE, FIREWALL_TYPES, ALL_UNITS, UNIT_TYPE_TO_INDEX
-        UNIT_TYPE_TO_INDEX = {}
-        FILTER = config["unitInformation"][0]["shorthand"]
-        UNIT_TYPE_TO_INDEX[FILTER] = 0
-        ENCRYPTOR = config["unitInformation"][1]["shorthand"]
-        UNIT_TYPE_TO_INDEX[ENCRYPTOR] = 1
-        DESTRUCTOR = config["unitInformation"][2]["shorthand"]
-        UNIT_TYPE_TO_INDEX[DESTRUCTOR] = 2
-        PING = config["unitInformation"][3]["shorthand"]
-        UNIT_TYPE_TO_INDEX[PING] = 3
-        EMP = config["unitInformation"][4]["shorthand"]
-        UNIT_TYPE_TO_INDEX[EMP] = 4
-        SCRAMBLER = config["unitInformation"][5]["shorthand"]
-        UNIT_TYPE_TO_INDEX[SCRAMBLER] = 5
-        REMOVE = config["unitInformation"][6]["shorthand"]
-        UNIT_TYPE_TO_INDEX[REMOVE] = 6
-
-        ALL_UNITS = [PING, EMP, SCRAMBLER, FILTER, ENCRYPTOR, DESTRUCTOR]
-        FIREWALL_TYPES = [FILTER, ENCRYPTOR, DESTRUCTOR]
+        self.compiled_config = compile_config(config)
 
         self.ARENA_SIZE = 28
         self.HALF_ARENA = int(self.ARENA_SIZE / 2)
         self.BITS = 0
         self.CORES = 1
 
-        self.game_map = GameMap(self.config)
-        self._shortest_path_finder = ShortestPathFinder()
-        self._build_stack = []
-        self._deploy_stack = []
-        self._player_resources = [
-                {'cores': 0, 'bits': 0},  # player 0, which is you
-                {'cores': 0, 'bits': 0}]  # player 1, which is the opponent
-        self.__parse_state(serialized_string)
+        with timing.span("parse"), tracing.span("GameState.__init__"):
+            self.game_map = GameMap(self.config)
+            self._shortest_path_finder = ShortestPathFinder()
+            self._build_stack = []
+            self._deploy_stack = []
+            self._player_resources = [
+                    {'cores': 0, 'bits': 0},  # player 0, which is you
+                    {'cores': 0, 'bits': 0}]  # player 1, which is the opponent
+            self.__parse_state(serialized_string)
+        watchdog.track(self)
 
     def __parse_state(self, state_line):
         """
@@ -115,24 +103,24 @@ class GameState:
         """
         Helper function for __parse_state to add units to the map.
         """
-        typedef = self.config.get("unitInformation")
+        shorthands = self.compiled_config.shorthands
         for i, unit_types in enumerate(units):
             for uinfo in unit_types:
-                unit_type = typedef[i].get("shorthand")
+                unit_type = shorthands[i]
                 sx, sy, shp = uinfo[:3]
                 x, y = map(int, [sx, sy])
                 hp = float(shp)
                 # This depends on RM always being the last type to be processed
-                if unit_type == REMOVE:
+                if i == REMOVE_ID:
                     # Quick fix will deploy engine fix soon
                     if self.contains_stationary_unit([x,y]):
                         self.game_map[x,y][0].pending_removal = True
                 else:
                     unit = GameUnit(unit_type, self.config, player_number, hp, x, y)
-                    self.game_map[x,y].append(unit)
+                    self.game_map.append_unit(unit)
 
     def __resource_required(self, unit_type):
-        return self.CORES if is_stationary(unit_type) else self.BITS
+        return self.CORES if unit_type in self.compiled_config.firewall_types else self.BITS
 
     def __set_resource(self, resource_type, amount, player_index=0):
         """
@@ -147,20 +135,30 @@ class GameState:
         self._player_resources[player_index][resource_key] = held_resource + amount
 
     def _invalid_player_index(self, index):
-        self.warn("Invalid player index {} passed, player index should always be 0 (yourself) or 1 (your opponent)".format(index))
+        self.warn("Invalid player index {} passed, player index should always be 0 (yourself) or 1 (your opponent)", index)
     
     def _invalid_unit(self, unit):
-        self.warn("Invalid unit {}".format(unit))
+        self.warn("Invalid unit {}", unit)
 
     def submit_turn(self):
         """Submit and end your turn.
         Must be called at the end of your turn or the algo will hang.
         
         """
-        build_string = json.dumps(self._build_stack)
-        deploy_string = json.dumps(self._deploy_stack)
-        send_command(build_string)
-        send_command(deploy_string)
+        with timing.span("submit"):
+            build_string = json.dumps(self._build_stack)
+            deploy_string = json.dumps(self._deploy_stack)
+            watchdog.submit(build_string, deploy_string)
+
+    def record_plan(self):
+        """Record the units spawned so far as the turn to submit if time runs out.
+
+        If the turn has not been submitted shortly before the engine's time limit, AlgoCore's
+        watchdog submits the most recently recorded plan. Without one it submits whatever has
+        been spawned on the first GameState built during the turn. See the watchdog module.
+
+        """
+        watchdog.record_plan(self._build_stack, self._deploy_stack)
 
     def get_resource(self, resource_type, player_index = 0):
         """Gets a players resources
@@ -177,7 +175,7 @@ class GameState:
             self._invalid_player_index(player_index)
             return
         if not resource_type == self.BITS and not resource_type == self.CORES:
-            self.warn("Invalid resource_type '{}'. Please use game_state.BITS or game_state.CORES".format(resource_type))
+            self.warn("Invalid resource_type '{}'. Please use game_state.BITS or game_state.CORES", resource_type)
             return
 
         if resource_type == self.BITS:
@@ -197,7 +195,7 @@ class GameState:
             The number of units affordable of the given unit_type.
 
         """
-        if unit_type not in ALL_UNITS:
+        if unit_type not in self.compiled_config.all_units:
             self._invalid_unit(unit_type)
             return
 
@@ -220,20 +218,38 @@ class GameState:
         """
 
         if turns_in_future < 1 or turns_in_future > 99:
-            self.warn("Invalid turns in future used ({}). Turns in future should be between 1 and 99".format(turns_in_future))
+            self.warn("Invalid turns in future used ({}). Turns in future should be between 1 and 99", turns_in_future)
         if not player_index == 1 and not player_index == 0:
             self._invalid_player_index(player_index)
         if type(current_bits) == int and current_bits < 0:
-            self.warn("Invalid current bits ({}). Current bits cannot be negative.".format(current_bits))
+            self.warn("Invalid current bits ({}). Current bits cannot be negative.", current_bits)
 
         bits = self.get_resource(self.BITS, player_index) if not current_bits else current_bits
-        for increment in range(1, turns_in_future + 1):
-            current_turn = self.turn_number + increment
-            bits *= (1 - self.config["resources"]["bitDecayPerRound"])
-            bits_gained = self.config["resources"]["bitsPerRound"] + (self.config["resources"]["bitGrowthRate"] * (current_turn // self.config["resources"]["turnIntervalForBitSchedule"]))
-            bits += bits_gained
-            bits = round(bits, 1)
-        return bits
+        return get_resource_model(self.config).project_bits(self.turn_number, bits, turns_in_future)[-1]
+
+    def project_resources(self, horizon, bit_spends=None, core_spends=None):
+        """Projects both players' bits and cores over several turns, see the economy module
+
+        Args:
+            * horizon: The number of future turns to project
+            * bit_spends: For each player, the bits they plan to spend on each turn from this one, or None for no spending
+            * core_spends: For each player, the cores they plan to spend on each turn from this one, or None for no spending
+
+        Returns:
+            A tuple (bits, cores). bits[player_index] and cores[player_index] hold horizon + 1 amounts,
+            the player's resources on this turn and each following turn.
+
+        """
+        model = get_resource_model(self.config)
+        bits = []
+        cores = []
+        for player_index in range(2):
+            resources = self._player_resources[player_index]
+            planned_bits = tuple(bit_spends[player_index]) if bit_spends else ()
+            planned_cores = tuple(core_spends[player_index]) if core_spends else ()
+            bits.append(model.project_bits(self.turn_number, resources['bits'], horizon, planned_bits))
+            cores.append(model.project_cores(self.turn_number, resources['cores'], horizon, planned_cores))
+        return bits, cores
 
     def type_cost(self, unit_type):
         """Gets the cost of a unit based on its type
@@ -245,12 +261,11 @@ class GameState:
             The units cost
 
         """
-        if unit_type not in ALL_UNITS:
+        if unit_type not in self.compiled_config.all_units:
             self._invalid_unit(unit_type)
             return
 
-        unit_def = self.config["unitInformation"][UNIT_TYPE_TO_INDEX[unit_type]]
-        return unit_def.get('cost')
+        return self.compiled_config.cost[self.compiled_config.type_ids[unit_type]]
 
     def can_spawn(self, unit_type, location, num=1):
         """Check if we can spawn a unit at a location. 
@@ -268,17 +283,17 @@ class GameState:
             True if we can spawn the unit(s)
 
         """
-        if unit_type not in ALL_UNITS:
+        if unit_type not in self.compiled_config.all_units:
             self._invalid_unit(unit_type)
             return
         
         if not self.game_map.in_arena_bounds(location):
             if self.enable_warnings:
-                self.warn("Could not spawn {} at location {}. Location invalid.".format(unit_type, location))
+                self.warn("Could not spawn {} at location {}. Location invalid.", unit_type, location)
             return False
 
         affordable = self.number_affordable(unit_type) >= num
-        stationary = is_stationary(unit_type)
+        stationary = unit_type in self.compiled_config.firewall_types
         blocked = self.contains_stationary_unit(location) or (stationary and len(self.game_map[location[0],location[1]]) > 0)
         correct_territory = location[1] < self.HALF_ARENA
         on_edge = location in (self.game_map.get_edge_locations(self.game_map.BOTTOM_LEFT) + self.game_map.get_edge_locations(self.game_map.BOTTOM_RIGHT))
@@ -294,7 +309,7 @@ class GameState:
             if not (stationary or on_edge):
                 fail_reason = fail_reason + " Information units must be deployed on the edge."
             if len(fail_reason) > 0:
-                self.warn("Could not spawn {} at location {}.{}".format(unit_type, location, fail_reason))
+                self.warn("Could not spawn {} at location {}.{}", unit_type, location, fail_reason)
 
         return (affordable and correct_territory and not blocked and
                 (stationary or on_edge) and
@@ -312,11 +327,11 @@ class GameState:
             The number of units successfully spawned
 
         """
-        if unit_type not in ALL_UNITS:
+        if unit_type not in self.compiled_config.all_units:
             self._invalid_unit(unit_type)
             return
         if num < 1:
-            self.warn("Attempted to spawn fewer than one units! ({})".format(num))
+            self.warn("Attempted to spawn fewer than one units! ({})", num)
             return
       
         if type(locations[0]) == int:
@@ -330,7 +345,7 @@ class GameState:
                     resource_type = self.__resource_required(unit_type)
                     self.__set_resource(resource_type, 0 - cost)
                     self.game_map.add_unit(unit_type, location, 0)
-                    if is_stationary(unit_type):
+                    if unit_type in self.compiled_config.firewall_types:
                         self._build_stack.append((unit_type, x, y))
                     else:
                         self._deploy_stack.append((unit_type, x, y))
@@ -353,10 +368,10 @@ class GameState:
         for location in locations:
             if location[1] < self.HALF_ARENA and self.contains_stationary_unit(location):
                 x, y = map(int, location)
-                self._build_stack.append((REMOVE, x, y))
+                self._build_stack.append((self.compiled_config.REMOVE, x, y))
                 removed_units += 1
             else:
-                self.warn("Could not remove a unit from {}. Location has no firewall or is enemy territory.".format(location))
+                self.warn("Could not remove a unit from {}. Location has no firewall or is enemy territory.", location)
         return removed_units
 
     def get_target_edge(self, start_location):
@@ -386,14 +401,15 @@ class GameState:
 
         """
         if self.contains_stationary_unit(start_location):
-            self.warn("Attempted to perform pathing from blocked starting location {}".format(start_location))
+            self.warn("Attempted to perform pathing from blocked starting location {}", start_location)
             return
 
         if target_edge is None:
             target_edge = self.get_target_edge(start_location)
 
         end_points = self.game_map.get_edge_locations(target_edge)
-        return self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
+        with timing.span("pathfinding"), tracing.span("find_path_to_edge", start=start_location):
+            return self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
 
     def contains_stationary_unit(self, location):
         """Check if a location is blocked
@@ -414,9 +430,16 @@ class GameState:
                 return unit
         return False
 
-    def warn(self, message):
+    def warn(self, message, *args):
+        """Logs a warning if warnings are enabled
+
+        Args:
+            * message: The warning, or a str.format format string if args are given. It is only formatted if it isn't filtered out by the logger.
+            * args: Values for the format string
+
+        """
         if(self.enable_warnings):
-            debug_write(message)
+            logger.warning(message, *args)
 
     def suppress_warnings(self, suppress):
         """Suppress all warnings
@@ -429,6 +452,22 @@ class GameState:
         self.enable_warnings = not suppress
         self.game_map.enable_warnings = not suppress
 
+    def flipped(self):
+        """Gets a view of the game from the enemy's side, without copying it. See the perspective module.
+
+        """
+        from .perspective import FlippedGameState
+        return FlippedGameState(self)
+
+    def get_hash(self):
+        """Gets a Zobrist hash of the units on the map and both players' resources, see the zobrist module
+
+        Returns:
+            A 64 bit int, the same for any two states with the same units and resources, however they were reached
+
+        """
+        return (self.game_map.get_hash() + hash_resources(self._player_resources)) & MASK
+
     def get_target(self, attacking_unit):
         """Returns target of given unit based on current map of the game board. 
         A Unit can often have many other units in range, and Units that attack do so once each frame.
@@ -445,7 +484,7 @@ class GameState:
         """
 
         if not isinstance(attacking_unit, GameUnit):
-            self.warn("Passed a {} to get_target as attacking_unit. Expected a GameUnit.".format(type(attacking_unit)))
+            self.warn("Passed a {} to get_target as attacking_unit. Expected a GameUnit.", type(attacking_unit))
             return
 
         attacker_location = [attacking_unit.x, attacking_unit.y]
@@ -456,13 +495,14 @@ class GameState:
         target_stability = sys.maxsize
         target_y = self.ARENA_SIZE
         target_x_distance = 0
+        scrambler = attacking_unit.unit_type == self.compiled_config.SCRAMBLER
 
         for location in possible_locations:
             for unit in self.game_map[location]:
                 """
                 NOTE: scrambler units cannot attack firewalls so skip them if unit is firewall
                 """
-                if unit.player_index == attacking_unit.player_index or (attacking_unit.unit_type == SCRAMBLER and is_stationary(unit.unit_type)):
+                if unit.player_index == attacking_unit.player_index or (scrambler and unit.stationary):
                     continue
 
                 new_target = False
@@ -526,15 +566,47 @@ class GameState:
         if not player_index == 0 and not player_index == 1:
             self._invalid_player_index(player_index)
         if not self.game_map.in_arena_bounds(location):
-            self.warn("Location {} is not in the arena bounds.".format(location))
+            self.warn("Location {} is not in the arena bounds.", location)
 
         attackers = []
         """
         Get locations in the range of DESTRUCTOR units
         """
-        possible_locations= self.game_map.get_locations_in_range(location, self.config["unitInformation"][UNIT_TYPE_TO_INDEX[DESTRUCTOR]]["range"])
+        destructor = self.compiled_config.DESTRUCTOR
+        possible_locations= self.game_map.get_locations_in_range(location, self.compiled_config.range[DESTRUCTOR_ID])
         for location in possible_locations:
             for unit in self.game_map[location]:
-                if unit.unit_type == DESTRUCTOR and unit.player_index != player_index:
+                if unit.unit_type == destructor and unit.player_index != player_index:
                     attackers.append(unit)
         return attackers
+
+    def get_threat_map(self, player_index):
+        """Gets the damage enemy destructors would deal each frame at every location
+
+        Args:
+            * player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A list indexed by cell index (see the bitboard module) holding the damage per frame
+            a unit controlled by the given player would take at each location
+
+        """
+        if not player_index == 0 and not player_index == 1:
+            self._invalid_player_index(player_index)
+            return
+
+        compiled = self.compiled_config
+        destructors = self.game_map.get_bitboard(1 - player_index, compiled.DESTRUCTOR)
+        if not is_mirror_symmetric(compiled.range[DESTRUCTOR_ID]):
+            return self._compute_threat_map(destructors)
+        return list(_threat_maps.get((destructors,), self._compute_threat_map, compiled.fingerprint))
+
+    def _compute_threat_map(self, destructors):
+        threat = [0.0] * NUM_CELLS
+        compiled = self.compiled_config
+        damage = compiled.damage[DESTRUCTOR_ID]
+        range_cells = get_range_cells(compiled.range[DESTRUCTOR_ID])
+        for index in to_indexes(destructors):
+            for target in range_cells[index]:
+                threat[target] += damage
+        return threat
@@ -0,0 +1,185 @@
+"""
+Evaluates a wall layout against the enemy's attacks without touching the game map.
+
+evaluate_layout takes a hypothetical set of firewalls and our destructors among
+them, traces the path of an enemy unit from every open cell of the enemy's edges,
+and reports each path's length, the frames it spends in range of each destructor
+and the damage it takes:
+
+    report = gamelib.layout.evaluate_layout(game_state, walls=maze, destructors=destructors, add=options)
+    worst = min(report.damage.values())
+
+Given locations to add or remove walls at, it also reports how the total damage and
+path length would change. Adding a wall off every path can't change any path, so
+those changes are known without pathfinding, and an added wall only retraces the
+paths that cross it. Removing a wall surrounded by walls doesn't retrace anything either.
+"""
+from .bitboard import ARENA_SIZE, NEIGHBORS, NUM_CELLS, get_range_cells, location_to_index, to_bitboard, to_indexes
+from .compiled_config import DESTRUCTOR_ID, PING_ID
+from .navigation import compute_flow_field, trace_path
+from .placement import predict_enemy_paths
+
+
+class LayoutReport:
+    """The enemy's paths through a layout and the damage they take
+
+    Attributes:
+        * paths (dict): Maps each (x, y) enemy spawn location to the path a unit spawned there takes, see
+          placement.predict_enemy_paths
+        * lengths (dict): Maps each spawn location to the number of steps in its path
+        * exposure (dict): Maps each spawn location to a dict from (x, y) destructor locations to the frames
+          its unit spends in range of that destructor
+        * damage (dict): Maps each spawn location to the damage its unit takes
+        * total_length (int): The sum of the path lengths
+        * total_damage (float): The sum of the damage
+        * added (dict): Maps each location given to add to the (change in total damage, change in total length)
+          of building a wall there
+        * removed (dict): Maps each location given to remove to the (change in total damage, change in total length)
+          of removing the wall there
+
+    """
+    def __init__(self, paths, lengths, exposure, damage):
+        self.paths = paths
+        self.lengths = lengths
+        self.exposure = exposure
+        self.damage = damage
+        self.total_length = sum(lengths.values())
+        self.total_damage = sum(damage.values())
+        self.added = {}
+        self.removed = {}
+
+
+class _Layout:
+    """The fixed inputs of one evaluation, shared by the marginal evaluations
+
+    """
+    def __init__(self, game_state, unit_type):
+        compiled = game_state.compiled_config
+        game_map = game_state.game_map
+        type_id = compiled.type_id(unit_type or compiled.PING)
+        self.step_frames = 1 / (compiled.speed[type_id] or compiled.speed[PING_ID] or 1)
+        self.destructor_damage = compiled.damage[DESTRUCTOR_ID]
+        self.range_cells = get_range_cells(compiled.range[DESTRUCTOR_ID])
+        self.edges = []
+        for edge in (game_map.TOP_LEFT, game_map.TOP_RIGHT):
+            spawns = game_map.get_edge_locations(edge)
+            self.edges.append((spawns, game_map.get_edge_locations(game_state.get_target_edge(spawns[0]))))
+
+    def covering(self, destructors):
+        """For each cell index, the indexes of the destructors in range of it
+
+        """
+        covering = [()] * NUM_CELLS
+        for destructor in destructors:
+            for index in self.range_cells[destructor]:
+                covering[index] += (destructor,)
+        return covering
+
+    def trace(self, blocked, only=None):
+        """Traces the paths from every open spawn, or only from the spawns in only
+
+        """
+        paths = {}
+        for spawns, end_points in self.edges:
+            field = None
+            for location in spawns:
+                spawn = tuple(location)
+                if only is not None and spawn not in only:
+                    continue
+                if field is None:
+                    field = compute_flow_field(blocked, end_points)
+                path = trace_path(blocked, location, end_points, field)
+                if path is not None:
+                    paths[spawn] = path
+        return paths
+
+    def score(self, path, covering):
+        """The frames a path spends in range of each destructor, and the damage it takes
+
+        """
+        exposure = {}
+        frames = self.step_frames
+        for location in path:
+            for destructor in covering[location_to_index(location)]:
+                exposure[destructor] = exposure.get(destructor, 0) + frames
+        return exposure, sum(exposure.values()) * self.destructor_damage
+
+    def totals(self, paths, covering):
+        damage = 0.0
+        length = 0
+        for path in paths.values():
+            damage += self.score(path, covering)[1]
+            length += len(path) - 1
+        return damage, length
+
+
+def evaluate_layout(game_state, walls=None, destructors=None, unit_type=None, add=None, remove=None):
+    """Evaluates the enemy's paths through a layout of firewalls
+
+    Args:
+        * game_state: The current GameState, used for the config and edges
+        * walls: The locations of every firewall, as a list or bitboard. The firewalls on the map if None.
+        * destructors: The locations of our destructors, which also block. Our destructors on the map if None.
+        * unit_type: The enemy unit walking the paths, PING if None. Its speed sets the frames spent on each step.
+        * add: Locations to report the change of building a wall at
+        * remove: Locations of walls or destructors to report the change of removing
+
+    Returns:
+        A LayoutReport
+
+    """
+    layout = _Layout(game_state, unit_type)
+    game_map = game_state.game_map
+    if walls is None:
+        walls = game_map.get_bitboard()
+    elif not isinstance(walls, int):
+        walls = to_bitboard(walls)
+    if destructors is None:
+        destructors = to_indexes(game_map.get_bitboard(0, game_state.compiled_config.DESTRUCTOR))
+    else:
+        destructors = [location_to_index(location) for location in destructors]
+    blocked = walls | to_bitboard([[index % ARENA_SIZE, index // ARENA_SIZE] for index in destructors])
+    covering = layout.covering(destructors)
+
+    paths = predict_enemy_paths(game_state, blocked)
+    lengths = {}
+    exposure = {}
+    damage = {}
+    for spawn, path in paths.items():
+        frames, damage[spawn] = layout.score(path, covering)
+        lengths[spawn] = len(path) - 1
+        exposure[spawn] = {(index % ARENA_SIZE, index // ARENA_SIZE): value for index, value in frames.items()}
+    report = LayoutReport(paths, lengths, exposure, damage)
+
+    # Which spawns' paths cross each cell
+    crossing = {}
+    for spawn, path in paths.items():
+        for location in path:
+            crossing.setdefault(location_to_index(location), set()).add(spawn)
+
+    for location in add or ():
+        index = location_to_index(location)
+        if (blocked >> index) & 1 or index not in crossing:
+            report.added[tuple(location)] = (0.0, 0)
+            continue
+        affected = crossing[index]
+        changed = layout.trace(blocked | (1 << index), affected)
+        before = layout.totals({spawn: paths[spawn] for spawn in affected}, covering)
+        after = layout.totals(changed, covering)
+        report.added[tuple(location)] = (after[0] - before[0], after[1] - before[1])
+
+    for location in remove or ():
+        index = location_to_index(location)
+        if not (blocked >> index) & 1:
+            report.removed[tuple(location)] = (0.0, 0)
+            continue
+        remaining = covering
+        if index in destructors:
+            remaining = layout.covering([destructor for destructor in destructors if destructor != index])
+        if all((blocked >> neighbor) & 1 for neighbor in NEIGHBORS[index]):
+            # Still walled in, so no path can use the cell
+            after = layout.totals(paths, remaining)
+        else:
+            after = layout.totals(layout.trace(blocked & ~(1 << index)), remaining)
+        report.removed[tuple(location)] = (after[0] - report.total_damage, after[1] - report.total_length)
+    return report
@@ -0,0 +1,221 @@
+"""
+Views of a GameState from the enemy's side of the arena.
+
+GameState.flipped() returns a FlippedGameState that reads the same game without
+copying it. Locations are reflected across the horizontal center line, [x, y] to
+[x, 27 - y], and player indices are swapped, so in the view the enemy is player 0
+and plays from the bottom half. Every GameState and GameMap method, and everything
+built on them, then answers for the enemy:
+
+    enemy_view = game_state.flipped()
+    # Could the enemy build a destructor at [13, 25]?
+    enemy_view.can_spawn(DESTRUCTOR, [13, 2])
+    # Where would the enemy place destructors against our attacks?
+    gamelib.placement.place_destructors(enemy_view)
+
+Units read through a view are FlippedUnits, which reflect the unit's location and
+owner and pass everything else, including changes, through to the unit. Changes
+made through the view, such as add_unit or attempt_spawn, change the underlying
+game, but a view can't submit a turn. The view keeps the list of FlippedUnits it
+made for each location until the units there change, so reading the same cells
+again allocates nothing.
+"""
+from .bitboard import ARENA_MASK, ARENA_SIZE, canonicalize, index_to_location, to_indexes
+from .game_map import GameMap
+from .game_state import GameState
+from .navigation import ShortestPathFinder
+from .unit import GameUnit
+from .zobrist import MASK, hash_unit
+
+
+class FlippedUnit(GameUnit):
+    """A GameUnit seen from the other side of the arena
+
+    Attributes:
+        * unit (:obj: GameUnit): The unit being viewed
+
+    """
+    def __init__(self, unit):
+        object.__setattr__(self, "unit", unit)
+
+    def __getattr__(self, name):
+        # Only called for attributes the view doesn't hold, which is all of the unit's
+        return getattr(self.unit, name)
+
+    def __setattr__(self, name, value):
+        if name == "y":
+            value = ARENA_SIZE - 1 - value
+        elif name == "player_index":
+            value = 1 - value
+        setattr(self.unit, name, value)
+
+    @property
+    def y(self):
+        return ARENA_SIZE - 1 - self.unit.y
+
+    @property
+    def player_index(self):
+        player_index = self.unit.player_index
+        return player_index if player_index is None else 1 - player_index
+
+
+class FlippedGameMap(GameMap):
+    """A GameMap seen from the other side of the arena, see the module docstring
+
+    Attributes:
+        * game_map (:obj: GameMap): The map being viewed
+
+    """
+    def __init__(self, game_map):
+        # A view, so none of GameMap's storage is created
+        self.game_map = game_map
+        # Maps a cell index of the viewed map to the units last read there and their FlippedUnits
+        self._cells = {}
+        self.config = game_map.config
+        self.enable_warnings = game_map.enable_warnings
+        self.ARENA_SIZE = game_map.ARENA_SIZE
+        self.HALF_ARENA = game_map.HALF_ARENA
+        self.TOP_RIGHT = game_map.TOP_RIGHT
+        self.TOP_LEFT = game_map.TOP_LEFT
+        self.BOTTOM_LEFT = game_map.BOTTOM_LEFT
+        self.BOTTOM_RIGHT = game_map.BOTTOM_RIGHT
+        self._components = None
+
+    def __getitem__(self, location):
+        """The FlippedUnits at a location. Like GameMap's lists, the list is shared, so don't modify it.
+
+        """
+        if len(location) == 2 and self.in_arena_bounds(location):
+            x, y = location
+            y = self.ARENA_SIZE - 1 - y
+            # Flipping keeps a location in bounds, so the viewed map needn't check it again
+            units = tuple(self.game_map._cell(x, y))
+            index = x + y * self.ARENA_SIZE
+            cached = self._cells.get(index)
+            # Units have no __eq__, so this compares them by identity
+            if cached is not None and cached[0] == units:
+                return cached[1]
+            flipped = [FlippedUnit(unit) for unit in units]
+            self._cells[index] = (units, flipped)
+            return flipped
+        self._invalid_coordinates(location)
+
+    def __setitem__(self, location, val):
+        if type(location) == tuple and len(location) == 2 and self.in_arena_bounds(location):
+            x, y = location
+            self.game_map[x, self.ARENA_SIZE - 1 - y] = [getattr(unit, "unit", unit) for unit in val]
+            return
+        self._invalid_coordinates(location)
+
+    def add_unit(self, unit_type, location, player_index=0):
+        """Adds a unit to the viewed map, see GameMap.add_unit
+
+        """
+        if player_index < 0 or player_index > 1:
+            self.warn("Player index {} is invalid. Player index should be 0 or 1.", player_index)
+        self.game_map.add_unit(unit_type, self.flip_location(location), 1 - player_index)
+
+    def remove_unit(self, location):
+        """Removes the units at a location of the viewed map, see GameMap.remove_unit
+
+        """
+        self.game_map.remove_unit(self.flip_location(location))
+
+    def append_unit(self, unit):
+        # A unit placed in the view's coordinates, seen from the viewed map's side
+        self.game_map.append_unit(unit.unit if isinstance(unit, FlippedUnit) else FlippedUnit(unit))
+
+    def set_stability(self, unit, stability):
+        self.game_map.set_stability(getattr(unit, "unit", unit), stability)
+
+    def get_hash(self):
+        # Reflecting the map changes the key of every unit, so the view's hash isn't kept up to date
+        return self.compute_hash()
+
+    def compute_hash(self):
+        key = 0
+        for index in to_indexes(ARENA_MASK):
+            location = index_to_location(index)
+            for unit in self.game_map[location]:
+                key += hash_unit(unit, self.flip_location(location), 1 - unit.player_index)
+        return key & MASK
+
+    def get_bitboard(self, player_index=None, unit_type=None):
+        if player_index is not None:
+            player_index = 1 - player_index
+        return self.flip_bitboard(self.game_map.get_bitboard(player_index, unit_type))
+
+    def get_components(self):
+        blocked = self.get_bitboard()
+        if self._components is None or self._components.blocked != blocked:
+            from .components import Components
+            self._components = Components(blocked)
+        return self._components
+
+    def get_layout_key(self):
+        key, mirrored = self.game_map.get_layout_key()
+        if mirrored:
+            key = tuple(self.mirror_bitboard(bitboard) for bitboard in key)
+        # The key holds each player's bitboards in turn, so swapping players swaps its halves
+        half = len(key) // 2
+        return canonicalize(*[self.flip_bitboard(bitboard) for bitboard in key[half:] + key[:half]])
+
+    def mirrored(self):
+        return FlippedGameMap(self.game_map.mirrored())
+
+    def flipped(self):
+        return self.game_map
+
+
+class FlippedGameState(GameState):
+    """A GameState seen from the enemy's side of the arena, see the module docstring
+
+    Attributes:
+        * game_state (:obj: GameState): The game state being viewed
+
+    """
+    def __init__(self, game_state):
+        # A view, so nothing is parsed. The resources are the viewed state's, so spending in the view spends them.
+        self.game_state = game_state
+        self.serialized_string = game_state.serialized_string
+        self.config = game_state.config
+        self.compiled_config = game_state.compiled_config
+        self.enable_warnings = game_state.enable_warnings
+        self.ARENA_SIZE = game_state.ARENA_SIZE
+        self.HALF_ARENA = game_state.HALF_ARENA
+        self.BITS = game_state.BITS
+        self.CORES = game_state.CORES
+        self.game_map = game_state.game_map.flipped()
+        self._shortest_path_finder = ShortestPathFinder()
+        self._build_stack = []
+        self._deploy_stack = []
+        self._player_resources = [game_state._player_resources[1], game_state._player_resources[0]]
+
+    @property
+    def turn_number(self):
+        return self.game_state.turn_number
+
+    @property
+    def my_health(self):
+        return self.game_state.enemy_health
+
+    @property
+    def enemy_health(self):
+        return self.game_state.my_health
+
+    @property
+    def my_time(self):
+        return self.game_state.enemy_time
+
+    @property
+    def enemy_time(self):
+        return self.game_state.my_time
+
+    def submit_turn(self):
+        self.warn("A flipped view can't submit a turn, submit the GameState it views instead")
+
+    def record_plan(self):
+        self.warn("A flipped view can't record a plan, record the GameState it views instead")
+
+    def flipped(self):
+        return self.game_state
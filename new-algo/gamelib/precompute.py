@@ -0,0 +1,301 @@
+"""
+Tables that depend only on the config, computed before the match and shipped
+inside the algo zip.
+
+scripts/package_algo.sh builds the file before zipping the algo. To build it by
+hand, run this from the algo's folder whenever gamelib or the config changes:
+
+    python3 -m gamelib precompute ../game-configs.json precomputed.bin [openings.json]
+
+openings.json optionally maps opening names to lists of [unit type, x, y]. AlgoCore
+memory maps precomputed.bin when the config arrives and stores it in
+self.precomputed, or None if the file is missing or was built for another config or
+gamelib version. Tables are read in place, so loading costs the same however large
+they are.
+
+AlgoCore also installs the tables, after which GameMap.get_edges and
+get_locations_in_range, bitboard.get_range_cells, navigation.compute_idealness and
+compute_flow_field for the empty board read them instead of computing the same
+values. Without tables they compute them as before.
+
+The file holds a header (magic, version, CompiledConfig.fingerprint, table count), a table
+directory of (name, typecode, offset, length) entries and then the tables
+themselves, each aligned to 8 bytes, in native byte order.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .bitboard import ARENA_SIZE, ARENA_MASK, NUM_CELLS, NUM_WORDS, location_to_index, index_to_location, to_bytes, from_bytes, edge_locations, get_range_cells
+from .compiled_config import compile_config
+from .logger import logger
+
+_MAGIC = b"GLTABLE\x00"
+_VERSION = 2
+# magic, version, config fingerprint, table count
+_HEADER = struct.Struct("<8sI16sI")
+# name, typecode, offset, length
+_ENTRY = struct.Struct("<32scII")
+
+NUM_EDGES = 4
+EDGE_LENGTH = ARENA_SIZE // 2
+DEFAULT_FILE_NAME = "precomputed.bin"
+
+_installed = None
+
+
+def _range_stencils(radius):
+    """One bitboard per cell of the in bounds locations within range, as in GameMap.get_locations_in_range
+
+    """
+    stencils = bytearray()
+    for in_range in get_range_cells(radius):
+        stencil = 0
+        for index in in_range:
+            stencil |= 1 << index
+        stencils += to_bytes(stencil)
+    return array("Q", bytes(stencils))
+
+def _ranges(config):
+    return sorted({float(unit_info["range"]) for unit_info in config["unitInformation"] if unit_info.get("range", 0) > 0})
+
+def build_tables(config, openings=None):
+    """Computes every table
+
+    Args:
+        * config: The game config
+        * openings: A dict mapping opening names to lists of [unit type, x, y], or None
+
+    Returns:
+        A dict mapping table names to arrays
+
+    """
+    # Only needed to build tables, so loading them stays out of navigation's import time
+    from .navigation import compute_flow_field, compute_idealness
+
+    edges = edge_locations()
+    tables = {
+        "edges": array("H", [location_to_index(location) for edge in edges for location in edge]),
+        "arena_mask": array("Q", to_bytes(ARENA_MASK)),
+        "idealness": array("q"),
+        "flow": array("i"),
+    }
+    for edge in edges:
+        tables["idealness"].extend(compute_idealness(edge))
+        tables["flow"].extend(compute_flow_field(0, edge))
+    for radius in _ranges(config):
+        tables["range:{}".format(radius)] = _range_stencils(radius)
+        # get_range_cells keeps the order get_locations_in_range finds cells in, which the stencils lose
+        cells = get_range_cells(radius)
+        tables["range_cells:{}".format(radius)] = array("H", [index for in_range in cells for index in in_range])
+        tables["range_counts:{}".format(radius)] = array("B", [len(in_range) for in_range in cells])
+    type_ids = compile_config(config).type_ids
+    for name, units in (openings or {}).items():
+        tables["opening:{}".format(name)] = array("H", [value for unit_type, x, y in units
+                                                       for value in (type_ids[unit_type], location_to_index([x, y]))])
+    return tables
+
+def write(path, config, openings=None):
+    """Builds the tables and writes them to a file
+
+    Args:
+        * path: The file to write
+        * config: The game config
+        * openings: A dict mapping opening names to lists of [unit type, x, y], or None
+
+    """
+    tables = build_tables(config, openings)
+    offset = _HEADER.size + _ENTRY.size * len(tables)
+    entries = []
+    data = bytearray()
+    for name, table in tables.items():
+        padding = -(offset + len(data)) % 8
+        data += bytes(padding)
+        entries.append(_ENTRY.pack(name.encode("ascii"), table.typecode.encode("ascii"), offset + len(data), len(table)))
+        data += table.tobytes()
+    with open(path, "wb") as table_file:
+        table_file.write(_HEADER.pack(_MAGIC, _VERSION, compile_config(config).fingerprint, len(tables)))
+        table_file.write(b"".join(entries))
+        table_file.write(data)
+
+
+class PrecomputedTables:
+    """A memory mapped table file written by write
+
+    Attributes:
+        * path (str): The table file
+        * names (list): The names of the tables in the file
+
+    """
+    def __init__(self, path, config=None):
+        """Maps a table file
+
+        Args:
+            * path: The file written by write
+            * config: The game config. If given, the file must have been built for it.
+
+        Raises:
+            ValueError if the file is not a table file of this version, or was built for a different config
+
+        """
+        self.path = path
+        with open(path, "rb") as table_file:
+            self._mapping = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mapping)
+        self._views = {}
+        try:
+            magic, version, file_fingerprint, count = _HEADER.unpack_from(self._buffer, 0)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError("{} is not a version {} table file, rebuild it".format(path, _VERSION))
+            if config is not None and file_fingerprint != compile_config(config).fingerprint:
+                raise ValueError("{} was built for a different config, rebuild it".format(path))
+        except (ValueError, struct.error):
+            self.close()
+            raise
+        self._entries = {}
+        for number in range(count):
+            name, typecode, offset, length = _ENTRY.unpack_from(self._buffer, _HEADER.size + number * _ENTRY.size)
+            self._entries[name.rstrip(b"\x00").decode("ascii")] = (typecode.decode("ascii"), offset, length)
+        self.names = list(self._entries)
+        self._edges = None
+        self._range_cells = {}
+
+    def array(self, name):
+        """Gets a read only view of a table
+
+        Args:
+            * name: The table name, for example "flow" or "range:3.0"
+
+        Returns:
+            A read only memoryview of the table, cast to its typecode
+
+        """
+        view = self._views.get(name)
+        if view is None:
+            typecode, offset, length = self._entries[name]
+            size = array(typecode).itemsize * length
+            view = self._views[name] = self._buffer[offset:offset + size].cast(typecode)
+        return view
+
+    def get_edges(self):
+        """The same lists as GameMap.get_edges
+
+        """
+        if self._edges is None:
+            indexes = self.array("edges")
+            self._edges = [[index_to_location(index) for index in indexes[edge * EDGE_LENGTH:(edge + 1) * EDGE_LENGTH]]
+                           for edge in range(NUM_EDGES)]
+        return [[list(location) for location in edge] for edge in self._edges]
+
+    def get_arena_mask(self):
+        """The bitboard of in bounds locations
+
+        """
+        return from_bytes(self.array("arena_mask"))
+
+    def get_range_bitboard(self, location, radius):
+        """The bitboard of GameMap.get_locations_in_range(location, radius)
+
+        Raises:
+            KeyError if no unit in the config has that range
+
+        """
+        words = self.array("range:{}".format(float(radius)))
+        start = location_to_index(location) * NUM_WORDS
+        return from_bytes(words[start:start + NUM_WORDS].cast("B"))
+
+    def has_range(self, radius):
+        """Whether the file has the range tables of a radius, which it does for the range of every unit in the config
+
+        """
+        return "range_cells:{}".format(float(radius)) in self._entries
+
+    def get_range_cells(self, radius):
+        """The same tuples as bitboard.get_range_cells(radius)
+
+        Raises:
+            KeyError if no unit in the config has that range
+
+        """
+        radius = float(radius)
+        cells = self._range_cells.get(radius)
+        if cells is None:
+            indexes = self.array("range_cells:{}".format(radius)).tolist()
+            cells = []
+            start = 0
+            for count in self.array("range_counts:{}".format(radius)):
+                cells.append(tuple(indexes[start:start + count]))
+                start += count
+            cells = self._range_cells[radius] = tuple(cells)
+        return cells
+
+    def get_idealness(self, edge):
+        """The compute_idealness table for an edge, see GameMap.get_edges for the edge constants
+
+        """
+        return self.array("idealness")[edge * NUM_CELLS:(edge + 1) * NUM_CELLS]
+
+    def get_flow_field(self, edge):
+        """The compute_flow_field table for an edge on an empty board
+
+        """
+        return self.array("flow")[edge * NUM_CELLS:(edge + 1) * NUM_CELLS]
+
+    def get_opening(self, name, config):
+        """Gets an opening as [unit type, x, y] lists
+
+        """
+        values = self.array("opening:{}".format(name))
+        shorthands = compile_config(config).shorthands
+        return [[shorthands[values[i]]] + index_to_location(values[i + 1]) for i in range(0, len(values), 2)]
+
+    def close(self):
+        """Releases the views handed out by array and unmaps the file
+
+        """
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self._buffer.release()
+        self._mapping.close()
+
+
+def load(config, path=None):
+    """Maps the algo's table file if it exists and matches the config
+
+    Args:
+        * config: The game config
+        * path: The table file, precomputed.bin next to the running algo if None
+
+    Returns:
+        A PrecomputedTables, or None if the file is missing or out of date
+
+    """
+    if path is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), DEFAULT_FILE_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        return PrecomputedTables(path, config)
+    except (OSError, ValueError, struct.error) as error:
+        logger.warning("Not using precomputed tables: {}", error)
+        return None
+
+def install(tables):
+    """Makes gamelib read values from tables instead of computing them, see the module docstring
+
+    Args:
+        * tables: A PrecomputedTables, or None to compute everything again
+
+    """
+    global _installed
+    _installed = tables
+
+def installed():
+    """The PrecomputedTables passed to install, or None
+
+    """
+    return _installed
+
@@ -0,0 +1,230 @@
+"""
+Publishes the current turn's board arrays into shared memory so worker
+processes can read them without copying the GameState.
+
+The parent process owns a SharedBoard and calls publish(game_state) once per
+turn. Workers attach a SharedBoardView by name and read the arrays through
+read only memoryviews. numpy.frombuffer(view.array("threat"), dtype="float32")
+wraps those views without copying if numpy is available.
+"""
+import struct
+import sys
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+
+from .bitboard import NUM_CELLS, NUM_WORDS, to_bytes
+from .navigation import compute_flow_field
+from .compiled_config import NUM_UNIT_TYPES
+
+_MAGIC = b"GLBOARD\x00"
+_VERSION = 1
+# magic, layout version, max_units, generation, turn_number, unit_count
+_HEADER = struct.Struct("<8sIIQiI")
+_GENERATION_OFFSET = 16
+
+NUM_PLAYERS = 2
+NUM_EDGES = 4
+UNIT_COLUMNS = ("x", "y", "type", "player_index", "stability", "pending_removal")
+
+# The blocks created by SharedBoards in this process, which its resource tracker should keep destroying at exit
+_created = set()
+
+
+def _layout(max_units):
+    """Gets the (name, typecode, length) of each array in the buffer, in storage order
+
+    """
+    return [
+        # One bitboard of NUM_WORDS words per (player_index, unit type index)
+        ("occupancy", "Q", NUM_PLAYERS * NUM_UNIT_TYPES * NUM_WORDS),
+        # One row of UNIT_COLUMNS per unit
+        ("units", "f", max_units * len(UNIT_COLUMNS)),
+        # get_threat_map for player 0 then player 1
+        ("threat", "f", NUM_PLAYERS * NUM_CELLS),
+        # compute_flow_field towards each edge, in GameMap edge constant order
+        ("flow", "i", NUM_EDGES * NUM_CELLS),
+    ]
+
+def _attach(name):
+    """Attaches to an existing block without registering it with this process's resource tracker
+
+    Before Python 3.13 attaching registers the block too, and the tracker destroys it when the
+    attaching process exits, although the SharedBoard's process owns it. So the registration is
+    withdrawn straight away, unless this process created the block and shares its registration.
+
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    memory = shared_memory.SharedMemory(name=name)
+    if memory.name not in _created:
+        resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
+
+def _offsets(max_units):
+    offsets = {}
+    offset = _HEADER.size
+    for name, typecode, length in _layout(max_units):
+        offsets[name] = (offset, typecode, length)
+        offset += array(typecode).itemsize * length
+    return offsets, offset
+
+
+class SharedBoard:
+    """Owns a shared memory block holding the board arrays of the latest published turn
+
+    Attributes:
+        * name (str): The name workers pass to SharedBoardView to attach to the block
+        * generation (int): Incremented twice per publish. Odd while a publish is in progress.
+        * max_units (int): The number of rows reserved in the unit table
+
+    """
+    def __init__(self, name=None, max_units=1024):
+        """Creates the shared memory block
+
+        Args:
+            * name: The name of the block, or None to let the system choose one
+            * max_units: The number of rows to reserve in the unit table
+
+        """
+        self.max_units = max_units
+        self._offsets, size = _offsets(max_units)
+        self._memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self._memory.name
+        _created.add(self.name)
+        self.generation = 0
+        _HEADER.pack_into(self._memory.buf, 0, _MAGIC, _VERSION, max_units, 0, -1, 0)
+
+    def publish(self, game_state):
+        """Writes the arrays for a game state and bumps the generation counter
+
+        Args:
+            * game_state: The GameState to publish
+
+        Returns:
+            The generation workers will see once the publish is complete
+
+        """
+        game_map = game_state.game_map
+        self._set_generation(self.generation + 1)
+
+        unit_types = game_state.compiled_config.shorthands[:NUM_UNIT_TYPES]
+        occupancy = bytearray()
+        units = []
+        for player_index in range(NUM_PLAYERS):
+            for unit_type in unit_types:
+                occupancy += to_bytes(game_map.get_bitboard(player_index, unit_type))
+        for location in game_map:
+            for unit in game_map[location]:
+                units.extend((unit.x, unit.y, unit.type_id, unit.player_index, unit.stability, unit.pending_removal))
+        unit_count = len(units) // len(UNIT_COLUMNS)
+        if unit_count > self.max_units:
+            game_state.warn("SharedBoard holds {} units, dropping {} units from the unit table", self.max_units, unit_count - self.max_units)
+            unit_count = self.max_units
+            del units[unit_count * len(UNIT_COLUMNS):]
+
+        threat = array("f")
+        for player_index in range(NUM_PLAYERS):
+            threat.extend(game_state.get_threat_map(player_index))
+        flow = array("i")
+        blocked = game_map.get_bitboard()
+        for edge in game_map.get_edges():
+            flow.extend(compute_flow_field(blocked, edge))
+
+        self._write("occupancy", occupancy)
+        self._write("units", array("f", units).tobytes())
+        self._write("threat", threat.tobytes())
+        self._write("flow", flow.tobytes())
+        struct.pack_into("<iI", self._memory.buf, _GENERATION_OFFSET + 8, game_state.turn_number, unit_count)
+        self._set_generation(self.generation + 1)
+        return self.generation
+
+    def close(self):
+        """Releases this process's mapping and destroys the block. Workers should close their views first.
+
+        """
+        self._memory.close()
+        self._memory.unlink()
+        _created.discard(self.name)
+
+    def _write(self, name, data):
+        offset = self._offsets[name][0]
+        self._memory.buf[offset:offset + len(data)] = data
+
+    def _set_generation(self, generation):
+        self.generation = generation
+        struct.pack_into("<Q", self._memory.buf, _GENERATION_OFFSET, generation)
+
+
+class SharedBoardView:
+    """A read only view of a SharedBoard attached from another process
+
+    Arrays are read in place, so a reader should note the generation before reading and
+    check is_stale afterwards. A stale read overlapped a publish and should be discarded.
+
+    """
+    def __init__(self, name):
+        """Attaches to an existing SharedBoard
+
+        Args:
+            * name: The SharedBoard's name
+
+        """
+        self._memory = _attach(name)
+        magic, version, self.max_units = _HEADER.unpack_from(self._memory.buf, 0)[:3]
+        if magic != _MAGIC or version != _VERSION:
+            self._memory.close()
+            raise ValueError("{} is not a version {} SharedBoard".format(name, _VERSION))
+        self._offsets = _offsets(self.max_units)[0]
+        self._views = []
+
+    @property
+    def generation(self):
+        """The generation of the latest publish. Odd while a publish is in progress.
+
+        """
+        return struct.unpack_from("<Q", self._memory.buf, _GENERATION_OFFSET)[0]
+
+    @property
+    def turn_number(self):
+        return struct.unpack_from("<i", self._memory.buf, _GENERATION_OFFSET + 8)[0]
+
+    @property
+    def unit_count(self):
+        return struct.unpack_from("<I", self._memory.buf, _GENERATION_OFFSET + 12)[0]
+
+    def is_stale(self, generation):
+        """Check if data read at the given generation may have been overwritten
+
+        Args:
+            * generation: The generation noted before reading
+
+        Returns:
+            True if the generation was mid publish or a publish has happened since
+
+        """
+        return generation % 2 == 1 or self.generation != generation
+
+    def array(self, name):
+        """Gets a read only view of one of the board arrays
+
+        Args:
+            * name: "occupancy", "units", "threat" or "flow"
+
+        Returns:
+            A read only memoryview of the array, cast to the array's typecode
+
+        """
+        offset, typecode, length = self._offsets[name]
+        size = array(typecode).itemsize * length
+        view = self._memory.buf[offset:offset + size].cast(typecode).toreadonly()
+        self._views.append(view)
+        return view
+
+    def close(self):
+        """Releases the views handed out by array and detaches from the block
+
+        """
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._memory.close()
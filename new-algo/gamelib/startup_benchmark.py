@@ -0,0 +1,91 @@
+"""
+Measures how long an algo takes to start, from launching the interpreter to the
+algo's first response, which is the game's clock for waitTimeStartGame and turn 0.
+Run it from the algo's folder with
+
+    python3 -m gamelib startup-benchmark [ALGO] [CONFIG] [RUNS]
+
+Each run starts the algo as the game would, sends it the config and a turn 0 state,
+waits for its two lines of turn 0 and then sends the end message. The time to import
+gamelib on its own is measured the same way.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_EMPTY_UNITS = [[], [], [], [], [], [], []]
+
+
+def _turn_state(config, state_type):
+    resources = config["resources"]
+    stats = [resources["startingHP"], resources["startingCores"], resources["startingBits"], 0]
+    return json.dumps({
+        "turnInfo": [state_type, 0, -1 if state_type == 0 else 0],
+        "p1Stats": stats,
+        "p2Stats": stats,
+        "p1Units": _EMPTY_UNITS,
+        "p2Units": _EMPTY_UNITS,
+        "events": {},
+    })
+
+def measure_first_response(algo_path, config):
+    """Starts an algo and times its first response
+
+    Args:
+        * algo_path: The algo's algo_strategy.py
+        * config: The game config
+
+    Returns:
+        A dict with the seconds until the turn 0 submission ("first_response") and until the
+        process exited after the end message ("total")
+
+    """
+    start = time.perf_counter()
+    algo = subprocess.Popen([sys.executable, "-u", algo_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, universal_newlines=True, cwd=os.path.dirname(os.path.abspath(algo_path)))
+    algo.stdin.write(json.dumps(config) + "\n")
+    algo.stdin.write(_turn_state(config, 0) + "\n")
+    algo.stdin.flush()
+    algo.stdout.readline()
+    algo.stdout.readline()
+    first_response = time.perf_counter() - start
+    algo.stdin.write(_turn_state(config, 2) + "\n")
+    algo.stdin.close()
+    algo.wait()
+    return {"first_response": first_response, "total": time.perf_counter() - start}
+
+def measure_import(module="gamelib", directory=None):
+    """Times starting an interpreter and importing a module
+
+    Returns:
+        The seconds until the interpreter exited
+
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import {}".format(module)], check=True, cwd=directory)
+    return time.perf_counter() - start
+
+def run(algo_path="algo_strategy.py", config_path=os.path.join("..", "game-configs.json"), runs=5):
+    """Prints the median and best of several measurements
+
+    Returns:
+        A dict mapping each measurement to its list of times in seconds
+
+    """
+    with open(config_path) as config_file:
+        config = json.load(config_file)
+    directory = os.path.dirname(os.path.abspath(algo_path))
+    times = {"interpreter": [], "import gamelib": [], "first response": []}
+    for _ in range(runs):
+        times["interpreter"].append(measure_import("sys", directory))
+        times["import gamelib"].append(measure_import("gamelib", directory))
+        times["first response"].append(measure_first_response(algo_path, config)["first_response"])
+    limit = config.get("timingAndReplay", {}).get("waitTimeStartGame")
+    for name, values in times.items():
+        print("{:<16} median {:7.1f}ms  best {:7.1f}ms".format(name, statistics.median(values) * 1000, min(values) * 1000))
+    if limit is not None:
+        print("waitTimeStartGame is {}ms".format(limit))
+    return times
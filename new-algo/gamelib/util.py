@@ -1,5 +1,7 @@
 import sys
 
+from .logger import logger
+
 
 BANNER_TEXT = "---------------- Starting Your Algo --------------------"
 
@@ -32,10 +34,11 @@ def send_command(cmd):
 def debug_write(*msg):
     """Prints a message to the games debug output
 
+    Messages are buffered by the gamelib logger and written in batches, see the logger module.
+
     Args:
         * msg: The message to output
 
     """
     #Printing to STDERR is okay and printed out by the game but doesn't effect turns.
-    sys.stderr.write(", ".join(map(str, msg)).strip() + "\n")
-    sys.stderr.flush()
+    logger.info(", ".join(map(str, msg)).strip())
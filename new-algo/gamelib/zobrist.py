@@ -0,0 +1,203 @@
+"""
+Zobrist hashes of game states, and a transposition table to store search results by them.
+
+Every combination of unit type, owner, location and stability bucket has a fixed
+random 64 bit key. The hash of a map is the sum of the keys of its units, modulo
+2 ** 64, so adding or removing a unit changes it in constant time, and a sum rather
+than an exclusive or keeps stacked information units from cancelling out. GameMap
+keeps its hash up to date as units are parsed, added and removed, and GameState.get_hash
+adds keys for both players' resources:
+
+    table = gamelib.zobrist.TranspositionTable()
+    for build in candidates:
+        game_state.game_map.add_unit(*build)
+        score = table.get(game_state.get_hash())
+        if score is None:
+            score = evaluate(game_state)
+            table.store(game_state.get_hash(), score)
+        game_state.game_map.remove_unit(build[1])
+
+Two states built through different orders of the same changes get the same hash.
+Keys come from a fixed mixing function, so hashes also agree between processes.
+"""
+from .bitboard import NUM_CELLS, location_to_index
+
+MASK = (1 << 64) - 1
+
+"""
+The number of stability buckets between no stability and max_stability. Units at or above
+max_stability share the last bucket.
+"""
+STABILITY_BUCKETS = 4
+
+"""
+Resources are hashed to this precision
+"""
+RESOURCE_STEPS = 10
+
+_keys = {}
+
+
+def _mix(value):
+    """Scrambles an int into 64 random looking bits, the splitmix64 finalizer
+
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def stability_bucket(stability, max_stability):
+    """Gets the stability bucket hashed for a unit
+
+    """
+    if not max_stability:
+        return STABILITY_BUCKETS
+    return max(0, min(STABILITY_BUCKETS, int(stability * STABILITY_BUCKETS / max_stability)))
+
+
+def unit_key(type_id, player_index, index, bucket):
+    """Gets the key of a unit
+
+    Args:
+        * type_id: The unit's type id
+        * player_index: The player controlling the unit
+        * index: The unit's cell index, see bitboard.location_to_index
+        * bucket: The unit's stability bucket, see stability_bucket
+
+    """
+    packed = ((type_id * 2 + player_index) * NUM_CELLS + index) * (STABILITY_BUCKETS + 1) + bucket
+    key = _keys.get(packed)
+    if key is None:
+        key = _keys[packed] = _mix(packed)
+    return key
+
+
+def hash_unit(unit, location=None, player_index=None):
+    """Gets the key of a GameUnit
+
+    Args:
+        * unit: The unit
+        * location: The unit's location, its x and y if None
+        * player_index: The player controlling the unit, its player_index if None
+
+    """
+    if location is None:
+        location = [unit.x, unit.y]
+    if player_index is None:
+        player_index = unit.player_index
+    return unit_key(unit.type_id, player_index, location_to_index(location),
+                    stability_bucket(unit.stability, unit.max_stability))
+
+
+def hash_resources(player_resources):
+    """Gets the key of both players' resources
+
+    Args:
+        * player_resources: A list with a {'cores': cores, 'bits': bits} dict per player
+
+    """
+    key = 0
+    for player_index, resources in enumerate(player_resources):
+        for resource, value in enumerate((resources['cores'], resources['bits'])):
+            # Offset past every unit key's packed value, which stay below 2 ** 32
+            packed = (1 << 32) + ((int(round(value * RESOURCE_STEPS)) * 2 + player_index) * 2 + resource)
+            key += _mix(packed)
+    return key & MASK
+
+
+class TranspositionTable:
+    """A bounded table of search results keyed by Zobrist hash
+
+    Each hash maps to one slot of a fixed size table. A slot holds one entry, and a new entry
+    replaces the one in its slot if the slot's entry was stored in an earlier generation or was
+    searched no deeper than the new one. Start a new generation each turn so that the previous
+    turn's entries give way.
+
+    Attributes:
+        * size (int): The number of slots
+        * generation (int): The current generation
+        * hits (int): The number of lookups that found their hash
+        * misses (int): The number of lookups that didn't
+        * stores (int): The number of entries stored
+        * replacements (int): The number of stored entries that replaced an entry for another hash
+        * rejections (int): The number of entries not stored because their slot held a deeper entry
+
+    """
+    def __init__(self, size=1 << 16):
+        """
+        Args:
+            * size: The number of slots
+
+        """
+        self.size = size
+        self.generation = 0
+        self._slots = [None] * size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
+
+    def get(self, key, depth=0):
+        """Looks up the value stored for a hash
+
+        Args:
+            * key: The hash
+            * depth: Only return values searched at least this deep
+
+        Returns:
+            The stored value, or None if there is none
+
+        """
+        entry = self._slots[key % self.size]
+        if entry is not None and entry[0] == key and entry[1] >= depth:
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        return None
+
+    def store(self, key, value, depth=0):
+        """Stores the value for a hash
+
+        Args:
+            * key: The hash
+            * value: The value, anything but None
+            * depth: How deep the search behind the value was
+
+        Returns:
+            True if the value was stored
+
+        """
+        slot = key % self.size
+        entry = self._slots[slot]
+        if entry is not None and entry[2] == self.generation and entry[1] > depth:
+            self.rejections += 1
+            return False
+        if entry is not None and entry[0] != key:
+            self.replacements += 1
+        self._slots[slot] = (key, depth, self.generation, value)
+        self.stores += 1
+        return True
+
+    def new_generation(self):
+        """Lets the entries stored so far be replaced by any new entry
+
+        """
+        self.generation += 1
+
+    def hit_rate(self):
+        """The fraction of lookups that found their hash
+
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self._slots = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
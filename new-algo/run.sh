@@ -1,4 +1,6 @@
 #!/bin/bash
 
 DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
+# Uncomment to write a sampling profile of on_turn and on_action_frame next to the algo, see gamelib/profiler.py
+# export GAMELIB_PROFILE=1
 ${PYTHON_CMD:-python3} -u "$DIR/algo_strategy.py"
@@ -3,7 +3,6 @@ import random
 import math
 import warnings
 from sys import maxsize
-import json
 
 
 """
@@ -41,6 +40,8 @@ class AlgoStrategy(gamelib.AlgoCore):
         SCRAMBLER = config["unitInformation"][5]["shorthand"]
         # This is a good place to do initial setup
         self.scored_on_locations = []
+        # Only look at action frames where a unit breached an edge
+        self.register_frame_events("breach")
 
     
         
@@ -219,8 +220,8 @@ class AlgoStrategy(gamelib.AlgoCore):
         Full doc on format of a game frame at: https://docs.c1games.com/json-docs.html
         """
         # Let's record at what position we get scored on
-        state = json.loads(turn_string)
-        events = state["events"]
+        # Only the breach events are decoded, see register_frame_events in on_game_start
+        events = self.frame_filter.get_events(turn_string)
         breaches = events["breach"]
         for breach in breaches:
             location = breach[0]
@@ -0,0 +1,45 @@
+"""
+Command line tools, run from the algo's folder:
+
+    python3 -m gamelib precompute CONFIG OUTPUT [OPENINGS]
+        Builds the table file loaded into AlgoCore.precomputed, see the precompute module
+
+    python3 -m gamelib startup-benchmark [ALGO] [CONFIG] [RUNS]
+        Times the algo from interpreter start to its first response, see the startup_benchmark module
+"""
+import json
+import sys
+
+from . import precompute
+from . import startup_benchmark
+
+USAGE = __doc__.strip()
+
+
+def run_precompute(arguments):
+    if len(arguments) < 2:
+        sys.exit(USAGE)
+    with open(arguments[0]) as config_file:
+        config = json.load(config_file)
+    openings = None
+    if len(arguments) > 2:
+        with open(arguments[2]) as openings_file:
+            openings = json.load(openings_file)
+    precompute.write(arguments[1], config, openings)
+    print("Wrote {}".format(arguments[1]))
+
+def run_startup_benchmark(arguments):
+    if len(arguments) > 2:
+        arguments[2] = int(arguments[2])
+    startup_benchmark.run(*arguments)
+
+COMMANDS = {
+    "precompute": run_precompute,
+    "startup-benchmark": run_startup_benchmark,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        sys.exit(USAGE)
+    COMMANDS[sys.argv[1]](sys.argv[2:])
@@ -0,0 +1,85 @@
+import threading
+
+from .util import debug_write
+
+
+class BackgroundWorker:
+    """Runs a generator based task on a daemon thread while the algo is otherwise idle.
+
+    The task is a generator. It should yield often: every yield is a point where the
+    worker can be paused (while an action frame is being handled) or cancelled (when the
+    next turn arrives). Pausing is cooperative, so the step the task is in when it is paused
+    runs on until its next yield, competing with the action frame for the interpreter.
+    Any value other than None that the task yields or returns is kept as the task's latest
+    result, so tasks can hand over partial answers.
+
+    Attributes:
+        * result: The latest value yielded or returned by the task, None if there is none
+        * finished (bool): True once the task has run to completion
+
+    """
+    def __init__(self):
+        self.result = None
+        self.finished = False
+        self._thread = None
+        self._cancelled = False
+        self._resume = threading.Event()
+        self._resume.set()
+
+    def start(self, task):
+        """Starts running a task, cancelling any task that is still running
+
+        Args:
+            * task: A generator
+
+        """
+        self.stop()
+        self.result = None
+        self.finished = False
+        self._cancelled = False
+        self._resume.set()
+        self._thread = threading.Thread(target=self._run, args=(task,), daemon=True)
+        self._thread.start()
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def pause(self):
+        """Stop the task at its next yield until resume is called
+
+        """
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def stop(self):
+        """Cancels the task at its next yield and waits for the thread to exit
+
+        Returns:
+            The task's latest result
+
+        """
+        if self._thread is not None:
+            self._cancelled = True
+            self._resume.set()
+            self._thread.join()
+            self._thread = None
+        return self.result
+
+    def _run(self, task):
+        try:
+            while True:
+                self._resume.wait()
+                if self._cancelled:
+                    task.close()
+                    return
+                partial = next(task)
+                if partial is not None:
+                    self.result = partial
+        except StopIteration as stop:
+            if stop.value is not None:
+                self.result = stop.value
+            self.finished = True
+        except Exception as error:
+            debug_write("Background task failed: {!r}".format(error))
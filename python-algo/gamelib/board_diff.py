@@ -0,0 +1,209 @@
+"""
+Compares the firewalls on the board between two turns.
+
+A BoardSnapshot holds the firewalls of one turn as a bitboard per player and unit
+type, plus their stability and which are pending removal. diff compares two
+snapshots with a handful of bitboard operations, only reading stabilities for the
+locations held by the same firewall on both turns. AlgoCore keeps the previous turn's
+message and snapshots it on demand, so strategies only need:
+
+    board_diff = self.get_board_diff()
+    new_destructors = board_diff.get_locations(gamelib.board_diff.ADDED, 1, DESTRUCTOR)
+    if board_diff.get_bitboard(gamelib.board_diff.DESTROYED, 0):
+        # Some of our firewalls were destroyed last action phase
+        ...
+
+Only firewalls are compared, since information units don't last from one turn to the next.
+A firewall replaced by a different type or owner is both removed and added.
+"""
+from .bitboard import ARENA_MASK, index_to_location, location_to_index, to_indexes
+from .compiled_config import compile_config, REMOVE_ID
+from .frame_filter import extract_section, get_turn_info
+
+"""
+Kinds of change reported by BoardDiff
+"""
+ADDED = "added"                      # Firewalls that weren't there on the previous turn
+REMOVED = "removed"                  # Firewalls that are gone, destroyed or removed by their owner
+DESTROYED = "destroyed"              # Removed firewalls that weren't pending removal, so were destroyed
+DAMAGED = "damaged"                  # Firewalls on both turns that lost stability
+PENDING_REMOVAL = "pending_removal"  # Firewalls their owner is removing this turn
+
+_KINDS = (ADDED, REMOVED, DESTROYED, DAMAGED, PENDING_REMOVAL)
+
+
+class BoardSnapshot:
+    """The firewalls on the board on one turn
+
+    Attributes:
+        * compiled_config (:obj: CompiledConfig): The config of the game
+        * turn_number (int): The turn, or None for an empty board
+        * firewalls (list): For each player, a list with a bitboard of the locations of each unit type, by type id
+        * pending_removal (list): For each player, a bitboard of the firewalls pending removal
+        * stability (dict): Maps the cell index of each firewall to its stability
+
+    """
+    def __init__(self, compiled_config, turn_number=None):
+        self.compiled_config = compiled_config
+        self.turn_number = turn_number
+        self.firewalls = [[0] * len(compiled_config.shorthands) for _ in range(2)]
+        self.pending_removal = [0, 0]
+        self.stability = {}
+
+
+def snapshot_string(config, turn_string):
+    """Snapshots the firewalls of a turn message, without building a GameState
+
+    Args:
+        * config: The game config
+        * turn_string: The turn's game state string, as passed to on_turn
+
+    Returns:
+        A BoardSnapshot
+
+    """
+    compiled = compile_config(config)
+    snapshot = BoardSnapshot(compiled, int(get_turn_info(turn_string)[1]))
+    stationary = compiled.stationary
+    for player_index, key in enumerate(("p1Units", "p2Units")):
+        bitboards = snapshot.firewalls[player_index]
+        for type_id, units in enumerate(extract_section(turn_string, key)):
+            if type_id == REMOVE_ID:
+                # Removals are reported as units of their own type at the firewall's location
+                for unit in units:
+                    index = location_to_index([int(unit[0]), int(unit[1])])
+                    snapshot.pending_removal[player_index] |= 1 << index
+            elif stationary[type_id]:
+                for unit in units:
+                    index = location_to_index([int(unit[0]), int(unit[1])])
+                    bitboards[type_id] |= 1 << index
+                    snapshot.stability[index] = float(unit[2])
+    held = [0, 0]
+    for player_index in range(2):
+        for bitboard in snapshot.firewalls[player_index]:
+            held[player_index] |= bitboard
+        snapshot.pending_removal[player_index] &= held[player_index]
+    return snapshot
+
+
+def snapshot_state(game_state):
+    """Snapshots the firewalls on a GameState's map
+
+    Units spawned on the GameState are included, so snapshot it before spawning to compare the
+    board the game sent.
+
+    Returns:
+        A BoardSnapshot
+
+    """
+    compiled = game_state.compiled_config
+    snapshot = BoardSnapshot(compiled, game_state.turn_number)
+    game_map = game_state.game_map
+    for index in to_indexes(ARENA_MASK):
+        for unit in game_map[index_to_location(index)]:
+            if unit.stationary:
+                snapshot.firewalls[unit.player_index][unit.type_id] |= 1 << index
+                snapshot.stability[index] = unit.stability
+                if unit.pending_removal:
+                    snapshot.pending_removal[unit.player_index] |= 1 << index
+    return snapshot
+
+
+class BoardDiff:
+    """The changes to the firewalls between two turns, see diff
+
+    Attributes:
+        * previous (:obj: BoardSnapshot): The earlier turn
+        * current (:obj: BoardSnapshot): The later turn
+        * added, removed, destroyed, damaged (list): For each player, a list with a bitboard per unit type id
+          of the locations with that kind of change
+        * pending_removal (list): For each player, a list with a bitboard per unit type id of the current
+          turn's firewalls pending removal
+        * damage (dict): Maps the cell index of each damaged firewall to the stability it lost
+
+    """
+    def __init__(self, previous, current):
+        self.previous = previous
+        self.current = current
+        types = len(current.compiled_config.shorthands)
+        self.added = [[0] * types for _ in range(2)]
+        self.removed = [[0] * types for _ in range(2)]
+        self.destroyed = [[0] * types for _ in range(2)]
+        self.damaged = [[0] * types for _ in range(2)]
+        self.pending_removal = [[0] * types for _ in range(2)]
+        self.damage = {}
+
+    def get_bitboard(self, kind, player_index=None, unit_type=None):
+        """Gets a bitboard of the locations with a kind of change
+
+        Args:
+            * kind: ADDED, REMOVED, DESTROYED, DAMAGED or PENDING_REMOVAL
+            * player_index: Only count firewalls of this player, 0 for you 1 for the enemy. Either player if None.
+            * unit_type: Only count firewalls of this type. Any firewall if None.
+
+        """
+        if kind not in _KINDS:
+            raise ValueError("Unknown kind of change {!r}, expected one of {}".format(kind, ", ".join(_KINDS)))
+        per_player = getattr(self, kind)
+        players = range(2) if player_index is None else [player_index]
+        bitboard = 0
+        for player in players:
+            if unit_type is None:
+                for type_bitboard in per_player[player]:
+                    bitboard |= type_bitboard
+            else:
+                bitboard |= per_player[player][self.current.compiled_config.type_id(unit_type)]
+        return bitboard
+
+    def get_locations(self, kind, player_index=None, unit_type=None):
+        """Gets the locations with a kind of change, see get_bitboard
+
+        """
+        return [index_to_location(index) for index in to_indexes(self.get_bitboard(kind, player_index, unit_type))]
+
+    def get_damage(self, location):
+        """Gets the stability the firewall at a location lost, 0 if it wasn't damaged
+
+        """
+        return self.damage.get(location_to_index(location), 0)
+
+
+def diff(previous, current):
+    """Compares the firewalls of two turns
+
+    Args:
+        * previous: The BoardSnapshot of the earlier turn, or None to treat every current firewall as added
+        * current: The BoardSnapshot of the later turn
+
+    Returns:
+        A BoardDiff
+
+    """
+    if previous is None:
+        previous = BoardSnapshot(current.compiled_config)
+    result = BoardDiff(previous, current)
+    previous_stability = previous.stability
+    current_stability = current.stability
+    for player_index in range(2):
+        before = previous.firewalls[player_index]
+        after = current.firewalls[player_index]
+        pending_before = previous.pending_removal[player_index]
+        pending_after = current.pending_removal[player_index]
+        for type_id in range(len(after)):
+            old = before[type_id]
+            new = after[type_id]
+            if not (old | new):
+                continue
+            removed = old & ~new
+            result.added[player_index][type_id] = new & ~old
+            result.removed[player_index][type_id] = removed
+            result.destroyed[player_index][type_id] = removed & ~pending_before
+            result.pending_removal[player_index][type_id] = new & pending_after
+            damaged = 0
+            for index in to_indexes(old & new):
+                lost = previous_stability[index] - current_stability[index]
+                if lost > 0:
+                    damaged |= 1 << index
+                    result.damage[index] = lost
+            result.damaged[player_index][type_id] = damaged
+    return result
@@ -0,0 +1,180 @@
+"""
+Decides how much search a turn can afford.
+
+A ComputeBudget learns what one unit of search effort (one simulation, one
+candidate evaluated, one level of depth...) costs, and how much time the engine
+charges us on top of what we measure ourselves, from the my_time the game reports
+for the previous turn. It then recommends how many units of effort fit in what
+is left of the turn:
+
+    count = self.compute_budget.recommend()
+    with self.compute_budget.measure(count):
+        results = [simulate(candidate) for candidate in candidates[:count]]
+
+AlgoCore keeps one in self.compute_budget and starts and ends its turns. Each turn
+aims to take a fraction of waitTimeBotSoft, target, 0.8 by default. The aim is
+lowered when a reported turn goes over it and raised again while turns stay well
+under it. Given a game_limit, the reported turn times are also added up and no
+turn is given more than what is left of the game's time.
+"""
+import time
+
+from .logger import logger
+
+
+class _Measure:
+    __slots__ = ("budget", "effort", "start")
+
+    def __init__(self, budget, effort):
+        self.budget = budget
+        self.effort = effort
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.budget.record(self.effort, time.perf_counter() - self.start)
+        return False
+
+
+class ComputeBudget:
+    """Recommends a per turn amount of search effort from measured costs and the turn time limits
+
+    Attributes:
+        * target (float): The fraction of waitTimeBotSoft each turn should take
+        * smoothing (float): Weight of the newest measurement in the moving averages, between 0 and 1
+        * min_effort (int): The smallest recommendation
+        * max_effort (int): The largest recommendation, or None for no limit
+        * soft_limit (float): waitTimeBotSoft in seconds, or None before configure
+        * max_limit (float): waitTimeBotMax in seconds, or None before configure
+        * cost (float): Estimated seconds per unit of effort, or None until something has been recorded
+        * overhead (float): Estimated seconds the engine counts per turn that we don't measure ourselves
+        * scale (float): Multiplier on the target, lowered after slow turns and raised after fast ones
+        * game_limit (float): Seconds of turn time allowed over the whole game, or None for no limit
+        * total_time (float): Seconds of turn time the engine has reported for us so far
+        * slow_turns (int): The number of reported turns that took longer than waitTimeBotSoft
+
+    """
+    def __init__(self, target=0.8, smoothing=0.3, min_effort=1, max_effort=None, initial_cost=None, game_limit=None):
+        self.target = target
+        self.game_limit = game_limit
+        self.smoothing = smoothing
+        self.min_effort = min_effort
+        self.max_effort = max_effort
+        self.soft_limit = None
+        self.max_limit = None
+        self.cost = initial_cost
+        self.overhead = 0.0
+        self.scale = 1.0
+        self.total_time = 0.0
+        self.slow_turns = 0
+        self._start = None
+        self._last_measured = None
+
+    def configure(self, config):
+        """Reads the turn time limits from the game config
+
+        """
+        timing = config.get("timingAndReplay", {})
+        if "waitTimeBotSoft" in timing:
+            self.soft_limit = timing["waitTimeBotSoft"] / 1000
+        if "waitTimeBotMax" in timing:
+            self.max_limit = timing["waitTimeBotMax"] / 1000
+
+    def _average(self, old, new):
+        if old is None:
+            return new
+        return old + self.smoothing * (new - old)
+
+    def start_turn(self, reported_time=None, start=None):
+        """Starts a turn
+
+        Args:
+            * reported_time: The engine's time for our previous turn in milliseconds, GameState.my_time
+            * start: The time.perf_counter() value the turn message arrived at, defaults to now
+
+        """
+        self._start = time.perf_counter() if start is None else start
+        if reported_time is None or reported_time <= 0:
+            return
+        reported = reported_time / 1000
+        self.total_time += reported
+        if self._last_measured is not None:
+            self.overhead = max(0.0, self._average(self.overhead, reported - self._last_measured))
+            self._last_measured = None
+        if self.soft_limit is None:
+            return
+        aim = self.target * self.soft_limit
+        if reported > self.soft_limit:
+            self.slow_turns += 1
+        if reported > aim:
+            self.scale = max(0.05, self.scale * aim / reported)
+        elif reported < aim / 2:
+            self.scale = min(1.0, self.scale * 1.25)
+
+    def end_turn(self):
+        """Finishes a turn, remembering how long we measured it to take
+
+        """
+        if self._start is not None:
+            self._last_measured = time.perf_counter() - self._start
+            self._start = None
+
+    def elapsed(self):
+        """Seconds since the current turn started, 0 outside of a turn
+
+        """
+        if self._start is None:
+            return 0
+        return time.perf_counter() - self._start
+
+    def record(self, effort, seconds):
+        """Records that some amount of effort took some time, updating the cost estimate
+
+        """
+        if effort <= 0 or seconds < 0:
+            return
+        self.cost = self._average(self.cost, seconds / effort)
+
+    def measure(self, effort):
+        """Times a block of code that spends the given amount of effort
+
+        Returns:
+            A context manager that records the time taken when it exits
+
+        """
+        return _Measure(self, effort)
+
+    def remaining(self):
+        """Seconds of the turn left to spend on search, or None before configure
+
+        """
+        if self.soft_limit is None:
+            return None
+        remaining = self.scale * self.target * self.soft_limit
+        if self.game_limit is not None:
+            remaining = min(remaining, self.game_limit - self.total_time)
+        return remaining - self.overhead - self.elapsed()
+
+    def recommend(self, share=1.0):
+        """Gets how many units of effort the rest of the turn can afford
+
+        Args:
+            * share: The fraction of the remaining time to spend, for turns with several searches
+
+        Returns:
+            The number of units of effort, between min_effort and max_effort. min_effort until
+            a cost has been recorded or the limits have been configured.
+
+        """
+        remaining = self.remaining()
+        if remaining is None or self.cost is None:
+            return self.min_effort
+        effort = int(remaining * share / self.cost) if self.cost > 0 else (self.max_effort or self.min_effort)
+        if effort < self.min_effort:
+            logger.debug("Turn time is nearly spent, recommending {} units of effort", self.min_effort)
+            effort = self.min_effort
+        if self.max_effort is not None:
+            effort = min(effort, self.max_effort)
+        return effort
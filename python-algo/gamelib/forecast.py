@@ -0,0 +1,90 @@
+"""
+Forecasts the enemy's attacks into our half of the arena.
+
+forecast_attacks traces the path of an enemy unit from every open cell of the
+enemy's edges, with one flow field per bottom edge, and finds where each path
+breaches the edge it targets and how long it spends in range of our destructors.
+Given the bits the enemy will have next turn, it estimates how many units of a wave sent down each
+lane would survive to breach, and returns the lanes most dangerous first:
+
+    for lane in gamelib.forecast.forecast_attacks(game_state, count=3):
+        debug_write("{} breaches at {} with {} survivors".format(lane.spawn, lane.breach, lane.survivors))
+
+A wave is assumed to take the damage a single unit walking its path would take,
+shared out so that each of its units is destroyed in turn.
+"""
+import math
+
+from .layout import evaluate_layout
+
+
+class AttackLane:
+    """A path the enemy's units could take and what an attack down it would do
+
+    Attributes:
+        * spawn (tuple): The (x, y) location the enemy spawns its units at
+        * path (list): The locations the units walk through
+        * breach (list): The location on their target edge where the units score, or None if they self destruct
+        * exposure (dict): Maps the (x, y) locations of our destructors to the frames the units spend in their range
+        * damage (float): The damage the wave takes from our destructors
+        * units (int): The number of units in the wave
+        * survivors (int): The number of units expected to reach the end of the path
+        * score (float): The damage to our health expected from the attack
+
+    """
+    def __init__(self, spawn, path, breach, exposure, damage, units, survivors, score):
+        self.spawn = spawn
+        self.path = path
+        self.breach = breach
+        self.exposure = exposure
+        self.damage = damage
+        self.units = units
+        self.survivors = survivors
+        self.score = score
+
+    def __repr__(self):
+        return "AttackLane({}, breach={}, survivors={}/{})".format(list(self.spawn), self.breach, self.survivors, self.units)
+
+
+def forecast_attacks(game_state, unit_type=None, bits=None, count=None):
+    """Finds the enemy's most dangerous attack lanes
+
+    Args:
+        * game_state: The current GameState
+        * unit_type: The unit the enemy attacks with, PING if None
+        * bits: The bits the enemy spends on the attack. If None, the bits it will have next turn,
+          game_state.project_future_bits(1, 1), as placement.place_destructors assumes. Pass
+          game_state.get_resource(game_state.BITS, 1) for an attack this turn.
+        * count: The number of lanes to return, all of them if None
+
+    Returns:
+        A list of AttackLanes, the most damage to our health first, then the least damage taken by the attackers
+
+    """
+    compiled = game_state.compiled_config
+    if unit_type is None:
+        unit_type = compiled.PING
+    type_id = compiled.type_id(unit_type)
+    if bits is None:
+        bits = game_state.project_future_bits(1, 1)
+    units = int(math.floor(bits / compiled.cost[type_id] + 1e-9))
+    stability = compiled.stability[type_id]
+
+    game_map = game_state.game_map
+    # The locations of each of our edges, by edge, as evaluate_layout paths units towards them
+    target_edges = {}
+    for edge in (game_map.BOTTOM_LEFT, game_map.BOTTOM_RIGHT):
+        target_edges[edge] = {tuple(location) for location in game_map.get_edge_locations(edge)}
+
+    report = evaluate_layout(game_state, unit_type=unit_type)
+    lanes = []
+    for spawn, path in report.paths.items():
+        # A unit that stops on the other edge self destructs there, it only scores on its target
+        breach = path[-1] if tuple(path[-1]) in target_edges[game_state.get_target_edge(spawn)] else None
+        damage = report.damage[spawn]
+        destroyed = min(units, int(damage // stability)) if stability else units
+        survivors = units - destroyed
+        score = survivors * compiled.damage_to_player[type_id] if breach is not None else 0.0
+        lanes.append(AttackLane(spawn, path, breach, report.exposure[spawn], damage, units, survivors, score))
+    lanes.sort(key=lambda lane: (-lane.score, lane.damage))
+    return lanes if count is None else lanes[:count]
@@ -1,6 +1,11 @@
+import copy
 import math
 from .unit import GameUnit
-from .util import debug_write
+from .logger import logger
+from . import precompute
+from .bitboard import location_to_index, index_to_location, get_range_cells, mirror, flip, canonicalize
+from .compiled_config import compile_config
+from .zobrist import MASK, hash_unit
 
 class GameMap:
     """Holds data about the current game map and provides functions
@@ -36,6 +41,8 @@ class GameMap:
         self.BOTTOM_RIGHT = 3
         self.__map = self.__empty_grid()
         self.__start = [13,0]
+        self._components = None
+        self._hash = 0
     
     def __getitem__(self, location):
         if len(location) == 2 and self.in_arena_bounds(location):
@@ -43,9 +50,18 @@ class GameMap:
             return self.__map[x][y]
         self._invalid_coordinates(location)
 
+    def _cell(self, x, y):
+        # The units at an in bounds location, for views that have already checked the bounds
+        return self.__map[x][y]
+
     def __setitem__(self, location, val):
         if type(location) == tuple and len(location) == 2 and self.in_arena_bounds(location):
-            self.__map[location[0]][location[1]] = val
+            x, y = location
+            self._unhash_units(x, y)
+            self.__map[x][y] = val
+            for unit in val:
+                self._hash = (self._hash + hash_unit(unit, location)) & MASK
+            self._components = None
             return
         self._invalid_coordinates(location)
 
@@ -75,7 +91,7 @@ class GameMap:
         return grid
 
     def _invalid_coordinates(self, location):
-        self.warn("{} is out of bounds.".format(str(location)))
+        self.warn("{} is out of bounds.", str(location))
 
     def in_arena_bounds(self, location):
         """Checks if the given location is inside the diamond shaped game board.
@@ -117,7 +133,7 @@ class GameMap:
 
         """
         if not quadrant_description in [self.TOP_LEFT, self.TOP_RIGHT, self.BOTTOM_LEFT, self.BOTTOM_RIGHT]:
-            self.warn("Passed invalid quadrant_description '{}'. See the documentation for valid inputs for get_edge_locations.".format(quadrant_description))
+            self.warn("Passed invalid quadrant_description '{}'. See the documentation for valid inputs for get_edge_locations.", quadrant_description)
             return
 
         edges = self.get_edges()
@@ -130,6 +146,9 @@ class GameMap:
             A list with four lists inside of it of locations corresponding to the four edges.
             [0] = top_right, [1] = top_left, [2] = bottom_left, [3] = bottom_right.
         """
+        tables = precompute.installed()
+        if tables is not None:
+            return tables.get_edges()
         top_right = []
         for num in range(0, self.HALF_ARENA):
             x = self.HALF_ARENA + num
@@ -166,14 +185,41 @@ class GameMap:
         if not self.in_arena_bounds(location):
             self._invalid_coordinates(location)
         if player_index < 0 or player_index > 1:
-            self.warn("Player index {} is invalid. Player index should be 0 or 1.".format(player_index))
+            self.warn("Player index {} is invalid. Player index should be 0 or 1.", player_index)
 
         x, y = location
         new_unit = GameUnit(unit_type, self.config, player_index, None, location[0], location[1])
         if not new_unit.stationary:
             self.__map[x][y].append(new_unit)
         else:
+            self._unhash_units(x, y)
             self.__map[x][y] = [new_unit]
+            # Walls can split pockets, which a union-find can't undo
+            self._components = None
+        self._hash = (self._hash + hash_unit(new_unit, location)) & MASK
+
+    def append_unit(self, unit):
+        """Adds an existing GameUnit to the map at its x and y, alongside any units already there.
+
+        Used by GameState to fill in the map as it parses the game state.
+        """
+        self.__map[unit.x][unit.y].append(unit)
+        self._hash = (self._hash + hash_unit(unit)) & MASK
+        if unit.stationary:
+            self._components = None
+
+    def set_stability(self, unit, stability):
+        """Changes the stability of a unit on the map, keeping the map's hash up to date
+
+        Args:
+            * unit: A GameUnit on the map
+            * stability: Its new stability
+
+        """
+        location = [unit.x, unit.y]
+        self._hash = (self._hash - hash_unit(unit, location)) & MASK
+        unit.stability = stability
+        self._hash = (self._hash + hash_unit(unit, location)) & MASK
 
     def remove_unit(self, location):
         """Remove all units on the map in the given location.
@@ -188,8 +234,149 @@ class GameMap:
             self._invalid_coordinates(location)
         
         x, y = location
+        if self._components is not None and any(unit.stationary for unit in self.__map[x][y]):
+            self._components.open_cell(location)
+        self._unhash_units(x, y)
         self.__map[x][y] = []
 
+    def _unhash_units(self, x, y):
+        for unit in self.__map[x][y]:
+            self._hash = (self._hash - hash_unit(unit, [x, y])) & MASK
+
+    def get_hash(self):
+        """Gets the Zobrist hash of the units on the map, see the zobrist module
+
+        The hash is kept up to date by add_unit, remove_unit, set_stability and assigning to game_map[x, y].
+        Change the map through them, not by editing the lists of units or a unit's stability, for it to stay correct.
+
+        Returns:
+            A 64 bit int, the same for any two maps holding the same units
+
+        """
+        return self._hash
+
+    def compute_hash(self):
+        """Computes the hash of the units on the map from scratch, see get_hash
+
+        """
+        key = 0
+        for x in range(self.ARENA_SIZE):
+            column = self.__map[x]
+            for y in range(self.ARENA_SIZE):
+                for unit in column[y]:
+                    key += hash_unit(unit, [x, y])
+        return key & MASK
+
+    def get_bitboard(self, player_index=None, unit_type=None):
+        """Gets a bitboard of the locations holding matching units
+
+        Args:
+            * player_index: Only count units controlled by this player, 0 for you 1 for the enemy. Any player if None.
+            * unit_type: Only count units of this type. Any firewall if None.
+
+        Returns:
+            A bitboard, see the bitboard module, with the bit of every matching location set
+
+        """
+        bitboard = 0
+        for x in range(self.ARENA_SIZE):
+            column = self.__map[x]
+            for y in range(self.ARENA_SIZE):
+                for unit in column[y]:
+                    if player_index is not None and unit.player_index != player_index:
+                        continue
+                    if (unit_type is None and unit.stationary) or unit.unit_type == unit_type:
+                        bitboard |= 1 << location_to_index([x, y])
+                        break
+        return bitboard
+
+    def get_components(self):
+        """Gets the pockets of open space between the firewalls on the map, see the components module
+
+        The result is kept up to date by add_unit and remove_unit. Change the map through them, not by
+        editing the lists of units, for it to stay correct.
+
+        Returns:
+            A Components
+
+        """
+        if self._components is None:
+            from .components import Components
+            self._components = Components(self.get_bitboard())
+        return self._components
+
+    def get_layout_key(self):
+        """Gets a key identifying the firewalls on the map, the same for the map and its mirror image
+
+        Returns:
+            The key, and True if it was built from the mirror image of the map. See bitboard.canonicalize.
+
+        """
+        stationary = compile_config(self.config).stationary
+        firewall_count = sum(stationary)
+        # One bitboard per player and firewall type
+        bitboards = [0] * (2 * firewall_count)
+        for x in range(self.ARENA_SIZE):
+            column = self.__map[x]
+            for y in range(self.ARENA_SIZE):
+                for unit in column[y]:
+                    if stationary[unit.type_id]:
+                        bitboards[unit.player_index * firewall_count + unit.type_id] |= 1 << location_to_index([x, y])
+        return canonicalize(*bitboards)
+
+    def mirror_location(self, location):
+        """Reflects a location across the vertical center line of the arena, swapping the left and right sides
+
+        """
+        x, y = location
+        return [self.ARENA_SIZE - 1 - x, y]
+
+    def flip_location(self, location):
+        """Reflects a location across the horizontal center line of the arena, swapping our half and the enemy's
+
+        """
+        x, y = location
+        return [x, self.ARENA_SIZE - 1 - y]
+
+    def mirror_bitboard(self, bitboard):
+        """Reflects a bitboard like mirror_location
+
+        """
+        return mirror(bitboard)
+
+    def flip_bitboard(self, bitboard):
+        """Reflects a bitboard like flip_location
+
+        """
+        return flip(bitboard)
+
+    def mirrored(self):
+        """Gets a copy of the map reflected like mirror_location. The units are copied.
+
+        """
+        reflected = GameMap(self.config)
+        reflected.enable_warnings = self.enable_warnings
+        for x in range(self.ARENA_SIZE):
+            for y in range(self.ARENA_SIZE):
+                units = self.__map[x][y]
+                if units:
+                    mirror_x = self.ARENA_SIZE - 1 - x
+                    copies = []
+                    for unit in units:
+                        unit = copy.copy(unit)
+                        unit.x = mirror_x
+                        copies.append(unit)
+                    reflected.__map[mirror_x][y] = copies
+        reflected._hash = reflected.compute_hash()
+        return reflected
+
+    def flipped(self):
+        """Gets a view of the map from the enemy's side, see the perspective module
+
+        """
+        from .perspective import FlippedGameMap
+        return FlippedGameMap(self)
+
     def get_locations_in_range(self, location, radius):
         """Gets locations in a circular area around a location
 
@@ -202,10 +389,14 @@ class GameMap:
 
         """
         if radius < 0 or radius > self.ARENA_SIZE:
-            self.warn("Radius {} was passed to get_locations_in_range. Expected integer between 0 and {}".format(radius, self.ARENA_SIZE))
+            self.warn("Radius {} was passed to get_locations_in_range. Expected integer between 0 and {}", radius, self.ARENA_SIZE)
         if not self.in_arena_bounds(location):
             self._invalid_coordinates(location)
 
+        tables = precompute.installed()
+        if tables is not None and tables.has_range(radius) and self.in_arena_bounds(location):
+            return [index_to_location(index) for index in get_range_cells(radius)[location_to_index(location)]]
+
         x, y = location
         locations = []
         for i in range(int(x - radius), int(x + radius + 1)):
@@ -232,6 +423,13 @@ class GameMap:
 
         return math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
 
-    def warn(self, message):
+    def warn(self, message, *args):
+        """Logs a warning if warnings are enabled
+
+        Args:
+            * message: The warning, or a str.format format string if args are given. It is only formatted if it isn't filtered out by the logger.
+            * args: Values for the format string
+
+        """
         if(self.enable_warnings):
-            debug_write(message)
+            logger.warning(message, *args)
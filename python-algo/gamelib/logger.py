@@ -0,0 +1,132 @@
+import atexit
+import sys
+import threading
+from collections import deque
+
+"""
+Log levels, lowest to highest
+"""
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+
+class Logger:
+    """Buffers debug output and writes it to stderr in batches.
+
+    Messages are formatted when they are logged and kept in a ring buffer. A message that is
+    filtered out by level or rate limit is never formatted, so it costs almost nothing. Only
+    messages logged with a format string and args are rate limited, so plain messages such as
+    debug_write's are always kept.
+
+    The buffer is flushed by AlgoCore whenever it waits for the game, when it holds
+    flush_threshold messages, and when the program exits. Messages of flush_level or above
+    are written at once, along with everything buffered before them, so they aren't lost if
+    the game kills the algo.
+
+    Logging and flushing hold a lock, so messages logged by the watchdog or background threads
+    while the main thread flushes are neither lost nor written out of order.
+
+    Attributes:
+        * level (int): Messages below this level are discarded
+        * capacity (int): The size of the ring buffer. The oldest messages are dropped when it is full.
+        * flush_threshold (int): Flush as soon as this many messages are buffered
+        * flush_level (int): Flush as soon as a message of this level or above is logged
+        * rate_limit (int): The most messages with the same format string kept per turn, or None for no limit. Messages logged without args aren't limited.
+        * stream: Where messages are written, sys.stderr if None
+
+    """
+    def __init__(self, level=INFO, capacity=4096, flush_threshold=256, rate_limit=50, stream=None, flush_level=WARNING):
+        self.level = level
+        self.capacity = capacity
+        self.flush_threshold = flush_threshold
+        self.flush_level = flush_level
+        self.rate_limit = rate_limit
+        self.stream = stream
+        self._buffer = deque(maxlen=capacity)
+        self._dropped = 0
+        self._counts = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def log(self, level, message, *args):
+        """Formats and buffers a message
+
+        Args:
+            * level: DEBUG, INFO, WARNING or ERROR
+            * message: The message, or a str.format format string if args are given
+            * args: Values for the format string. Messages with args are rate limited by their format string.
+
+        """
+        if level < self.level:
+            return
+        with self._lock:
+            if self.rate_limit is not None and args:
+                count = self._counts.get(message, 0)
+                if count >= self.rate_limit:
+                    self._suppressed[message] = self._suppressed.get(message, 0) + 1
+                    return
+                self._counts[message] = count + 1
+            try:
+                line = message.format(*args) if args else str(message)
+            except (IndexError, KeyError, ValueError) as error:
+                line = "{} {!r} (format failed: {})".format(message, args, error)
+            if len(self._buffer) == self.capacity:
+                self._dropped += 1
+            self._buffer.append(line)
+            flush = level >= self.flush_level or len(self._buffer) >= self.flush_threshold
+        if flush:
+            self.flush()
+
+    def debug(self, message, *args):
+        self.log(DEBUG, message, *args)
+
+    def info(self, message, *args):
+        self.log(INFO, message, *args)
+
+    def warning(self, message, *args):
+        self.log(WARNING, message, *args)
+
+    def error(self, message, *args):
+        self.log(ERROR, message, *args)
+
+    def is_enabled_for(self, level):
+        """Check if messages of a level would be kept, for guarding expensive logging code
+
+        """
+        return level >= self.level
+
+    def flush(self):
+        """Writes every buffered message in a single write
+
+        """
+        with self._lock:
+            if not self._buffer and not self._dropped:
+                return
+            lines = []
+            if self._dropped:
+                lines.append("[{} older messages dropped]".format(self._dropped))
+                self._dropped = 0
+            lines.extend(self._buffer)
+            self._buffer.clear()
+            stream = self.stream or sys.stderr
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+
+    def start_turn(self):
+        """Resets the rate limits and reports how many messages they suppressed
+
+        """
+        with self._lock:
+            if self._suppressed:
+                self._buffer.append("[rate limited: {}]".format(", ".join("{!r} x{}".format(message, count) for message, count in self._suppressed.items())))
+            self._counts = {}
+            self._suppressed = {}
+
+
+"""
+The logger used by debug_write, GameState.warn and GameMap.warn
+"""
+logger = Logger()
+atexit.register(logger.flush)
@@ -2,7 +2,13 @@ import heapq
 import math
 import sys
 import queue
+from collections import deque
 from .util import debug_write
+from .logger import logger
+from . import precompute
+from .bitboard import ARENA_SIZE, ARENA_MASK, NEIGHBORS, NUM_CELLS, edge_locations, location_to_index, index_to_location, to_flags
+
+_EDGES = edge_locations()
 
 class Node:
     """A pathfinding node
@@ -20,6 +26,161 @@ class Node:
         self.blocked = False
         self.pathlength = -1
 
+def compute_flow_field(blocked, end_points):
+    """Breadth first search outwards from a set of end points, the same search ShortestPathFinder
+    performs when validating a path to an edge
+
+    Args:
+        * blocked: A bitboard of the locations holding firewalls, see GameMap.get_bitboard
+        * end_points: The locations the field flows towards, usually an edge
+
+    Returns:
+        A list indexed by cell index (see the bitboard module) holding the number of steps from each
+        location to the closest end point, or -1 if the location is blocked, outside the arena or can't reach an end point
+
+    """
+    if not blocked:
+        tables = precompute.installed()
+        if tables is not None and end_points in _EDGES:
+            return tables.get_flow_field(_EDGES.index(end_points)).tolist()
+    open_cells = to_flags(ARENA_MASK & ~blocked)
+    field = [-1] * NUM_CELLS
+    frontier = deque()
+    for location in end_points:
+        index = location_to_index(location)
+        if open_cells[index] and field[index] == -1:
+            field[index] = 0
+            frontier.append(index)
+
+    while frontier:
+        index = frontier.popleft()
+        distance = field[index] + 1
+        for neighbor in NEIGHBORS[index]:
+            if open_cells[neighbor] and field[neighbor] == -1:
+                field[neighbor] = distance
+                frontier.append(neighbor)
+    return field
+
+def compute_idealness(end_points):
+    """Computes ShortestPathFinder._get_idealness for every cell at once
+
+    Args:
+        * end_points: An edge, see GameMap.get_edges
+
+    Returns:
+        A list indexed by cell index (see the bitboard module) holding the idealness of each location
+        for a unit targeting the edge. The end points hold sys.maxsize.
+
+    """
+    tables = precompute.installed()
+    if tables is not None and end_points in _EDGES:
+        return tables.get_idealness(_EDGES.index(end_points)).tolist()
+    half_arena = ARENA_SIZE // 2
+    x, y = end_points[0]
+    right = x >= half_arena
+    top = y >= half_arena
+    idealness = []
+    for index in range(NUM_CELLS):
+        x, y = index_to_location(index)
+        idealness.append(ARENA_SIZE * (y if top else ARENA_SIZE - 1 - y) + (x if right else ARENA_SIZE - 1 - x))
+    for location in end_points:
+        idealness[location_to_index(location)] = sys.maxsize
+    return idealness
+
+_HORIZONTAL = 1
+_VERTICAL = 2
+
+def trace_path(blocked, start_point, end_points, field=None):
+    """Finds the same path as ShortestPathFinder.navigate_multiple_endpoints, without building a pathfinder
+
+    Units spawned on one edge share a flow field towards their target edge, so computing it once
+    and passing it in for every start makes each extra path cost only its own length.
+
+    Args:
+        * blocked: A bitboard of the locations holding firewalls, see GameMap.get_bitboard
+        * start_point: The starting location of the unit
+        * end_points: The end points of the unit, should be an edge
+        * field: compute_flow_field(blocked, end_points), computed here if None
+
+    Returns:
+        The list of locations the unit would walk through, or None if start_point is blocked
+
+    """
+    start = location_to_index(start_point)
+    if (blocked >> start) & 1:
+        return None
+    if field is None:
+        field = compute_flow_field(blocked, end_points)
+    if field[start] == -1:
+        # The edge is out of reach, so the unit heads for the most ideal tile of its pocket
+        field = compute_flow_field(blocked, [index_to_location(_pocket_ideal_index(blocked, start, end_points))])
+
+    target_x, target_y = end_points[0]
+    right = target_x >= ARENA_SIZE // 2
+    up = target_y >= ARENA_SIZE // 2
+    path = [index_to_location(start)]
+    current = start
+    previous_move = 0
+    while field[current] != 0:
+        x = current % ARENA_SIZE
+        y = current // ARENA_SIZE
+        best = current
+        best_pathlength = field[current]
+        for neighbor in NEIGHBORS[current]:
+            pathlength = field[neighbor]
+            if pathlength == -1 or pathlength > best_pathlength:
+                continue
+            if pathlength == best_pathlength and not _better_direction(x, y, neighbor, best, previous_move, right, up):
+                continue
+            best = neighbor
+            best_pathlength = pathlength
+        previous_move = _VERTICAL if best % ARENA_SIZE == x else _HORIZONTAL
+        path.append(index_to_location(best))
+        current = best
+    return path
+
+def _better_direction(x, y, new, best, previous_move, right, up):
+    """ShortestPathFinder._better_direction for cell indexes
+
+    """
+    new_x = new % ARENA_SIZE
+    new_y = new // ARENA_SIZE
+    best_x = best % ARENA_SIZE
+    best_y = best // ARENA_SIZE
+    if previous_move == _HORIZONTAL and new_x != best_x:
+        return new_y != y
+    if previous_move == _VERTICAL and new_y != best_y:
+        return new_x != x
+    if previous_move == 0:
+        return new_y != y
+    if new_y == best_y:
+        return new_x > best_x if right else new_x < best_x
+    if new_x == best_x:
+        return new_y > best_y if up else new_y < best_y
+    return False
+
+def _pocket_ideal_index(blocked, start, end_points):
+    """ShortestPathFinder._idealness_search for cell indexes
+
+    """
+    idealness = compute_idealness(end_points)
+    open_cells = to_flags(ARENA_MASK & ~blocked)
+    visited = bytearray(NUM_CELLS)
+    visited[start] = 1
+    frontier = deque([start])
+    best = start
+    best_idealness = idealness[start]
+    while frontier:
+        index = frontier.popleft()
+        for neighbor in NEIGHBORS[index]:
+            if open_cells[neighbor] and not visited[neighbor]:
+                visited[neighbor] = 1
+                if idealness[neighbor] > best_idealness:
+                    best_idealness = idealness[neighbor]
+                    best = neighbor
+                frontier.append(neighbor)
+    return best
+
 """
 This class helps with pathfinding. We guarantee the results will
 be accurate, but top players may want to write their own pathfinding
@@ -84,6 +245,10 @@ class ShortestPathFinder:
         Finds the most ideal tile in our 'pocket' of pathable space. 
         The edge if it is available, or the best self destruct location otherwise
         """
+        if end_points in _EDGES:
+            # The map's pockets already know their most ideal tiles for each edge
+            return self.game_state.game_map.get_components().ideal_tile(start, _EDGES.index(end_points))
+
         current = queue.Queue()
         current.put(start)
         best_idealness = self._get_idealness(start, end_points)
@@ -297,20 +462,21 @@ class ShortestPathFinder:
             debug_write("Attempted to print_map before pathfinder initialization. Use 'this_object.initialize_map(game_state)' to initialize the map first")
             return
 
+        rows = []
         for y in range(28):
+            row = ""
             for x in range(28):
                 node = self.game_map[x][28 - y - 1]
                 if not node.blocked and not node.pathlength == -1:
-                    self._print_justified(node.pathlength)
+                    row += self._justified(node.pathlength)
                 else:
-                    sys.stderr.write("   ")
-            debug_write("")
+                    row += "   "
+            rows.append(row)
+        # One message for the whole map so it is written in a single batch
+        logger.info("\n".join(rows))
 
-    def _print_justified(self, number):
-        """Prints a number between 100 and -10 in 3 spaces
+    def _justified(self, number):
+        """Formats a number between 100 and -10 in 3 spaces
 
         """
-        if number < 10 and number > -1:
-            sys.stderr.write(" ")
-        sys.stderr.write(str(number))
-        sys.stderr.write(" ")
+        return "{:>2} ".format(number)
@@ -0,0 +1,153 @@
+"""
+Tracks where moving units will be on every frame.
+
+An OccupancyTable turns paths and speeds into a table of frame -> cells -> units.
+A unit moves to the next location on its path once every 1 / speed frames, so a
+scrambler with speed 0.25 spends 4 frames on each location and a ping with speed
+1 spends one. Each frame also keeps a bitboard of the occupied cells per player,
+so a range query only looks at the cells that are both occupied and in range:
+
+    table = gamelib.occupancy.OccupancyTable()
+    for lane in gamelib.forecast.forecast_attacks(game_state):
+        table.add(lane.spawn, lane.path, game_state.compiled_config.speed[PING_ID], player_index=1)
+    threats = table.units_in_range([13, 5], 4.0, 0, 20, player_index=1)
+
+Frames are counted from 0, when units spawned at start_frame 0 stand on the first
+location of their path.
+"""
+import math
+
+from .bitboard import NUM_CELLS, get_range_cells, location_to_index, index_to_location, to_indexes
+
+_stencils = {}
+
+
+def _stencil(index, radius):
+    stencils = _stencils.get(radius)
+    if stencils is None:
+        stencils = _stencils[radius] = [None] * NUM_CELLS
+    stencil = stencils[index]
+    if stencil is None:
+        stencil = 0
+        for target in get_range_cells(radius)[index]:
+            stencil |= 1 << target
+        stencils[index] = stencil
+    return stencil
+
+
+class OccupancyTable:
+    """The locations of moving units on every frame
+
+    Attributes:
+        * frames (int): The number of frames with a unit on the map
+
+    """
+    def __init__(self):
+        self.frames = 0
+        # Per unit: (unit, player_index, path as cell indexes, speed, start frame)
+        self._entries = []
+        # Per frame: a dict from cell index to the numbers of the units there, and each player's occupied cells
+        self._cells = []
+        self._occupied = []
+
+    def add(self, unit, path, speed=None, start_frame=0, player_index=None):
+        """Adds a unit walking a path
+
+        Args:
+            * unit: The unit, a GameUnit or any other hashable value that identifies it
+            * path: The locations the unit walks through, for example from GameState.find_path_to_edge
+            * speed: The fraction of a location the unit moves each frame, the unit's speed attribute if None
+            * start_frame: The frame the unit is spawned on
+            * player_index: The player controlling the unit, the unit's player_index attribute if None
+
+        Returns:
+            The unit's number, used by location_of
+
+        """
+        if speed is None:
+            speed = unit.speed
+        if player_index is None:
+            player_index = unit.player_index
+        cells = [location_to_index(location) for location in path]
+        number = len(self._entries)
+        self._entries.append((unit, player_index, cells, speed, start_frame))
+
+        last_step = len(cells) - 1
+        end_frame = start_frame + int(math.ceil(last_step / speed - 1e-9))
+        while len(self._cells) <= end_frame:
+            self._cells.append({})
+            self._occupied.append([0, 0])
+        for frame in range(start_frame, end_frame + 1):
+            cell = cells[min(int((frame - start_frame) * speed + 1e-9), last_step)]
+            self._cells[frame].setdefault(cell, []).append(number)
+            self._occupied[frame][player_index] |= 1 << cell
+        self.frames = len(self._cells)
+        return number
+
+    def location_of(self, number, frame):
+        """Gets where a unit is on a frame
+
+        Args:
+            * number: The number add returned for the unit
+            * frame: The frame
+
+        Returns:
+            The unit's location, or None if it isn't on the map on that frame
+
+        """
+        cells, speed, start_frame = self._entries[number][2:]
+        last_step = len(cells) - 1
+        if frame < start_frame or frame > start_frame + int(math.ceil(last_step / speed - 1e-9)):
+            return None
+        return index_to_location(cells[min(int((frame - start_frame) * speed + 1e-9), last_step)])
+
+    def occupied(self, frame, player_index=None):
+        """Gets a bitboard of the cells holding units on a frame
+
+        Args:
+            * frame: The frame
+            * player_index: Only count this player's units, any player's if None
+
+        """
+        if frame < 0 or frame >= self.frames:
+            return 0
+        occupied = self._occupied[frame]
+        if player_index is None:
+            return occupied[0] | occupied[1]
+        return occupied[player_index]
+
+    def units_at(self, location, frame):
+        """Gets the units at a location on a frame
+
+        """
+        if frame < 0 or frame >= self.frames:
+            return []
+        return [self._entries[number][0] for number in self._cells[frame].get(location_to_index(location), ())]
+
+    def units_in_range(self, location, radius, start_frame, end_frame, player_index=None):
+        """Finds the units within range of a location during a span of frames
+
+        Args:
+            * location: The center of the area
+            * radius: The radius of the area, as in GameMap.get_locations_in_range
+            * start_frame: The first frame to check
+            * end_frame: The last frame to check
+            * player_index: Only find this player's units, any player's if None
+
+        Returns:
+            A dict mapping each unit in range to the frames it is in range on, in order
+
+        """
+        stencil = _stencil(location_to_index(location), radius)
+        found = {}
+        for frame in range(max(start_frame, 0), min(end_frame, self.frames - 1) + 1):
+            hits = self.occupied(frame, player_index) & stencil
+            if not hits:
+                continue
+            cells = self._cells[frame]
+            for cell in to_indexes(hits):
+                for number in cells[cell]:
+                    unit, owner = self._entries[number][:2]
+                    if player_index is None or owner == player_index:
+                        found.setdefault(unit, []).append(frame)
+        return found
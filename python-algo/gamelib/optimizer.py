@@ -0,0 +1,248 @@
+"""
+Chooses which of many candidate builds to make with a limited budget.
+
+Each Candidate is a unit type and location with a score. plan_builds returns the
+best affordable subset, in the order to spawn it:
+
+    candidates = [gamelib.optimizer.Candidate(DESTRUCTOR, location, score) for location, score in scored]
+    plan = gamelib.optimizer.plan_builds(game_state, candidates)
+    gamelib.optimizer.spawn_plan(game_state, plan)
+
+With fixed scores and no ordering constraints the subset is exact, found by a
+knapsack over the costs. Otherwise, or when scores come from an evaluator whose
+value for a candidate depends on what has already been chosen (for example the
+coverage a destructor adds over the ones before it), a lazy greedy search picks the
+candidate with the best gain per cost each step. Gains are kept in a priority
+queue and only re-evaluated when they reach the top, which is exact as long as a
+candidate's gain never grows as others are chosen.
+"""
+import heapq
+import math
+
+"""
+Costs are compared in steps of 1 / COST_RESOLUTION, enough for the configs' costs
+"""
+COST_RESOLUTION = 10
+
+
+class Candidate:
+    """A unit the optimizer may choose to build
+
+    Attributes:
+        * unit_type (str): The type of unit
+        * location (list): Where to build it
+        * score (float): Its value, used when plan_builds is given no evaluator
+        * requires (list): Candidates that must be chosen, and built first, for this one to be chosen
+        * cost (float): The cost, filled in by plan_builds from the config if None
+
+    """
+    def __init__(self, unit_type, location, score=0.0, requires=None, cost=None):
+        self.unit_type = unit_type
+        self.location = location
+        self.score = score
+        self.requires = list(requires) if requires else []
+        self.cost = cost
+
+    def __repr__(self):
+        return "Candidate({}, {}, score={})".format(self.unit_type, self.location, self.score)
+
+
+def _scaled_costs(candidates):
+    return [int(round(candidate.cost * COST_RESOLUTION)) for candidate in candidates]
+
+def knapsack(candidates, budget):
+    """Finds the highest scoring subset of candidates whose costs fit in a budget
+
+    Args:
+        * candidates: Candidates with costs and fixed scores. Their requires lists are ignored.
+        * budget: The resources available
+
+    Returns:
+        The chosen candidates, in their original order
+
+    """
+    costs = _scaled_costs(candidates)
+    capacity = int(math.floor(budget * COST_RESOLUTION + 1e-9))
+    step = 0
+    for cost in costs:
+        step = math.gcd(step, cost)
+    step = step or 1
+    costs = [cost // step for cost in costs]
+    capacity //= step
+
+    best = [0.0] * (capacity + 1)
+    taken = []
+    for candidate, cost in zip(candidates, costs):
+        took = bytearray(capacity + 1)
+        score = candidate.score
+        if score > 0 and cost <= capacity:
+            for remaining in range(capacity, cost - 1, -1):
+                value = best[remaining - cost] + score
+                if value > best[remaining]:
+                    best[remaining] = value
+                    took[remaining] = 1
+        taken.append(took)
+
+    chosen = []
+    remaining = capacity
+    for index in range(len(candidates) - 1, -1, -1):
+        if taken[index][remaining]:
+            chosen.append(candidates[index])
+            remaining -= costs[index]
+    chosen.reverse()
+    return chosen
+
+def lazy_greedy(candidates, budget, gain):
+    """Repeatedly chooses the affordable candidate with the best gain per cost
+
+    A candidate that requires others is considered together with the ones it requires that
+    haven't been chosen yet, so a wall worth nothing on its own is still built for the
+    encryptor that needs it. Because choosing by gain per cost can waste the budget on cheap
+    candidates, the search is run a second time starting from the single most valuable
+    affordable candidate, and the better of the two results is returned.
+
+    Args:
+        * candidates: Candidates with costs
+        * budget: The resources available
+        * gain: A function (candidate, chosen) returning the value candidate adds to the list of chosen candidates
+
+    Returns:
+        The chosen candidates, in the order they were chosen. Every candidate comes after the ones it requires.
+
+    """
+    chosen, value, singles = _greedy(candidates, budget, gain, None)
+    affordable = [single for single in singles if single[1] <= budget + 1e-9]
+    if affordable:
+        best_value, _, best = max(affordable, key=lambda single: single[0])
+        if best_value > 0 and best not in chosen:
+            seeded, seeded_value, _ = _greedy(candidates, budget, gain, best)
+            if seeded_value > value:
+                return seeded
+    return chosen
+
+def _greedy(candidates, budget, gain, seed):
+    """One run of lazy_greedy, optionally choosing seed first
+
+    Returns:
+        The chosen candidates, their total gain, and the (gain, cost, candidate) of every candidate evaluated alone
+
+    """
+    chosen = []
+    total = 0.0
+    singles = []
+    chosen_ids = set()
+    dependents = {}
+    for candidate in candidates:
+        for required in candidate.requires:
+            dependents.setdefault(id(required), []).append(candidate)
+    # Bumped whenever a candidate's bundle changes, invalidating its queued entries
+    versions = {}
+    heap = []
+    unaffordable = []
+
+    def bundle(candidate):
+        items = []
+        def visit(item):
+            if id(item) in chosen_ids or item in items:
+                return
+            for required in item.requires:
+                visit(required)
+            items.append(item)
+        visit(candidate)
+        return items
+
+    def push(candidate, order):
+        items = bundle(candidate)
+        trial = list(chosen)
+        value = 0.0
+        cost = 0.0
+        for item in items:
+            value += gain(item, trial)
+            cost += item.cost
+            trial.append(item)
+        if not chosen:
+            singles.append((value, cost, candidate))
+        # Ties keep the candidates' original order
+        heapq.heappush(heap, (-value / max(cost, 1e-9), order, len(chosen), versions.get(id(candidate), 0), cost, candidate))
+        return value
+
+    def invalidate(candidate):
+        for dependent in dependents.get(id(candidate), ()):
+            if id(dependent) not in chosen_ids:
+                versions[id(dependent)] = versions.get(id(dependent), 0) + 1
+                push(dependent, orders[id(dependent)])
+                invalidate(dependent)
+
+    def choose(candidate):
+        nonlocal budget, total
+        for item in bundle(candidate):
+            total += gain(item, chosen)
+            chosen.append(item)
+            chosen_ids.add(id(item))
+            budget -= item.cost
+            invalidate(item)
+
+    orders = {id(candidate): order for order, candidate in enumerate(candidates)}
+    if seed is not None:
+        choose(seed)
+    for order, candidate in enumerate(candidates):
+        if id(candidate) not in chosen_ids:
+            push(candidate, order)
+
+    while heap:
+        priority, order, evaluated_at, version, cost, candidate = heapq.heappop(heap)
+        if id(candidate) in chosen_ids or version != versions.get(id(candidate), 0):
+            continue
+        if evaluated_at != len(chosen):
+            # Stale, re-evaluate against the current choices
+            push(candidate, order)
+            continue
+        if priority >= 0:
+            continue
+        if cost > budget + 1e-9:
+            # Could become affordable once the candidates it requires are chosen for something else
+            unaffordable.append(candidate)
+            continue
+        choose(candidate)
+        for waiting in unaffordable:
+            if id(waiting) not in chosen_ids and waiting.requires:
+                push(waiting, orders[id(waiting)])
+        unaffordable = []
+    return chosen, total, singles
+
+def plan_builds(game_state, candidates, evaluator=None, budget=None):
+    """Chooses the best affordable candidates
+
+    Args:
+        * game_state: The current GameState, used for unit costs and the default budget
+        * candidates: The Candidates to choose from
+        * evaluator: A function (candidate, chosen) returning the value candidate adds to the list of chosen
+          candidates, or None to use each candidate's fixed score
+        * budget: The resources to spend, the player's cores if None
+
+    Returns:
+        The chosen candidates, in the order to spawn them
+
+    """
+    for candidate in candidates:
+        if candidate.cost is None:
+            candidate.cost = game_state.type_cost(candidate.unit_type)
+    if budget is None:
+        budget = game_state.get_resource(game_state.CORES)
+    if evaluator is None and not any(candidate.requires for candidate in candidates):
+        return knapsack(candidates, budget)
+    if evaluator is None:
+        evaluator = _fixed_score
+    return lazy_greedy(candidates, budget, evaluator)
+
+def _fixed_score(candidate, chosen):
+    return candidate.score
+
+def spawn_plan(game_state, plan):
+    """Spawns the chosen candidates in order
+
+    Returns:
+        The number of units spawned
+
+    """
+    return sum(game_state.attempt_spawn(candidate.unit_type, candidate.location) or 0 for candidate in plan)
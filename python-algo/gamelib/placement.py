@@ -0,0 +1,171 @@
+"""
+Chooses where to build destructors so they cover the paths enemy units will take.
+
+predict_enemy_paths traces a unit from every open cell of the enemy's edges, with
+one flow field per target edge. place_destructors then ranks the cells on our half
+of the arena by the damage a destructor there would deal along those paths:
+
+    ranked = gamelib.placement.place_destructors(game_state, time_limit=0.05)
+    game_state.attempt_spawn(DESTRUCTOR, ranked)
+
+A path only needs enough damage to destroy the wave walking it, so a destructor's
+value for a path shrinks as others already cover it. Choices are made greedily with
+gains kept in a priority queue and re-evaluated only when they reach the top, and
+choosing a cell only updates the damage totals of the paths it covers.
+"""
+import heapq
+import math
+import time
+
+from .bitboard import ARENA_SIZE, ARENA_MASK, NUM_CELLS, MirrorCache, get_range_cells, location_to_index, to_flags, to_indexes
+from .compiled_config import DESTRUCTOR_ID, PING_ID
+from .navigation import compute_flow_field, trace_path
+
+_attacker_cells = {}
+
+
+def _get_attacker_cells(radius):
+    """The inverse of get_range_cells, the cells whose range reaches each cell
+
+    """
+    cells = _attacker_cells.get(radius)
+    if cells is None:
+        cells = [[] for _ in range(NUM_CELLS)]
+        for index, in_range in enumerate(get_range_cells(radius)):
+            for target in in_range:
+                cells[target].append(index)
+        cells = _attacker_cells[radius] = tuple(tuple(attackers) for attackers in cells)
+    return cells
+
+def _mirror_paths(paths):
+    last = ARENA_SIZE - 1
+    return {(last - x, y): [[last - step_x, step_y] for step_x, step_y in path] for (x, y), path in paths.items()}
+
+"""
+Enemy paths keyed by the layout of the firewalls, shared with its mirror image. Mirroring a layout mirrors
+every path exactly, since the pathfinder's choices only depend on distances and the direction to the target edge.
+"""
+_enemy_paths = MirrorCache(_mirror_paths)
+
+
+def predict_enemy_paths(game_state, blocked=None):
+    """Traces the path of an enemy unit spawned on every open cell of the enemy's edges
+
+    Args:
+        * game_state: The current GameState
+        * blocked: A bitboard of the locations holding firewalls, the current map's if None
+
+    Returns:
+        A dict mapping each (x, y) spawn location to the list of locations a unit spawned there walks through.
+        The paths are cached, so they shouldn't be modified.
+
+    """
+    game_map = game_state.game_map
+    if blocked is None:
+        blocked = game_map.get_bitboard()
+
+    def trace_all(blocked):
+        paths = {}
+        for edge in (game_map.TOP_LEFT, game_map.TOP_RIGHT):
+            spawns = game_map.get_edge_locations(edge)
+            end_points = game_map.get_edge_locations(game_state.get_target_edge(spawns[0]))
+            field = compute_flow_field(blocked, end_points)
+            for location in spawns:
+                path = trace_path(blocked, location, end_points, field)
+                if path is not None:
+                    paths[tuple(location)] = path
+        return paths
+    return _enemy_paths.get((blocked,), trace_all)
+
+def place_destructors(game_state, count=None, candidates=None, paths=None, weights=None, target_damage=None, unit_type=None, time_limit=None):
+    """Ranks locations to build destructors by the damage they add along the predicted enemy paths
+
+    Args:
+        * game_state: The current GameState
+        * count: The number of locations to choose, as many destructors as we can afford if None
+        * candidates: The locations to choose from. If None, every open location on our half that no predicted path
+          crosses, since building on a path would change it.
+        * paths: A dict mapping spawn locations to paths, predict_enemy_paths(game_state) if None
+        * weights: A dict mapping spawn locations to how much their path matters, 1 for paths not in it or if None
+        * target_damage: The damage that destroys a wave, after which a path gains nothing from more coverage. If None,
+          enough to destroy as many of unit_type as the enemy can afford next turn.
+        * unit_type: The enemy unit walking the paths, PING if None. Its speed sets the frames spent on each step.
+        * time_limit: Seconds to spend choosing, after which the locations chosen so far are returned. No limit if None.
+
+    Returns:
+        The chosen locations, best first. Locations that would add no damage are left out.
+
+    """
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    compiled = game_state.compiled_config
+    if unit_type is None:
+        unit_type = compiled.PING
+    type_id = compiled.type_id(unit_type)
+    if paths is None:
+        paths = predict_enemy_paths(game_state)
+    if count is None:
+        count = game_state.number_affordable(compiled.DESTRUCTOR)
+    if target_damage is None:
+        enemy_bits = game_state.project_future_bits(1, 1)
+        target_damage = math.floor(enemy_bits / compiled.cost[type_id]) * compiled.stability[type_id]
+    weights = weights or {}
+
+    radius = compiled.range[DESTRUCTOR_ID]
+    speed = compiled.speed[type_id] or compiled.speed[PING_ID] or 1
+    step_damage = compiled.damage[DESTRUCTOR_ID] / speed
+    attackers = _get_attacker_cells(radius)
+
+    path_weights = []
+    # Cell index -> {path number: steps in range}
+    coverage = {}
+    for number, (spawn, path) in enumerate(paths.items()):
+        path_weights.append(weights.get(spawn, 1))
+        for location in path:
+            for attacker in attackers[location_to_index(location)]:
+                covered = coverage.get(attacker)
+                if covered is None:
+                    covered = coverage[attacker] = {}
+                covered[number] = covered.get(number, 0) + 1
+
+    # Damage each path already takes from our destructors
+    damage = [0.0] * len(path_weights)
+    for index in to_indexes(game_state.game_map.get_bitboard(0, compiled.DESTRUCTOR)):
+        for number, steps in coverage.get(index, {}).items():
+            damage[number] += steps * step_damage
+
+    if candidates is None:
+        half = ARENA_SIZE // 2
+        on_paths = 0
+        for path in paths.values():
+            for location in path:
+                on_paths |= 1 << location_to_index(location)
+        open_cells = to_flags(ARENA_MASK & ~game_state.game_map.get_bitboard() & ~on_paths)
+        candidates = [index for index in range(half * ARENA_SIZE) if open_cells[index]]
+    else:
+        candidates = [location_to_index(location) for location in candidates]
+
+    def gain(index):
+        value = 0.0
+        for number, steps in coverage.get(index, {}).items():
+            before = damage[number]
+            if before < target_damage:
+                value += path_weights[number] * (min(before + steps * step_damage, target_damage) - before)
+        return value
+
+    # Entries are (-gain, order, cell, number chosen when the gain was computed)
+    heap = [(-gain(index), order, index, 0) for order, index in enumerate(candidates)]
+    heapq.heapify(heap)
+    chosen = []
+    while heap and len(chosen) < count:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        negative_gain, order, index, evaluated_at = heapq.heappop(heap)
+        if evaluated_at != len(chosen):
+            heapq.heappush(heap, (-gain(index), order, index, len(chosen)))
+            continue
+        if negative_gain >= 0:
+            break
+        chosen.append([index % ARENA_SIZE, index // ARENA_SIZE])
+        for number, steps in coverage.get(index, {}).items():
+            damage[number] += steps * step_damage
+    return chosen
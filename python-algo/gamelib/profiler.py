@@ -0,0 +1,167 @@
+"""
+A sampling profiler light enough to leave on in real matches.
+
+While on_turn or on_action_frame runs, a SIGPROF timer interrupts the algo every
+few milliseconds of CPU time and the current stack is counted. Stacks are written
+at exit in the folded format used by flamegraph.pl, speedscope and similar tools:
+
+    * profile.folded holds the stacks for the whole game
+    * profile_turns.folded holds the same stacks with the turn number as the root frame
+
+Profiling is off unless the GAMELIB_PROFILE environment variable is set, for example
+by uncommenting its line in run.sh. Set it to 1 to write the files next to the algo, or to a directory. Set
+GAMELIB_PROFILE_INTERVAL to change the sampling interval in seconds.
+Only available where signal.setitimer is, so not on Windows.
+"""
+import atexit
+import contextlib
+import os
+import signal
+import sys
+
+PROFILE_VARIABLE = "GAMELIB_PROFILE"
+INTERVAL_VARIABLE = "GAMELIB_PROFILE_INTERVAL"
+
+_profiler = None
+_NO_SAMPLING = contextlib.nullcontext()
+
+
+class _Sampling:
+    __slots__ = ("profiler", "label")
+
+    def __init__(self, profiler, label):
+        self.profiler = profiler
+        self.label = label
+
+    def __enter__(self):
+        self.profiler.start(self.label)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.stop()
+        return False
+
+
+def _label_order(label):
+    # Numeric labels in numeric order, so turn 10 comes after turn 2, then any others by name
+    if isinstance(label, (int, float)):
+        return (0, label, "")
+    return (1, 0, str(label))
+
+
+class SamplingProfiler:
+    """Counts the stacks seen by a SIGPROF interval timer
+
+    Attributes:
+        * directory (str): Where the folded stack files are written
+        * interval (float): Seconds of CPU time between samples
+        * samples (dict): Maps (label, folded stack) to the number of times it was sampled
+
+    """
+    def __init__(self, directory, interval=0.005):
+        self.directory = directory
+        self.interval = interval
+        self.samples = {}
+        self._label = None
+        self._code_names = {}
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+
+    def start(self, label):
+        """Starts sampling, counting stacks under the given label (for example the turn number)
+
+        """
+        self._label = label
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        self._label = None
+
+    def close(self):
+        """Stops sampling and restores the SIGPROF handler replaced by the profiler
+
+        """
+        self.stop()
+        signal.signal(signal.SIGPROF, self._previous_handler)
+
+    def _sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            name = self._code_names.get(code)
+            if name is None:
+                name = "{} ({}:{})".format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+                self._code_names[code] = name
+            names.append(name)
+            frame = frame.f_back
+        key = (self._label, ";".join(reversed(names)))
+        self.samples[key] = self.samples.get(key, 0) + 1
+
+    def write(self):
+        """Writes profile.folded and profile_turns.folded
+
+        """
+        game = {}
+        turns = []
+        for (label, stack), count in self.samples.items():
+            game[stack] = game.get(stack, 0) + count
+            turns.append((label, stack, count))
+        turns.sort(key=lambda turn: (_label_order(turn[0]), turn[1]))
+        with open(os.path.join(self.directory, "profile.folded"), "w") as folded:
+            folded.write("".join("{} {}\n".format(stack, count) for stack, count in game.items()))
+        with open(os.path.join(self.directory, "profile_turns.folded"), "w") as folded:
+            folded.write("".join("turn {};{} {}\n".format(label, stack, count) for label, stack, count in turns))
+
+
+def enable(directory=None, interval=0.005):
+    """Starts the profiler. The profile is written when the program exits.
+
+    Args:
+        * directory: Where to write the profile, the running algo's directory if None
+        * interval: Seconds of CPU time between samples
+
+    Returns:
+        The SamplingProfiler, or None if this platform has no interval timers
+
+    """
+    global _profiler
+    if not hasattr(signal, "setitimer"):
+        return None
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(sys.argv[0]))
+    _profiler = SamplingProfiler(directory, interval)
+    atexit.register(_profiler.write)
+    return _profiler
+
+def disable():
+    """Stops the profiler and writes the profile recorded so far
+
+    """
+    global _profiler
+    if _profiler is not None:
+        atexit.unregister(_profiler.write)
+        _profiler.close()
+        _profiler.write()
+        _profiler = None
+
+def enabled():
+    return _profiler is not None
+
+def sampling(label):
+    """Samples a block of code, in practice on_turn or on_action_frame
+
+    Args:
+        * label: The label stacks are counted under, the turn number for AlgoCore
+
+    Returns:
+        A context manager. It does nothing while the profiler is off.
+
+    """
+    if _profiler is None:
+        return _NO_SAMPLING
+    return _Sampling(_profiler, label)
+
+
+_setting = os.environ.get(PROFILE_VARIABLE)
+if _setting:
+    enable(None if _setting == "1" else _setting, float(os.environ.get(INTERVAL_VARIABLE, 0.005)))
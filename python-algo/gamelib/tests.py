@@ -1,8 +1,42 @@
+import asyncio
 import unittest
 import json
+import io
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 from .game_state import GameState
 from .unit import GameUnit
-from .advanced_game_state import AdvancedGameState
+from .bitboard import location_to_index
+from .navigation import compute_flow_field, compute_idealness, trace_path
+from .placement import place_destructors, predict_enemy_paths
+from .layout import evaluate_layout
+from .forecast import forecast_attacks
+from .occupancy import OccupancyTable
+from .components import Components
+from .zobrist import TranspositionTable
+from .board_diff import ADDED, REMOVED, DESTROYED, DAMAGED, PENDING_REMOVAL, diff, snapshot_state, snapshot_string
+from .algocore import AlgoCore
+from .async_algocore import AsyncAlgoCore
+from .precompute import PrecomputedTables, write as write_tables
+from .bitboard import to_bitboard, to_bytes, to_indexes, index_to_location, mirror_cells, get_range_cells, ARENA_MASK
+from .shared_board import SharedBoard, SharedBoardView, UNIT_COLUMNS
+from .background import BackgroundWorker
+from .frame_filter import FrameFilter, extract_section, get_turn_info
+from .logger import Logger, INFO
+from .timing import TurnTimer
+from . import bitboard
+from . import precompute
+from . import tracing
+from . import profiler
+from .budget import ComputeBudget
+from .optimizer import Candidate, plan_builds, spawn_plan
+from .watchdog import TurnWatchdog
+from .event_aggregator import EventAggregator, BREACH, BREACH_REGION, DAMAGE, DEATH, GAME, TURN, WINDOW
 
 class BasicTests(unittest.TestCase):
 
@@ -130,22 +164,12 @@ class BasicTests(unittest.TestCase):
         turn_0 = """{"p2Units":[[],[],[],[],[],[],[]],"turnInfo":[0,0,-1],"p1Stats":[30.0,25.0,5.0,0],"p1Units":[[],[],[],[],[],[],[]],"p2Stats":[30.0,25.0,5.0,0],"events":{"selfDestruct":[],"breach":[],"damage":[],"shield":[],"move":[],"spawn":[],"death":[],"attack":[],"melee":[]}}"""
         
         state = GameState(json.loads(config), turn_0)
-        if adv:
-            state = AdvancedGameState(json.loads(config), turn_0)
         state.suppress_warnings(True)
         return state
 
     def test_basic(self, adv=False):
         self.assertEqual(True, True, "It's the end of the world as we know it, and I feel fine")
 
-    def test_advanced_game_state(self, adv=False):
-        advanced = self.make_turn_0_map(True)
-        self.assertTrue(isinstance(advanced, GameState))
-        self.assertTrue(isinstance(advanced, AdvancedGameState))
-        for name in sorted(dir(self)):
-            if name.startswith("test") and "advanced" not in name:
-                getattr(self, name)(True)
-
     def test_simple_fields(self, adv=False):
         game = self.make_turn_0_map(adv)
         self.assertEqual(5, game.get_resource(game.BITS), "I should have 5 bits")
@@ -207,6 +231,857 @@ class BasicTests(unittest.TestCase):
         game.game_map.add_unit("DF", [14,14], 1)
         self.assertEqual(3, len(game.get_attackers([13,13], 0)), "We should be in danger from 3 places")
 
+    def test_shared_board(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        game.game_map.add_unit("DF", [13, 11], 0)
+        game.game_map.add_unit("FF", [12, 16], 1)
+        board = SharedBoard(max_units=8)
+        try:
+            generation = board.publish(game)
+            view = SharedBoardView(board.name)
+            self.assertFalse(view.is_stale(generation))
+            self.assertEqual((0, 2), (view.turn_number, view.unit_count))
+            occupancy = bytearray()
+            for player_index in range(2):
+                for unit_type in game.compiled_config.shorthands[:6]:
+                    occupancy += to_bytes(game.game_map.get_bitboard(player_index, unit_type))
+            self.assertEqual(bytes(occupancy), view.array("occupancy").tobytes())
+            self.assertEqual([13, 11, 2, 0], list(view.array("units")[:4]))
+            self.assertEqual(list(game.get_threat_map(0)) + list(game.get_threat_map(1)), list(view.array("threat")))
+            flow = []
+            for edge in game.game_map.get_edges():
+                flow.extend(compute_flow_field(game.game_map.get_bitboard(), edge))
+            self.assertEqual(flow, list(view.array("flow")))
+            view.close()
+
+            # A worker process reads the same arrays, and leaves the block to its owner when it exits
+            package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            check = ("from gamelib.shared_board import SharedBoardView; view = SharedBoardView({!r}); "
+                     "print(view.generation, view.unit_count, sum(view.array('threat')), list(view.array('units')[{}:{}])); view.close()")
+            check = check.format(board.name, len(UNIT_COLUMNS), len(UNIT_COLUMNS) + 4)
+            worker = subprocess.run([sys.executable, "-c", check], cwd=package_directory, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            self.assertEqual("", worker.stderr)
+            self.assertEqual("{} 2 {} [12.0, 16.0, 0.0, 1.0]".format(generation, float(sum(game.get_threat_map(0)) + sum(game.get_threat_map(1)))), worker.stdout.strip())
+        finally:
+            board.close()
+        with self.assertRaises(FileNotFoundError, msg="Closing the board should destroy the block"):
+            SharedBoardView(board.name)
+
+    def test_flow_field(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        for x in range(6, 20):
+            game.game_map.add_unit("FF", [x, 10], 1)
+        field = compute_flow_field(game.game_map.get_bitboard(), game.game_map.get_edge_locations(game.game_map.TOP_RIGHT))
+        path = game.find_path_to_edge([13, 0])
+        self.assertEqual(len(path) - 1, field[location_to_index([13, 0])], "Flow field disagrees with the pathfinder")
+        self.assertEqual(-1, field[location_to_index([10, 10])], "Blocked locations should not be reachable")
+
+    def test_trace_path(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        for x in range(4, 24):
+            game.game_map.add_unit("FF", [x, 12], 0)
+        blocked = game.game_map.get_bitboard()
+        for start in [[13, 0], [3, 10], [13, 27], [14, 14]]:
+            end_points = game.game_map.get_edge_locations(game.get_target_edge(start))
+            self.assertEqual(game.find_path_to_edge(start), trace_path(blocked, start, end_points))
+        self.assertIsNone(trace_path(blocked, [10, 12], end_points), "Paths can't start on a firewall")
+
+        # Closing the wall leaves every unit in a pocket, where it self destructs instead of reaching its edge
+        for x in list(range(1, 4)) + list(range(24, 27)):
+            game.game_map.add_unit("FF", [x, 12], 0)
+        blocked = game.game_map.get_bitboard()
+        for start in [[13, 0], [3, 10], [13, 27], [14, 14]]:
+            end_points = game.game_map.get_edge_locations(game.get_target_edge(start))
+            self.assertEqual(game.find_path_to_edge(start), trace_path(blocked, start, end_points))
+
+    def test_place_destructors(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        # Funnel the enemy through the middle of the top half
+        for x in range(3, 25):
+            if x not in (13, 14):
+                game.game_map.add_unit("FF", [x, 16], 1)
+        paths = predict_enemy_paths(game)
+        self.assertEqual(28, len(paths))
+        self.assertEqual(game.find_path_to_edge([0, 14]), paths[(0, 14)])
+
+        ranked = place_destructors(game, count=3, paths=paths)
+        self.assertEqual(3, len(ranked))
+        self.assertTrue(all(abs(x - 13.5) < 3 for x, y in ranked[:2]), "The first destructors should cover the funnel")
+        on_paths = [location for path in paths.values() for location in path]
+        self.assertFalse(any(location in on_paths for location in ranked), "Building on a path would change it")
+
+        game.game_map.add_unit("DF", ranked[0], 0)
+        self.assertNotEqual(ranked[0], place_destructors(game, count=1)[0], "Existing destructors count towards coverage")
+        self.assertEqual([], place_destructors(game, target_damage=0), "Nothing is gained once every wave is destroyed")
+
+    def test_evaluate_layout(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        # A wall with one gap, guarded by a destructor
+        walls = [[x, 13] for x in range(28) if x != 14]
+        report = evaluate_layout(game, walls, [[13, 12]], add=[[14, 13], [25, 12]], remove=[[13, 12], [10, 13]])
+        game.game_map.add_unit("DF", [13, 12], 0)
+        for x, y in walls:
+            game.game_map.add_unit("FF", [x, y], 0)
+        path = game.find_path_to_edge([13, 27])
+        self.assertEqual(len(path) - 1, report.lengths[(13, 27)])
+        # In the test config DF has range 3 and PI takes 2 frames per step
+        frames = 2 * sum(1 for location in path if game.game_map.distance_between_locations(location, [13, 12]) < 3.51)
+        self.assertEqual({(13, 12): frames}, report.exposure[(13, 27)])
+        self.assertEqual(frames * 4, report.damage[(13, 27)])
+
+        self.assertEqual((0.0, 0), report.added[(25, 12)], "A wall off every path changes nothing")
+        closed = evaluate_layout(game, walls + [[14, 13]], [[13, 12]])
+        self.assertEqual((closed.total_damage - report.total_damage, closed.total_length - report.total_length), report.added[(14, 13)])
+        self.assertEqual(-report.total_damage, report.removed[(13, 12)][0], "The only destructor deals all of the damage")
+
+    def test_mirror(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        game_map = game.game_map
+        self.assertEqual([24, 1], game_map.mirror_location([3, 1]))
+        self.assertEqual([3, 26], game_map.flip_location([3, 1]))
+        self.assertEqual(to_bitboard([[24, 1], [13, 0]]), game_map.mirror_bitboard(to_bitboard([[3, 1], [14, 0]])))
+        self.assertEqual(to_bitboard([[3, 26]]), game_map.flip_bitboard(to_bitboard([[3, 1]])))
+
+        game_map.add_unit("DF", [3, 12], 0)
+        game_map.add_unit("FF", [20, 15], 1)
+        reflected = game_map.mirrored()
+        self.assertEqual("DF", reflected[24, 12][0].unit_type)
+        self.assertEqual(24, reflected[24, 12][0].x)
+        self.assertEqual(3, game_map[3, 12][0].x, "Mirroring copies the units")
+        self.assertEqual(game_map.get_layout_key()[0], reflected.get_layout_key()[0])
+        self.assertNotEqual(game_map.get_layout_key()[1], reflected.get_layout_key()[1])
+        reflected.add_unit("FF", [24, 12], 1)
+        self.assertNotEqual(game_map.get_layout_key()[0], reflected.get_layout_key()[0], "Keys depend on owners and types")
+
+        threat = game.get_threat_map(1)
+        game.game_map = game_map.mirrored()
+        self.assertEqual(mirror_cells(threat), game.get_threat_map(1), "Mirrored layouts share threat maps")
+
+    def test_flipped_view(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        game.game_map.add_unit("DF", [13, 16], 1)
+        game.game_map.add_unit("FF", [12, 13], 0)
+        view = game.flipped()
+        self.assertIs(game, view.flipped())
+
+        unit = view.game_map[13, 11][0]
+        self.assertEqual(("DF", 13, 11, 0), (unit.unit_type, unit.x, unit.y, unit.player_index))
+        self.assertEqual(1, view.game_map[12, 14][0].player_index)
+        self.assertEqual([[13, 11]], [[attacker.x, attacker.y] for attacker in view.get_attackers([13, 14], 1)])
+        self.assertEqual(game.game_map.flip_bitboard(game.game_map.get_bitboard(1)), view.game_map.get_bitboard(0))
+
+        path = game.find_path_to_edge([13, 27])
+        self.assertEqual([view.game_map.flip_location(location) for location in path], view.find_path_to_edge([13, 0]))
+        self.assertTrue(view.can_spawn("PI", [13, 0]), "The enemy can deploy on its own edges")
+        self.assertEqual(game.enemy_health, view.my_health)
+
+        view.attempt_spawn("FF", [5, 10])
+        self.assertEqual("FF", game.game_map[5, 17][0].unit_type)
+        self.assertEqual(1, game.game_map[5, 17][0].player_index)
+        self.assertEqual(game.get_resource(game.CORES, 1), view.get_resource(view.CORES), "Views spend the viewed state's resources")
+        self.assertLess(game.get_resource(game.CORES, 1), game.get_resource(game.CORES, 0))
+
+        # Reading a cell again reuses its FlippedUnits until the units there change
+        cell = view.game_map[13, 11]
+        self.assertIs(cell, view.game_map[13, 11])
+        self.assertEqual([], view.game_map[13, 12])
+        game.game_map.add_unit("EF", [13, 15], 1)
+        self.assertEqual(["EF"], [unit.unit_type for unit in view.game_map[13, 12]])
+        game.game_map.remove_unit([13, 16])
+        self.assertEqual([], view.game_map[13, 11], "A removed unit shouldn't be read from the cache")
+        game.game_map.add_unit("FF", [13, 16], 1)
+        self.assertEqual(["FF"], [unit.unit_type for unit in view.game_map[13, 11]])
+
+        game.game_map._components = None
+        components = view.game_map.get_components()
+        self.assertEqual(view.game_map.get_bitboard(), components.blocked)
+        self.assertIsNone(game.game_map._components, "The view's pockets shouldn't be built from the viewed map's")
+        self.assertIs(components, view.game_map.get_components())
+
+    def test_forecast_attacks(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        # A wall with one gap, guarded by a destructor
+        for x in range(28):
+            if x != 5:
+                game.game_map.add_unit("FF", [x, 13], 0)
+        game.game_map.add_unit("DF", [5, 11], 0)
+
+        lanes = forecast_attacks(game, bits=6)
+        self.assertEqual(28, len(lanes))
+        first = lanes[0]
+        self.assertEqual(game.find_path_to_edge(list(first.spawn)), first.path)
+        self.assertIn([5, 13], first.path)
+        self.assertEqual(first.path[-1], first.breach)
+        self.assertEqual(6, first.units)
+        # PI has 15 stability in the test config
+        self.assertEqual(6 - first.damage // 15, first.survivors)
+        self.assertEqual(first.survivors, first.score)
+        self.assertEqual({(5, 11)}, set(first.exposure))
+        self.assertTrue(all(lane.score <= first.score for lane in lanes))
+        self.assertEqual(3, len(forecast_attacks(game, count=3)))
+
+        game.game_map.add_unit("FF", [5, 13], 0)
+        self.assertFalse(any(lane.breach for lane in forecast_attacks(game)), "Units in a closed pocket self destruct")
+
+        # With the bottom right edge walled off, units targeting it stop on the bottom left edge
+        game = self.make_turn_0_map(adv)
+        for location in game.game_map.get_edge_locations(game.game_map.BOTTOM_RIGHT):
+            game.game_map.add_unit("FF", location, 0)
+        lanes = forecast_attacks(game)
+        self.assertEqual(game.project_future_bits(1, 1) // game.type_cost("PI"), lanes[0].units, "Bits should default to the enemy's next turn")
+        blocked = [lane for lane in lanes if game.get_target_edge(lane.spawn) == game.game_map.BOTTOM_RIGHT]
+        self.assertTrue(blocked)
+        for lane in blocked:
+            self.assertEqual([13, 0], lane.path[-1])
+            self.assertIsNone(lane.breach, "Stopping on the other bottom edge isn't a breach")
+            self.assertEqual(0, lane.score)
+        self.assertTrue(all(lane.breach for lane in lanes if lane not in blocked))
+
+    def test_occupancy_table(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        table = OccupancyTable()
+        # SI has speed 0.25 in the test config, so it spends 4 frames on each location
+        scrambler = GameUnit("SI", game.config, 0)
+        number = table.add(scrambler, [[13, 0], [13, 1], [13, 2]])
+        ping = table.add("ping", [[13, 5], [13, 4], [13, 3], [13, 2]], 1, start_frame=2, player_index=1)
+        self.assertEqual(9, table.frames)
+        self.assertEqual([13, 0], table.location_of(number, 3))
+        self.assertEqual([13, 1], table.location_of(number, 4))
+        self.assertIsNone(table.location_of(number, 9))
+        self.assertIsNone(table.location_of(ping, 1), "Units aren't on the map before they spawn")
+        self.assertEqual([13, 3], table.location_of(ping, 4))
+        self.assertEqual([scrambler], table.units_at([13, 2], 8))
+        self.assertEqual(to_bitboard([[13, 0], [13, 4]]), table.occupied(3))
+
+        self.assertEqual({"ping": [4, 5]}, table.units_in_range([13, 2], 1, 0, 20, player_index=1))
+        self.assertEqual({"ping": [4]}, table.units_in_range([13, 2], 1, 0, 4, player_index=1))
+        self.assertEqual({scrambler: list(range(9))}, table.units_in_range([13, 1], 1, 0, 20, player_index=0))
+        self.assertEqual({}, table.units_in_range([13, 1], 1, 0, 4, player_index=1))
+
+    def test_components(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        game_map = game.game_map
+        # Close the row y = 12, cutting our half off from the enemy's
+        for x in range(1, 27):
+            game_map.add_unit("FF", [x, 12], 0)
+        components = game_map.get_components()
+        self.assertEqual(2, components.count)
+        self.assertTrue(components.connected([13, 0], [3, 10]))
+        self.assertFalse(components.connected([13, 0], [13, 27]))
+        self.assertIsNone(components.label([13, 12]), "Blocked locations aren't in a pocket")
+        self.assertTrue(components.touches_edge([13, 0], game_map.BOTTOM_LEFT))
+        self.assertFalse(components.touches_edge([13, 0], game_map.TOP_RIGHT))
+        self.assertEqual(game.find_path_to_edge([13, 5], game_map.TOP_RIGHT)[-1], components.ideal_tile([13, 5], game_map.TOP_RIGHT))
+        self.assertEqual(components.blocked, Components(game_map.get_bitboard()).blocked)
+
+        game_map.remove_unit([13, 12])
+        self.assertIs(components, game_map.get_components(), "Removing a firewall should update the pockets in place")
+        self.assertEqual(1, components.count)
+        self.assertTrue(components.touches_edge([13, 0], game_map.TOP_RIGHT))
+        self.assertEqual(components.size([13, 0]), Components(game_map.get_bitboard()).size([13, 0]))
+
+        game_map.add_unit("FF", [13, 12], 0)
+        self.assertIsNot(components, game_map.get_components(), "Adding a firewall should rebuild the pockets")
+        self.assertEqual(2, game_map.get_components().count)
+
+        # Alternate additions and removals, querying after each
+        open_cells = [index_to_location(index) for index in to_indexes(ARENA_MASK)]
+        changes = [("add", [x, 14]) for x in range(0, 28, 3)] + [("remove", [13, 12]), ("add", [13, 13]), ("remove", [1, 12]),
+                   ("remove", [13, 13]), ("add", [13, 12]), ("remove", [2, 12]), ("remove", [3, 14]), ("add", [3, 12])]
+        for change, location in changes:
+            if change == "add":
+                game_map.add_unit("FF", location, 0)
+            else:
+                game_map.remove_unit(location)
+            components = game_map.get_components()
+            fresh = Components(game_map.get_bitboard())
+            message = "Pockets should match a rebuild after {} {}".format(change, location)
+            self.assertEqual(fresh.blocked, components.blocked, message)
+            self.assertEqual(fresh.count, components.count, message)
+            for cell in open_cells:
+                self.assertEqual(fresh.size(cell), components.size(cell), message)
+                self.assertEqual(fresh.label(cell) is None, components.label(cell) is None, message)
+                for edge in range(4):
+                    self.assertEqual(fresh.ideal_tile(cell, edge), components.ideal_tile(cell, edge), message)
+            for location_1, location_2 in ([13, 0], [13, 27]), ([0, 13], [27, 13]), ([1, 12], [13, 20]):
+                self.assertEqual(fresh.connected(location_1, location_2), components.connected(location_1, location_2), message)
+
+    def test_zobrist_hash(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        other = self.make_turn_0_map(adv)
+        game_map = game.game_map
+        self.assertEqual(game_map.compute_hash(), game_map.get_hash())
+        start = game.get_hash()
+
+        game_map.add_unit("FF", [13, 11], 0)
+        game_map.add_unit("DF", [12, 11], 0)
+        other.game_map.add_unit("DF", [12, 11], 0)
+        other.game_map.add_unit("FF", [13, 11], 0)
+        self.assertEqual(other.get_hash(), game.get_hash(), "The order units are added in shouldn't matter")
+        self.assertEqual(game_map.compute_hash(), game_map.get_hash())
+        game_map.remove_unit([12, 11])
+        game_map.remove_unit([13, 11])
+        self.assertEqual(start, game.get_hash())
+
+        game_map.add_unit("PI", [13, 0], 0)
+        single = game.get_hash()
+        game_map.add_unit("PI", [13, 0], 0)
+        self.assertNotIn(game.get_hash(), (start, single), "Stacked units shouldn't cancel out")
+        game_map.remove_unit([13, 0])
+        self.assertEqual(start, game.get_hash())
+
+        game_map.add_unit("FF", [13, 11], 0)
+        wall = game.get_hash()
+        wall_map = game_map.get_hash()
+        game_map.set_stability(game_map[13, 11][0], 50)
+        damaged = game.get_hash()
+        self.assertNotEqual(wall, damaged)
+        self.assertEqual(game_map.compute_hash(), game_map.get_hash())
+        game_map.set_stability(game_map[13, 11][0], 46)
+        self.assertEqual(damaged, game.get_hash(), "Stabilities in the same bucket should hash the same")
+        game_map[13, 11] = []
+        self.assertEqual(start, game.get_hash())
+
+        game.attempt_spawn("FF", [13, 11])
+        self.assertEqual(wall_map, game_map.get_hash())
+        self.assertNotEqual(wall, game.get_hash(), "Spent resources should change the hash")
+
+        state = json.loads(game.serialized_string)
+        state["p1Units"][0].append([13, 11, 60.0, "1"])
+        state["p2Units"][2].append([12, 16, 50.0, "2"])
+        parsed = GameState(game.config, json.dumps(state))
+        built = self.make_turn_0_map(adv)
+        built.game_map.add_unit("FF", [13, 11], 0)
+        built.game_map.add_unit("DF", [12, 16], 1)
+        built.game_map.set_stability(built.game_map[12, 16][0], 50.0)
+        self.assertEqual(built.get_hash(), parsed.get_hash(), "Parsing should hash like adding the units")
+
+        other.game_map.add_unit("DF", [12, 16], 1)
+        view = other.flipped()
+        expected = self.make_turn_0_map(adv)
+        expected.game_map.add_unit("DF", [12, 11], 0)
+        expected.game_map.add_unit("FF", [13, 16], 1)
+        expected.game_map.add_unit("DF", [12, 16], 1)
+        self.assertEqual(expected.game_map.get_hash(), view.game_map.get_hash())
+        self.assertEqual(other.game_map.get_hash(), view.game_map.flipped().get_hash())
+
+    def test_transposition_table(self, adv=False):
+        table = TranspositionTable(4)
+        self.assertTrue(table.store(5, "deep", depth=3))
+        self.assertEqual("deep", table.get(5))
+        self.assertIsNone(table.get(5, depth=4), "Entries searched too shallow shouldn't be returned")
+        self.assertIsNone(table.get(9))
+        self.assertFalse(table.store(9, "shallow", depth=1), "A deeper entry of this generation should be kept")
+        self.assertEqual("deep", table.get(5))
+        table.new_generation()
+        self.assertTrue(table.store(9, "shallow", depth=1), "Entries of earlier generations should give way")
+        self.assertIsNone(table.get(5))
+        self.assertEqual("shallow", table.get(9))
+        self.assertEqual((3, 3, 2, 1, 1), (table.hits, table.misses, table.stores, table.replacements, table.rejections))
+        self.assertEqual(0.5, table.hit_rate())
+
+    def test_board_diff(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        previous = json.loads(game.serialized_string)
+        previous["p1Units"][0].append([13, 11, 60.0, "1"])
+        previous["p1Units"][2].append([12, 11, 75.0, "2"])
+        previous["p2Units"][0].append([13, 16, 60.0, "3"])
+        previous["p2Units"][6].append([13, 16, 0.0, "4"])
+        current = json.loads(game.serialized_string)
+        current["turnInfo"][1] = 1
+        current["p1Units"][0].append([13, 11, 40.0, "1"])
+        current["p1Units"][1].append([3, 12, 30.0, "5"])
+        current["p1Units"][6].append([13, 11, 0.0, "6"])
+        current["p2Units"][2].append([13, 16, 75.0, "7"])
+        previous, current = json.dumps(previous), json.dumps(current)
+
+        board_diff = diff(snapshot_string(game.config, previous), snapshot_string(game.config, current))
+        self.assertEqual([[3, 12]], board_diff.get_locations(ADDED, 0))
+        self.assertEqual([[13, 16]], board_diff.get_locations(ADDED, 1, "DF"))
+        self.assertEqual([[12, 11], [13, 16]], board_diff.get_locations(REMOVED))
+        self.assertEqual([[12, 11]], board_diff.get_locations(DESTROYED), "Firewalls pending removal weren't destroyed")
+        self.assertEqual([[13, 11]], board_diff.get_locations(DAMAGED, 0, "FF"))
+        self.assertEqual(20.0, board_diff.get_damage([13, 11]))
+        self.assertEqual([[13, 11]], board_diff.get_locations(PENDING_REMOVAL, 0))
+        self.assertEqual(0, board_diff.get_bitboard(PENDING_REMOVAL, 1))
+        with self.assertRaises(ValueError):
+            board_diff.get_bitboard("built")
+
+        parsed = GameState(game.config, current)
+        self.assertEqual(board_diff.get_bitboard(DAMAGED), diff(snapshot_string(game.config, previous), snapshot_state(parsed)).get_bitboard(DAMAGED))
+        self.assertEqual([[13, 11], [3, 12], [13, 16]], diff(None, snapshot_state(parsed)).get_locations(ADDED))
+
+        algo = AlgoCore()
+        algo._game_config = game.config
+        algo._record_turn_string(previous)
+        self.assertEqual([[12, 11], [13, 11], [13, 16]], algo.get_board_diff().get_locations(ADDED), "Everything is new on the first turn")
+        algo._record_turn_string(current)
+        self.assertEqual(board_diff.get_bitboard(DESTROYED), algo.get_board_diff().get_bitboard(DESTROYED))
+        parsed.attempt_spawn("FF", [13, 10])
+        self.assertEqual([[13, 10], [3, 12]], algo.get_board_diff(parsed).get_locations(ADDED, 0))
+
+    def test_precomputed_tables(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        game_map = game.game_map
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "precomputed.bin")
+            write_tables(path, game.config, {"opening": [["DF", 13, 11]]})
+            tables = PrecomputedTables(path, game.config)
+            self.assertEqual(game_map.get_edges(), tables.get_edges())
+            self.assertEqual(to_bitboard(game_map.get_locations_in_range([13, 5], 3)), tables.get_range_bitboard([13, 5], 3))
+            self.assertEqual(compute_flow_field(0, game_map.get_edges()[2]), list(tables.get_flow_field(2)))
+            self.assertEqual([["DF", 13, 11]], tables.get_opening("opening", game.config))
+
+            # Installed tables give the values gamelib would compute
+            edges = game_map.get_edges()
+            computed = [(compute_idealness(edge), compute_flow_field(0, edge)) for edge in edges]
+            in_range = [game_map.get_locations_in_range(location, 3) for location in ([13, 5], [0, 13], [20, 20])]
+            range_cells = get_range_cells(3.0)
+            bitboard._range_cells.pop(3.0)
+            precompute.install(tables)
+            try:
+                self.assertEqual(edges, game_map.get_edges())
+                self.assertEqual(computed, [(compute_idealness(edge), compute_flow_field(0, edge)) for edge in edges])
+                self.assertEqual(in_range, [game_map.get_locations_in_range(location, 3) for location in ([13, 5], [0, 13], [20, 20])])
+                self.assertEqual(range_cells, get_range_cells(3))
+                self.assertIs(tables.get_range_cells(3), get_range_cells(3.0), "Range cells should be read from the tables")
+                blocked = to_bitboard([[13, 13]])
+                self.assertEqual(-1, compute_flow_field(blocked, edges[0])[location_to_index([13, 13])], "Only the empty board is precomputed")
+                self.assertFalse(tables.has_range(2))
+                self.assertIn([13, 7], game_map.get_locations_in_range([13, 5], 2), "Other ranges should still be computed")
+            finally:
+                precompute.install(None)
+            tables.close()
+            other_config = dict(game.config, unitInformation=game.config["unitInformation"][:-1])
+            with self.assertRaises(ValueError, msg="Tables built for another config should be rejected"):
+                PrecomputedTables(path, other_config)
+            resources = dict(game.config["resources"], startingHP=game.config["resources"]["startingHP"] + 1)
+            with self.assertRaises(ValueError, msg="Tables are checked against the same fingerprint as CompiledConfig"):
+                PrecomputedTables(path, dict(game.config, resources=resources))
+
+    def test_project_resources(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        bits, cores = game.project_resources(10)
+        self.assertEqual(11, len(bits[0]))
+        self.assertEqual(game.project_future_bits(10), bits[0][10])
+        self.assertEqual(bits[0], bits[1], "Both players start with the same resources")
+        self.assertEqual([25.0, 30.0, 35.0], list(cores[0][:3]))
+
+        bits, cores = game.project_resources(2, bit_spends=[[5.0], []], core_spends=[[], [10.0, 5.0]])
+        self.assertEqual(5.0, bits[0][1], "Spending every bit leaves only the next turn's income")
+        self.assertEqual([25.0, 20.0, 20.0], list(cores[1]))
+        self.assertIs(bits[1], game.project_resources(2)[0][1], "Projections should be memoized")
+
+    def test_plan_builds(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        candidates = [Candidate("DF", [13, 5], 10), Candidate("FF", [12, 5], 4), Candidate("FF", [11, 5], 5), Candidate("FF", [10, 5], 3)]
+        self.assertEqual(candidates[1:], plan_builds(game, candidates, budget=3), "Three filters are worth more than a destructor")
+        self.assertEqual([candidates[0], candidates[2]], plan_builds(game, candidates, budget=4))
+
+        wall = Candidate("FF", [14, 5], 0)
+        shield = Candidate("EF", [14, 4], 20, requires=[wall])
+        plan = plan_builds(game, [shield, wall] + candidates, budget=5)
+        self.assertEqual([wall, shield], plan, "Required candidates should be chosen first")
+        self.assertEqual(2, spawn_plan(game, plan))
+
+        def coverage(candidate, chosen):
+            return len({candidate.location[0], candidate.location[0] + 1} - {x for c in chosen for x in (c.location[0], c.location[0] + 1)})
+        plan = plan_builds(game, [Candidate("DF", [x, 3]) for x in range(8, 14)], evaluator=coverage, budget=9)
+        self.assertEqual(3, len(plan))
+        self.assertEqual(6, len({x for c in plan for x in (c.location[0], c.location[0] + 1)}), "Chosen destructors should not overlap")
+
+    def test_compiled_config(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        compiled = game.compiled_config
+        self.assertIs(compiled, GameState(game.config, game.serialized_string).compiled_config, "Configs should only be compiled once")
+        self.assertEqual(2, compiled.type_ids["DF"])
+        self.assertEqual(game.type_cost("DF"), compiled.cost[compiled.type_ids["DF"]])
+        self.assertEqual((True, True, True, False, False, False), compiled.stationary[:6])
+
+        # A second config with different shorthands in the same process
+        other_config = json.loads(json.dumps(game.config))
+        other_config["unitInformation"][0]["shorthand"] = "WL"
+        other_game = GameState(other_config, game.serialized_string)
+        other_game.game_map.add_unit("WL", [13, 13])
+        game.game_map.add_unit("FF", [14, 13])
+        self.assertEqual(0, game.game_map[14, 13][0].type_id)
+        self.assertNotEqual(compiled.fingerprint, other_game.compiled_config.fingerprint)
+
+        # Stats keep the config's types, so whole number costs stay ints
+        self.assertIs(int, type(game.type_cost("DF")))
+        self.assertIs(int, type(game.number_affordable("DF")))
+        unit = game.game_map[14, 13][0]
+        self.assertIs(int, type(unit.cost))
+        self.assertEqual(str(game.config["unitInformation"][0]["stability"]), str(unit.max_stability))
+        other_config = json.loads(json.dumps(game.config))
+        other_config["unitInformation"][0]["cost"] = 2.5
+        other_game = GameState(other_config, game.serialized_string)
+        self.assertEqual(2.5, other_game.type_cost("FF"))
+        self.assertIs(float, type(other_game.type_cost("PI")))
+
+    def test_lazy_import(self, adv=False):
+        package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        check = "import gamelib, sys; print('gamelib.game_state' in sys.modules, gamelib.GameState.__name__, 'gamelib.game_state' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", check], cwd=package_directory, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        self.assertEqual("False GameState True", output.strip(), "GameState should only be imported when first used")
+        check = "import gamelib, sys; print([name for name in ('gamelib.precompute', 'gamelib.tracing', 'gamelib.profiler', 'mmap', 'signal') if name in sys.modules])"
+        output = subprocess.run([sys.executable, "-c", check], cwd=package_directory, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        self.assertEqual("[]", output.strip(), "Tables, tracing and profiling should only be imported once the game needs them")
+
+    def run_scripted_algo(self, core, messages, frame_delay=0, turn_delay=0):
+        """Runs a strategy built on core, "AlgoCore" or "AsyncAlgoCore", writing messages to its stdin
+
+        A number in messages pauses for that many seconds before the following messages are written.
+        The strategy spawns a filter per turn and writes the action frames it handled to stderr. Each
+        turn takes turn_delay seconds, and each action frame frame_delay seconds, awaited with AsyncAlgoCore.
+
+        Returns:
+            The (return code, stdout, stderr) of the strategy
+
+        """
+        asynchronous = core == "AsyncAlgoCore"
+        strategy = """
+import asyncio, time
+import gamelib
+from gamelib.algocore import AlgoCore
+from gamelib.async_algocore import AsyncAlgoCore
+
+class Strategy({core}):
+    def __init__(self):
+        super().__init__()
+        self.coalesce_action_frames = True
+        self.frames = []
+
+    def on_game_start(self, config):
+        self.config = config
+
+    def on_turn(self, turn_state):
+        game_state = gamelib.GameState(self.config, turn_state)
+        game_state.attempt_spawn("FF", [13 - game_state.turn_number, 11])
+        # A what-if state, which should never be submitted
+        lookahead = gamelib.GameState(self.config, turn_state)
+        lookahead.attempt_spawn("DF", [13, 5])
+        time.sleep({turn_delay})
+        game_state.submit_turn()
+        gamelib.debug_write("frames", *self.frames)
+
+    {prefix}def on_action_frame(self, turn_state):
+        self.frames.append(gamelib.frame_filter.get_turn_info(turn_state)[2])
+        {wait}({frame_delay})
+
+Strategy().start()
+""".format(core=core, prefix="async " if asynchronous else "", wait="await asyncio.sleep" if asynchronous else "time.sleep",
+           frame_delay=frame_delay, turn_delay=turn_delay)
+        package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        algo = subprocess.Popen([sys.executable, "-c", strategy], cwd=package_directory, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        for message in messages:
+            if isinstance(message, str):
+                algo.stdin.write(message + "\n")
+                algo.stdin.flush()
+            else:
+                time.sleep(message)
+        stdout, stderr = algo.communicate(timeout=60)
+        return algo.returncode, stdout, stderr
+
+    def test_async_algocore(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        config = json.dumps(dict(game.config, replaySave=0))
+
+        def message(state_type, turn_number, frame):
+            state = json.loads(game.serialized_string)
+            state["turnInfo"] = [state_type, turn_number, frame]
+            return json.dumps(state)
+        frames = [message(1, 0, frame) for frame in range(6)]
+        # Frame 0 is being handled when the rest of the frames arrive
+        messages = [config, message(0, 0, -1), frames[0], 0.2] + frames[1:] + [message(0, 1, -1), message(2, 1, 6)]
+
+        returncode, expected, stderr = self.run_scripted_algo("AlgoCore", messages)
+        self.assertEqual(0, returncode, stderr)
+        self.assertIn("frames, 0, 1, 2, 3, 4, 5", stderr)
+        returncode, stdout, stderr = self.run_scripted_algo("AsyncAlgoCore", messages, frame_delay=0.5)
+        self.assertEqual(0, returncode, stderr)
+        self.assertEqual(expected, stdout, "Turns should be submitted like AlgoCore does")
+        self.assertEqual(4, len(stdout.splitlines()), "No turn should be dropped")
+        self.assertIn("frames, 0, 5", stderr, "Frames arriving while a frame is handled should be coalesced")
+        self.assertIn("Got end state quitting bot.", stderr)
+
+        # The game exiting without an end message closes stdin
+        returncode, stdout, stderr = self.run_scripted_algo("AsyncAlgoCore", messages[:2])
+        self.assertEqual(0, returncode, stderr)
+        self.assertEqual(expected.splitlines()[:2], stdout.splitlines())
+        self.assertIn("Got EOF, parent game process must have died, exiting for cleanup", stderr)
+
+    def test_async_queue_bound(self, adv=False):
+        game = self.make_turn_0_map(adv)
+
+        def message(state_type, turn_number, frame):
+            state = json.loads(game.serialized_string)
+            state["turnInfo"] = [state_type, turn_number, frame]
+            return json.dumps(state)
+        messages = [json.dumps(dict(game.config, replaySave=0)), message(0, 0, -1)] + [message(1, 0, frame) for frame in range(10)]
+
+        class Strategy(AsyncAlgoCore):
+            def __init__(self):
+                super().__init__()
+                self.queue_size = 2
+                self.coalesce_action_frames = True
+                self.read = 0
+                self.read_during_turn = None
+                self.frames = []
+
+            async def _read_messages(self, queue):
+                for line in messages:
+                    await queue.put((line, time.perf_counter()))
+                    self.read += 1
+                await queue.put(None)
+
+            async def on_turn(self, turn_state):
+                await asyncio.sleep(0.05)
+                self.read_during_turn = self.read
+
+            def on_action_frame(self, turn_state):
+                self.frames.append(get_turn_info(turn_state)[2])
+
+        strategy = Strategy()
+        with contextlib.redirect_stderr(io.StringIO()):
+            strategy.start()
+        self.assertEqual(2 + strategy.queue_size, strategy.read_during_turn, "Reading should wait while the queue is full")
+        self.assertEqual(9, strategy.frames[-1], "The latest frame should be handled")
+        self.assertGreater(strategy.dropped_action_frames, 0)
+        self.assertEqual(10, strategy.dropped_action_frames + len(strategy.frames), "Every skipped frame should be counted")
+
+    def test_background_worker(self, adv=False):
+        def task():
+            yield 1
+            yield None
+            return 2
+        worker = BackgroundWorker()
+        worker.start(task())
+        worker._thread.join()
+        self.assertTrue(worker.finished, "Background task should have run to completion")
+        self.assertEqual(2, worker.stop(), "Background task result should be its return value")
+
+        steps = []
+        closed = []
+        def endless():
+            try:
+                while True:
+                    steps.append(len(steps))
+                    yield len(steps)
+                    time.sleep(0.001)
+            finally:
+                closed.append(True)
+        worker.start(endless())
+        while len(steps) < 3:
+            time.sleep(0.001)
+        worker.pause()
+        # The step running when paused finishes at its yield
+        time.sleep(0.02)
+        paused_at = len(steps)
+        time.sleep(0.05)
+        self.assertEqual(paused_at, len(steps), "A paused task shouldn't run past its yield")
+        worker.resume()
+        while len(steps) < paused_at + 3:
+            time.sleep(0.001)
+        self.assertGreaterEqual(worker.stop(), paused_at + 3, "The latest yielded value should be kept")
+        self.assertEqual([True], closed, "Stopping should close the task at its yield")
+        self.assertFalse(worker.finished)
+        self.assertFalse(worker.running())
+
+    def test_frame_filter(self, adv=False):
+        frame = """{"p2Units":[[],[],[],[],[],[],[]],"turnInfo":[1,3,12],"p1Stats":[30.0,25.0,5.0,0],"p1Units":[[],[],[],[],[],[],[]],"p2Stats":[28.0,25.0,5.0,0],"events":{"selfDestruct":[],"breach":[[[13,27],1,3,"17",1]],"damage":[],"death":[]}}"""
+        frame_filter = FrameFilter(["death"])
+        self.assertEqual([1, 3, 12], get_turn_info(frame), "turnInfo was not decoded")
+        self.assertEqual([28.0, 25.0, 5.0, 0], extract_section(frame, "p2Stats"), "p2Stats was not decoded")
+        self.assertFalse(frame_filter.is_relevant(frame), "Frame has no death events")
+        frame_filter.register("breach")
+        self.assertTrue(frame_filter.is_relevant(frame), "Frame has a breach event")
+        self.assertEqual({"breach": [[[13, 27], 1, 3, "17", 1]], "death": []}, frame_filter.get_events(frame), "Events were not decoded")
+
+    def test_event_aggregator(self, adv=False):
+        game = self.make_turn_0_map(adv)
+        tally = EventAggregator(game.config, window_turns=2)
+        tally.consume({"breach": [[[3, 10], 1, 3, "1", 2]], "death": [[[3, 10], 3, "1", 2, False]]})
+        tally.start_turn(1)
+        tally.consume({"breach": [[[24, 10], 1, 3, "2", 2], [[24, 10], 1, 3, "3", 2]]})
+        self.assertEqual(1, tally.get(BREACH_REGION, (1, "left"), WINDOW), "Breach from turn 0 should be in the window")
+        tally.start_turn(2)
+        self.assertEqual(0, tally.get(BREACH_REGION, (1, "left"), WINDOW), "Breach from turn 0 should have left the window")
+        self.assertEqual(2, tally.get(BREACH, (1, 24, 10), WINDOW), "Breaches from turn 1 should be in the window")
+        self.assertEqual(0, tally.get(BREACH, (1, 24, 10), TURN), "No breaches this turn")
+        self.assertEqual({(1, 3, 10): 1, (1, 24, 10): 2}, tally.totals(BREACH, GAME), "Game breach totals are wrong")
+        self.assertEqual(1, tally.get(DEATH, (1, "PI")), "Ping death was not counted")
+
+        # Fractional damage leaving the window
+        tally.consume({"damage": [[[3, 10], 0.1, 3, "4", 1], [[3, 10], 0.1, 3, "4", 1]]})
+        tally.start_turn(3)
+        tally.consume({"damage": [[[3, 10], 0.1, 3, "4", 1]]})
+        tally.start_turn(5)
+        self.assertEqual({}, tally.totals(DAMAGE, WINDOW), "Evicted damage should leave no tallies in the window")
+        self.assertEqual(0, tally.get(DAMAGE, (0, "left"), WINDOW))
+
+    def test_logger(self, adv=False):
+        output = io.StringIO()
+        log = Logger(level=INFO, rate_limit=2, stream=output)
+        log.debug("Not written {}", 1)
+        location = [13, 0]
+        for x in range(3):
+            location[0] = x
+            log.info("Blocked at {}", location)
+        for x in range(3):
+            log.info("Plain line")
+        self.assertEqual("", output.getvalue(), "Messages should be buffered until flushed")
+        log.start_turn()
+        log.flush()
+        lines = output.getvalue().splitlines()
+        self.assertEqual(["Blocked at [0, 0]", "Blocked at [1, 0]"], lines[:2], "Messages should be formatted when logged")
+        self.assertEqual(["Plain line"] * 3, lines[2:5], "Messages without args should not be rate limited")
+        self.assertIn("x1", lines[5], "Suppressed messages should be reported")
+
+        output = io.StringIO()
+        log = Logger(stream=output)
+        log.info("Buffered")
+        log.warning("Out of {}", "time")
+        self.assertEqual("Buffered\nOut of time\n", output.getvalue(), "Warnings should be written at once")
+
+        # Threads logging while the main thread flushes
+        output = io.StringIO()
+        log = Logger(capacity=10000, flush_threshold=10000, rate_limit=None, stream=output)
+        def log_lines(name):
+            for number in range(2000):
+                log.info("{} {}", name, number)
+        threads = [threading.Thread(target=log_lines, args=(name,)) for name in ("watchdog", "background")]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            log.flush()
+        log.flush()
+        lines = output.getvalue().splitlines()
+        for name in ("watchdog", "background"):
+            self.assertEqual(["{} {}".format(name, number) for number in range(2000)], [line for line in lines if line.startswith(name)],
+                             "No message should be lost or reordered")
+
+    def test_tracing(self, adv=False):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            tracing.enable(path)
+            try:
+                tracing.set_context(turn=3)
+                with tracing.span("on_turn"):
+                    with tracing.span("simulate", candidates=2):
+                        sum(range(10000))
+                self.make_turn_0_map(adv)
+            finally:
+                tracing.disable()
+            self.assertIs(tracing.span("off"), tracing.span("off"), "Spans should do nothing once tracing is off")
+            with open(path) as trace_file:
+                trace = json.load(trace_file)
+
+        events = {event["name"]: event for event in trace["traceEvents"]}
+        self.assertEqual({"on_turn", "simulate", "GameState.__init__"}, set(events))
+        for event in trace["traceEvents"]:
+            self.assertEqual("X", event["ph"], "Spans should be complete events, which hold their begin and end")
+            self.assertGreaterEqual(event["dur"], 0)
+            self.assertEqual((os.getpid(), 3), (event["pid"], event["args"]["turn"]))
+            self.assertIsInstance(event["tid"], int)
+        outer, inner = events["on_turn"], events["simulate"]
+        self.assertEqual(2, inner["args"]["candidates"])
+        self.assertLessEqual(outer["ts"], inner["ts"], "A nested span should begin after its parent")
+        self.assertLessEqual(inner["ts"] + inner["dur"], outer["ts"] + outer["dur"], "A nested span should end before its parent")
+        self.assertGreaterEqual(events["GameState.__init__"]["ts"], outer["ts"] + outer["dur"])
+
+    def test_profiler(self, adv=False):
+        def burn():
+            deadline = time.process_time() + 0.05
+            while time.process_time() < deadline:
+                sum(range(1000))
+        with tempfile.TemporaryDirectory() as directory:
+            sampler = profiler.enable(directory, interval=0.001)
+            if sampler is None:
+                self.skipTest("This platform has no interval timers")
+            try:
+                for turn in (2, 10):
+                    with profiler.sampling(turn):
+                        burn()
+                burn()
+            finally:
+                profiler.disable()
+            self.assertFalse(profiler.enabled())
+            with open(os.path.join(directory, "profile.folded")) as folded:
+                game = folded.read().splitlines()
+            with open(os.path.join(directory, "profile_turns.folded")) as folded:
+                turns = folded.read().splitlines()
+
+        for line in game:
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+            self.assertIn("burn (tests.py:", stack, "Only sampled blocks should be profiled")
+        self.assertEqual(sum(int(line.rsplit(" ", 1)[1]) for line in game), sum(int(line.rsplit(" ", 1)[1]) for line in turns))
+        labels = [line.split(";", 1)[0] for line in turns]
+        self.assertEqual(["turn 2", "turn 10"], sorted(set(labels), key=labels.index), "Turns should be in numeric order")
+
+    def test_turn_timer(self, adv=False):
+        timer = TurnTimer(path="")
+        timer.configure({"timingAndReplay": {"waitTimeBotSoft": 5000, "waitTimeBotMax": 35000}})
+        timer.start_turn(0)
+        game = self.make_turn_0_map(adv)
+        game.find_path_to_edge([13, 0])
+        record = timer.end_turn()
+        self.assertIn("parse", record["counts"], "GameState parsing was not timed")
+        self.assertEqual(1, record["counts"]["pathfinding"], "Pathfinding was not timed")
+        self.assertFalse(record["over_soft"], "A tiny turn should be under the soft limit")
+        self.assertEqual(5, timer.soft_limit, "Soft limit should be read from the config in seconds")
+
+    def test_compute_budget(self, adv=False):
+        budget = ComputeBudget(target=0.5)
+        self.assertEqual(1, budget.recommend(), "Should recommend the minimum before anything is known")
+        budget.configure({"timingAndReplay": {"waitTimeBotSoft": 4000, "waitTimeBotMax": 35000}})
+        budget.start_turn()
+        budget.record(100, 0.01)
+        self.assertAlmostEqual(20000, budget.recommend(), delta=100, msg="2 seconds should afford 20000 units at 0.1ms each")
+        self.assertAlmostEqual(10000, budget.recommend(share=0.5), delta=100)
+        budget.end_turn()
+        budget.start_turn(reported_time=4500)
+        self.assertEqual(1, budget.slow_turns)
+        self.assertLess(budget.scale, 1, "A slow turn should shrink the budget")
+        self.assertGreater(budget.overhead, 1, "Time the engine counted that we didn't should become overhead")
+
+        budget = ComputeBudget(target=0.5, game_limit=5)
+        budget.configure({"timingAndReplay": {"waitTimeBotSoft": 4000, "waitTimeBotMax": 35000}})
+        budget.record(100, 0.01)
+        for turn in range(4):
+            budget.start_turn(reported_time=1000)
+        self.assertEqual(4, budget.total_time)
+        self.assertAlmostEqual(10000, budget.recommend(), delta=100, msg="Only 1 second of the game's 5 is left")
+
+    def test_watchdog(self, adv=False):
+        output = io.StringIO()
+        dog = TurnWatchdog()
+        with contextlib.redirect_stdout(output):
+            dog.arm(0)
+            game = self.make_turn_0_map(adv)
+            game.attempt_spawn("DF", [13, 6])
+            dog._fire()
+            game.submit_turn()
+            dog.disarm()
+        self.assertTrue(dog.fired, "Watchdog should have submitted the turn")
+        self.assertEqual([0], dog.forced_turns)
+        self.assertEqual('[["DF", 13, 6]]\n[]\n', output.getvalue(), "Exactly one turn should be submitted")
+
+        # A slow on_turn, with the watchdog due 0.5 seconds into the turn
+        game = self.make_turn_0_map(adv)
+        config = json.loads(json.dumps(game.config))
+        config["timingAndReplay"]["waitTimeBotMax"] = 2500
+        config["replaySave"] = 0
+        end = json.loads(game.serialized_string)
+        end["turnInfo"] = [2, 0, 0]
+        returncode, stdout, stderr = self.run_scripted_algo("AlgoCore", [json.dumps(config), game.serialized_string, 1.5, json.dumps(end)], turn_delay=1)
+        self.assertEqual(0, returncode, stderr)
+        self.assertEqual('[["FF", 13, 11]]\n[]\n', stdout, "The turn's own GameState should be submitted, not a lookahead state")
+        self.assertIn("Turn 0 was about to time out, the watchdog submitted the units spawned so far", stderr)
+        self.assertIn("Turn 0 was already submitted, dropping a late submission", stderr)
+
     def test_print_unit(self, adv=False):
         game = self.make_turn_0_map(adv)
 
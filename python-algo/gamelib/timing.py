@@ -0,0 +1,168 @@
+"""
+Per turn timing instrumentation.
+
+AlgoCore times every turn from the moment the turn message arrives until on_turn
+returns, and gamelib records spans for its expensive phases: "parse"
+(GameState.__init__), "pathfinding" (GameState.find_path_to_edge) and "submit"
+(GameState.submit_turn). Strategies can time their own code with
+
+    with gamelib.timing.span("my_search"):
+        ...
+
+Each turn is compared against waitTimeBotSoft and waitTimeBotMax from the config.
+Set the GAMELIB_TIMING_FILE environment variable to a file path to append one
+json line per turn to it.
+"""
+import contextlib
+import json
+import os
+import time
+
+from .logger import logger
+
+TIMING_FILE_VARIABLE = "GAMELIB_TIMING_FILE"
+
+
+class _Span:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NO_SPAN = contextlib.nullcontext()
+_active_timer = None
+
+
+def span(name):
+    """Times a block of code as part of the current turn
+
+    Args:
+        * name: The name the time is recorded under
+
+    Returns:
+        A context manager. It does nothing if no turn is being timed.
+
+    """
+    if _active_timer is None:
+        return _NO_SPAN
+    return _Span(_active_timer, name)
+
+def get_active_timer():
+    """Gets the TurnTimer timing the current turn, or None outside of a turn
+
+    """
+    return _active_timer
+
+
+class TurnTimer:
+    """Records where the time goes in each turn
+
+    Attributes:
+        * soft_limit (float): waitTimeBotSoft from the config, in seconds, or None before configure
+        * max_limit (float): waitTimeBotMax from the config, in seconds, or None before configure
+        * path (str): File to append per turn records to, or None to not write records
+        * last_record (dict): The record of the most recently finished turn, or None
+
+    """
+    def __init__(self, path=None):
+        self.soft_limit = None
+        self.max_limit = None
+        self.path = path if path is not None else os.environ.get(TIMING_FILE_VARIABLE)
+        self.last_record = None
+        self._turn_number = None
+        self._start = None
+        self._spans = {}
+        self._counts = {}
+
+    def configure(self, config):
+        """Reads the turn time limits from the game config
+
+        """
+        timing = config.get("timingAndReplay", {})
+        if "waitTimeBotSoft" in timing:
+            self.soft_limit = timing["waitTimeBotSoft"] / 1000
+        if "waitTimeBotMax" in timing:
+            self.max_limit = timing["waitTimeBotMax"] / 1000
+
+    def start_turn(self, turn_number=None, start=None):
+        """Starts timing a turn and makes this the timer used by span
+
+        Args:
+            * turn_number: The turn being timed, if known
+            * start: The time.perf_counter() value the turn started at, defaults to now
+
+        """
+        global _active_timer
+        self._turn_number = turn_number
+        self._start = time.perf_counter() if start is None else start
+        self._spans = {}
+        self._counts = {}
+        _active_timer = self
+
+    def add(self, name, seconds):
+        """Adds time to a span of the current turn
+
+        """
+        self._spans[name] = self._spans.get(name, 0) + seconds
+        self._counts[name] = self._counts.get(name, 0) + 1
+
+    def elapsed(self):
+        """Seconds since the current turn started, 0 outside of a turn
+
+        """
+        if self._start is None:
+            return 0
+        return time.perf_counter() - self._start
+
+    def remaining(self, use_max=False):
+        """Seconds left before the soft limit, or the max limit if use_max is True. None if the limit is unknown.
+
+        """
+        limit = self.max_limit if use_max else self.soft_limit
+        if limit is None:
+            return None
+        return limit - self.elapsed()
+
+    def end_turn(self):
+        """Finishes timing the current turn
+
+        Returns:
+            The turn's record, a dict with the turn number, the total and per span times in milliseconds,
+            the number of times each span ran, and whether the soft and max limits were exceeded
+
+        """
+        global _active_timer
+        if self._start is None:
+            return None
+        total = self.elapsed()
+        spans = dict(self._spans)
+        # Strategy time is everything in on_turn that isn't parsing or submitting
+        spans["strategy"] = total - spans.get("parse", 0) - spans.get("submit", 0)
+        record = {
+            "turn": self._turn_number,
+            "total_ms": round(total * 1000, 3),
+            "spans_ms": {name: round(seconds * 1000, 3) for name, seconds in spans.items()},
+            "counts": dict(self._counts),
+            "over_soft": self.soft_limit is not None and total > self.soft_limit,
+            "over_max": self.max_limit is not None and total > self.max_limit,
+        }
+        if record["over_soft"]:
+            logger.warning("Turn {} took {}ms, over the soft limit of {}ms", self._turn_number, record["total_ms"], self.soft_limit * 1000)
+        if self.path:
+            with open(self.path, "a") as timing_file:
+                timing_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.last_record = record
+        self._start = None
+        if _active_timer is self:
+            _active_timer = None
+        return record
@@ -0,0 +1,138 @@
+"""
+Records nested spans of algo execution in the Chrome trace event format, which can
+be opened in chrome://tracing, Perfetto or any other trace viewer.
+
+Tracing is off unless the GAMELIB_TRACE environment variable is set. Set it to 1 to
+write trace.json next to the algo, or to a file path. While tracing is off, span
+returns a shared object that does nothing, so leaving spans in place is close to free.
+
+AlgoCore traces every on_turn and on_action_frame, with the turn and frame number as
+metadata, and GameState traces its constructor and find_path_to_edge. Trace your own
+code with
+
+    with gamelib.tracing.span("simulate", candidates=len(candidates)):
+        ...
+"""
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+TRACE_VARIABLE = "GAMELIB_TRACE"
+
+_tracer = None
+_NO_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class Tracer:
+    """Collects trace events in memory and writes them out as a Chrome trace file
+
+    Attributes:
+        * path (str): The file the trace is written to
+        * context (dict): Metadata, such as the turn and frame, added to the args of every span
+
+    """
+    def __init__(self, path):
+        self.path = path
+        self.context = {}
+        self._events = []
+        self._pid = os.getpid()
+
+    def record(self, name, start, end, args=None):
+        """Adds a complete span. start and end are time.perf_counter() values.
+
+        """
+        span_args = dict(self.context)
+        if args:
+            span_args.update(args)
+        self._events.append({
+            "name": name,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+            "args": span_args,
+        })
+
+    def write(self):
+        """Writes every span recorded so far to the trace file
+
+        """
+        with open(self.path, "w") as trace_file:
+            json.dump({"traceEvents": self._events, "displayTimeUnit": "ms"}, trace_file)
+
+
+def enable(path=None):
+    """Starts tracing. The trace is written when the program exits.
+
+    Args:
+        * path: The trace file, trace.json next to the running algo if None
+
+    """
+    global _tracer
+    if path is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), "trace.json")
+    _tracer = Tracer(path)
+    atexit.register(_tracer.write)
+    return _tracer
+
+def disable():
+    """Stops tracing and writes the trace recorded so far
+
+    """
+    global _tracer
+    if _tracer is not None:
+        atexit.unregister(_tracer.write)
+        _tracer.write()
+        _tracer = None
+
+def enabled():
+    return _tracer is not None
+
+def set_context(**context):
+    """Replaces the metadata attached to new spans, for example set_context(turn=3, frame=12)
+
+    """
+    if _tracer is not None:
+        _tracer.context = context
+
+def span(name, **args):
+    """Traces a block of code
+
+    Args:
+        * name: The name shown in the trace viewer
+        * args: Extra metadata to attach to the span
+
+    Returns:
+        A context manager. It does nothing while tracing is off.
+
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return _Span(_tracer, name, args)
+
+
+_setting = os.environ.get(TRACE_VARIABLE)
+if _setting:
+    enable(None if _setting == "1" else _setting)
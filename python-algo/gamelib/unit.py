@@ -1,11 +1,11 @@
-def is_stationary(unit_type, firewall_types):
-    return unit_type in firewall_types
+from .compiled_config import compile_config
 
 class GameUnit:
     """Holds information about a Unit. 
 
     Attributes:
         * unit_type (string): This unit's type
+        * type_id (int): This unit's type id, its index in the config's unitInformation, see the compiled_config module
         * config (JSON): Contains information about the game
         * player_index (integer): The player that controls this unit. 0 for you, 1 for your opponent.
         * x (integer): The x coordinate of the unit
@@ -35,22 +35,19 @@ class GameUnit:
         self.stability = self.max_stability if not stability else stability
 
     def __serialize_type(self):
-        from .game_state import FIREWALL_TYPES, UNIT_TYPE_TO_INDEX, ENCRYPTOR
-        self.stationary = is_stationary(self.unit_type, FIREWALL_TYPES)
-        type_config = self.config["unitInformation"][UNIT_TYPE_TO_INDEX[self.unit_type]]
+        compiled = compile_config(self.config)
+        type_id = self.type_id = compiled.type_ids[self.unit_type]
+        self.stationary = compiled.stationary[type_id]
         if self.stationary:
             self.speed = 0
-            if self.unit_type == ENCRYPTOR:
-                self.damage = type_config["shieldAmount"]
-            else:
-                self.damage = type_config["damage"]
+            self.damage = compiled.damage[type_id]
         else:
-            self.speed = type_config["speed"]
-            self.damage_f = type_config["damageF"]
-            self.damage_i = type_config["damageI"]
-        self.range = type_config["range"]
-        self.max_stability = type_config["stability"]
-        self.cost = type_config["cost"]
+            self.speed = compiled.speed[type_id]
+            self.damage_f = compiled.damage_f[type_id]
+            self.damage_i = compiled.damage_i[type_id]
+        self.range = compiled.range[type_id]
+        self.max_stability = compiled.stability[type_id]
+        self.cost = compiled.cost[type_id]
 
     def __toString(self):
         owner = "Friendly" if self.player_index == 0 else "Enemy"
@@ -0,0 +1,169 @@
+"""
+Makes sure a turn is submitted before the engine's time limit.
+
+AlgoCore arms a TurnWatchdog when a turn message arrives. If the strategy has not
+submitted by margin seconds before waitTimeBotMax, the watchdog submits on its
+behalf from a timer thread, using the plan recorded with GameState.record_plan or,
+failing that, everything spawned so far on the first GameState built during the turn.
+That is the state parsed from the turn message, so GameStates built afterwards for
+what-if searches or lookahead are never submitted. Record a plan to submit another.
+
+Every submission goes through submit, which emits exactly one pair of lines per
+turn: whichever of the strategy and the watchdog submits first wins, and later
+submissions for that turn are dropped with a warning. Long searches can check
+AlgoCore.watchdog.fired to stop early once their turn has been submitted for them.
+"""
+import json
+import threading
+import time
+
+from .util import send_command
+from .logger import logger
+
+_active = None
+
+
+class TurnWatchdog:
+    """Submits a fallback turn if the strategy runs out of time
+
+    Attributes:
+        * margin (float): Seconds before the limit at which the watchdog submits
+        * limit (float): The turn time limit in seconds, waitTimeBotMax once configured. None disables the watchdog.
+        * enabled (bool): Set to False to never force a submission
+        * fired (bool): True if the watchdog submitted the current turn
+        * forced_turns (list): The turn numbers the watchdog has submitted
+
+    """
+    def __init__(self, margin=2.0):
+        self.margin = margin
+        self.limit = None
+        self.enabled = True
+        self.fired = False
+        self.forced_turns = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._submitted = True
+        self._turn_number = None
+        self._game_state = None
+        self._plan = None
+
+    def configure(self, config):
+        """Reads waitTimeBotMax from the game config
+
+        """
+        timing = config.get("timingAndReplay", {})
+        if "waitTimeBotMax" in timing:
+            self.limit = timing["waitTimeBotMax"] / 1000
+
+    def arm(self, turn_number, start=None):
+        """Starts watching a turn. Called by AlgoCore when a turn message arrives.
+
+        Args:
+            * turn_number: The turn being watched
+            * start: The time.perf_counter() value the turn message arrived at, defaults to now
+
+        """
+        global _active
+        self.disarm()
+        with self._lock:
+            self._submitted = False
+            self.fired = False
+            self._turn_number = turn_number
+            self._game_state = None
+            self._plan = None
+        _active = self
+        if self.enabled and self.limit is not None:
+            start = time.perf_counter() if start is None else start
+            delay = max(0, self.limit - self.margin - (time.perf_counter() - start))
+            self._timer = threading.Timer(delay, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def disarm(self):
+        """Stops watching the current turn. Called by AlgoCore once on_turn returns.
+
+        """
+        global _active
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if _active is self:
+            _active = None
+
+    def track(self, game_state):
+        """Makes a GameState the source of the fallback turn if no plan has been recorded
+
+        Only the first GameState tracked after arm is kept, later ones are scratch states.
+        """
+        if self._game_state is None:
+            self._game_state = game_state
+
+    def record_plan(self, build_stack, deploy_stack):
+        """Records the turn to submit if the watchdog fires
+
+        """
+        self._plan = (list(build_stack), list(deploy_stack))
+
+    def submit(self, build_string, deploy_string):
+        """Sends the turn unless it has already been submitted
+
+        Returns:
+            True if the lines were sent
+
+        """
+        with self._lock:
+            if self._submitted:
+                logger.warning("Turn {} was already submitted, dropping a late submission", self._turn_number)
+                return False
+            self._submitted = True
+            send_command(build_string)
+            send_command(deploy_string)
+            return True
+
+    def _fire(self):
+        with self._lock:
+            if self._submitted:
+                return
+            if self._plan is not None:
+                build_stack, deploy_stack = self._plan
+                source = "the recorded plan"
+            elif self._game_state is not None:
+                build_stack, deploy_stack = list(self._game_state._build_stack), list(self._game_state._deploy_stack)
+                source = "the units spawned so far"
+            else:
+                build_stack, deploy_stack = [], []
+                source = "an empty turn"
+            self._submitted = True
+            self.fired = True
+            self.forced_turns.append(self._turn_number)
+            send_command(json.dumps(build_stack))
+            send_command(json.dumps(deploy_stack))
+        logger.warning("Turn {} was about to time out, the watchdog submitted {}", self._turn_number, source)
+
+
+def get_active_watchdog():
+    """Gets the TurnWatchdog watching the current turn, or None outside of a turn
+
+    """
+    return _active
+
+def track(game_state):
+    if _active is not None:
+        _active.track(game_state)
+
+def record_plan(build_stack, deploy_stack):
+    if _active is not None:
+        _active.record_plan(build_stack, deploy_stack)
+
+def submit(build_string, deploy_string):
+    """Sends a turn, through the active watchdog if there is one
+
+    Returns:
+        True if the lines were sent
+
+    """
+    if _active is None:
+        send_command(build_string)
+        send_command(deploy_string)
+        return True
+    return _active.submit(build_string, deploy_string)
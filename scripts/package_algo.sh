@@ -0,0 +1,22 @@
+#!/usr/bin/env bash
+# Builds the algo's precomputed tables, see gamelib/precompute.py, then zips the algo
+echo "Package Algo"
+scriptDir="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
+defaultAlgo=$PWD/python-algo
+
+algo=${1:-${defaultAlgo}}
+algo=${algo%/}
+output=${2:-${algo}.zip}
+config=${3:-$PWD/game-configs.json}
+
+if [ -f "${algo}/gamelib/precompute.py" ]; then
+    echo "Building ${algo}/precomputed.bin from ${config}"
+    (cd "${algo}" && ${PYTHON_CMD:-python3} -m gamelib precompute "${config}" precomputed.bin) || exit 1
+fi
+
+case "$(uname)" in
+    Darwin) zipalgo="${scriptDir}/zipalgo_mac" ;;
+    *) zipalgo="${scriptDir}/zipalgo_linux" ;;
+esac
+echo "Zipping ${algo} to ${output}"
+"${zipalgo}" "${algo}" "${output}"